@@ -0,0 +1,4 @@
+"""
+Benchmarks of workflow runner on synthetic workflows, see
+:mod:`benchmarks.run`.
+"""
@@ -0,0 +1,192 @@
+"""
+Run benchmarks of workflow runner and print JSON report.
+
+Usage::
+
+    python -m benchmarks.run --sizes 100 1000 --output report.json
+    python -m benchmarks.run --compare report.json
+
+Report contains for each shape and size durations (in seconds) of
+:meth:`wfepy.Workflow.load_tasks`, :meth:`wfepy.WorkflowBuilder.build`,
+:meth:`wfepy.Workflow.check_graph` and :meth:`wfepy.Runner.run` in step and
+incremental mode, throughput of runs in executed tasks per second, size and
+duration of :meth:`wfepy.Runner.dump` and :meth:`wfepy.Runner.load` and peak
+memory allocated by run. Durations are minimum of repeated measurements.
+
+With ``--compare`` durations and peak memory are compared to previous report
+and command exits with status 1 if any of them is worse by more than
+``--threshold``.
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import wfepy
+
+from .shapes import SHAPES
+
+
+DEFAULT_SIZES = [10, 100, 1000]
+
+# Metrics compared by --compare, lower is better.
+COMPARED = (
+    'load_tasks', 'build', 'check_graph', 'run_step', 'run_incremental',
+    'dump', 'load', 'peak_memory',
+)
+
+
+def timeit(func, repeat):
+    """Return minimal duration of `repeat` calls of func and its last result."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        duration = time.perf_counter() - start
+        if best is None or duration < best:
+            best = duration
+    return best, result
+
+
+def run_workflow(workflow, context_factory, incremental):
+    """
+    Run workflow until it is finished, tasks waiting for ``release`` are
+    released after first run. Returns runner.
+    """
+    context = context_factory()
+    runner = workflow.create_runner(context, incremental=incremental)
+    runner.run()
+    if not runner.finished and 'release' in context:
+        # second run with still waiting tasks measures cost of polling
+        runner.run()
+        context['release'] = True
+        runner.run()
+    if not runner.finished:
+        raise RuntimeError('Workflow was not finished: %r' % runner.state)
+    return runner
+
+
+def bench(shape, size, repeat):
+    """Measure workflow of shape and size, return dict with metrics."""
+    module, context_factory = SHAPES[shape](size)
+    result = {}
+
+    def load_tasks():
+        workflow = wfepy.Workflow()
+        workflow.load_tasks(module)
+        return workflow
+    result['load_tasks'], workflow = timeit(load_tasks, repeat)
+
+    def build():
+        builder = wfepy.WorkflowBuilder()
+        builder.add_tasks(workflow.tasks.values())
+        return builder.build(check=False)
+    result['build'], _ = timeit(build, repeat)
+    result['check_graph'], _ = timeit(workflow.check_graph, repeat)
+
+    for mode, incremental in (('step', False), ('incremental', True)):
+        duration, runner = timeit(
+            lambda: run_workflow(workflow, context_factory, incremental),
+            repeat,
+        )
+        result['run_' + mode] = duration
+        result['executed_' + mode] = runner.context['executed']
+        result['throughput_' + mode] = runner.context['executed'] / duration
+
+    tracemalloc.start()
+    try:
+        run_workflow(workflow, context_factory, True)
+        _, result['peak_memory'] = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    # dump runner in the middle of execution, when state is largest
+    runner = workflow.create_runner(context_factory())
+    runner.state = [(name, wfepy.TaskState.NEW) for name in workflow.tasks]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'runner.pickle')
+        result['dump'], _ = timeit(lambda: runner.dump(path), repeat)
+        result['dump_size'] = os.path.getsize(path)
+        result['load'], _ = timeit(
+            lambda: workflow.create_runner().load(path), repeat)
+
+    return result
+
+
+def compare(report, previous, threshold):
+    """Return list of regressions of `report` against `previous` report."""
+    regressions = []
+    for shape, sizes in sorted(report['results'].items()):
+        for size, metrics in sorted(sizes.items(), key=lambda i: int(i[0])):
+            old_metrics = previous['results'].get(shape, {}).get(size)
+            if not old_metrics:
+                continue
+            for metric in COMPARED:
+                old, new = old_metrics.get(metric), metrics.get(metric)
+                if not old or new is None:
+                    continue
+                change = (new - old) / old
+                if change > threshold:
+                    regressions.append({
+                        'shape': shape,
+                        'size': int(size),
+                        'metric': metric,
+                        'old': old,
+                        'new': new,
+                        'change': change,
+                    })
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--shapes', nargs='+', choices=sorted(SHAPES),
+                        default=sorted(SHAPES))
+    parser.add_argument('--sizes', nargs='+', type=int, default=DEFAULT_SIZES)
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='number of measurements, minimum is reported')
+    parser.add_argument('--output', help='write report to file')
+    parser.add_argument('--compare', metavar='REPORT',
+                        help='compare with previous report')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='relative change reported as regression')
+    args = parser.parse_args(argv)
+
+    report = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'wfepy': wfepy.__version__,
+        'results': {},
+    }
+    for shape in args.shapes:
+        report['results'][shape] = {}
+        for size in args.sizes:
+            report['results'][shape][str(size)] = bench(shape, size, args.repeat)
+
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)
+        report['regressions'] = compare(report, previous, args.threshold)
+
+    output = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+    if report.get('regressions'):
+        for regression in report['regressions']:
+            print('Regression {shape}/{size} {metric}: {old:.6g} -> {new:.6g} '
+                  '({change:+.0%})'.format(**regression), file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,115 @@
+"""
+Generators of synthetic workflows of different shapes. Each generator returns
+module with tasks that can be loaded by :meth:`wfepy.Workflow.load_tasks` and
+function creating fresh context for runner.
+
+Tasks count executions in context key ``executed`` so throughput can be
+computed from any run.
+"""
+
+import types
+
+import wfepy
+
+
+def _module(name, tasks):
+    module = types.ModuleType('benchmarks.shapes.' + name)
+    module.__file__ = __file__
+    for task in tasks:
+        setattr(module, task.name, task)
+    return module
+
+
+def _task(name, func=None):
+    def done(ctx):
+        ctx['executed'] += 1
+        return True
+    return wfepy.Task(func or done, name=name)
+
+
+def _link(task, dest, cond=None):
+    task.followed_by.add(wfepy.Transition(dest, cond=cond))
+
+
+def chain(size):
+    """Long chain of `size` tasks, each followed by single task."""
+    tasks = [_task('task_%d' % i) for i in range(size)]
+    for task, next_task in zip(tasks, tasks[1:]):
+        _link(task, next_task.name)
+    tasks[0].is_start_point = True
+    tasks[-1].is_end_point = True
+
+    def context():
+        return {'executed': 0}
+    return _module('chain', tasks), context
+
+
+def fan(size):
+    """Start task followed by `size` parallel tasks joined to end task."""
+    start = _task('start')
+    start.is_start_point = True
+    end = _task('end')
+    end.is_join_point = end.is_end_point = True
+    branches = [_task('branch_%d' % i) for i in range(size)]
+    for branch in branches:
+        _link(start, branch.name)
+        _link(branch, end.name)
+
+    def context():
+        return {'executed': 0}
+    return _module('fan', [start, end] + branches), context
+
+
+def loop(size):
+    """
+    Loop of two tasks repeated `size` times via condition on transition back
+    to beginning of loop, then exited to end task.
+    """
+    def head_func(ctx):
+        ctx['executed'] += 1
+        ctx['iteration'] += 1
+        return True
+
+    head = _task('head', head_func)
+    head.is_start_point = True
+    body = _task('body')
+    end = _task('end')
+    end.is_end_point = True
+    _link(head, body.name)
+    _link(body, head.name, cond=lambda ctx: ctx['iteration'] < size)
+    _link(body, end.name, cond=lambda ctx: ctx['iteration'] >= size)
+
+    def context():
+        return {'executed': 0, 'iteration': 0}
+    return _module('loop', [head, body, end]), context
+
+
+def waiting(size):
+    """
+    Start task followed by `size` parallel tasks waiting until context key
+    ``release`` is set, joined to end task.
+    """
+    def wait_func(ctx):
+        ctx['executed'] += 1
+        return ctx['release']
+
+    start = _task('start')
+    start.is_start_point = True
+    end = _task('end')
+    end.is_join_point = end.is_end_point = True
+    branches = [_task('wait_%d' % i, wait_func) for i in range(size)]
+    for branch in branches:
+        _link(start, branch.name)
+        _link(branch, end.name)
+
+    def context():
+        return {'executed': 0, 'release': False}
+    return _module('waiting', [start, end] + branches), context
+
+
+SHAPES = {
+    'chain': chain,
+    'fan': fan,
+    'loop': loop,
+    'waiting': waiting,
+}
@@ -41,6 +41,7 @@ setup(
         'Topic :: Software Development :: Libraries',
     ],
     packages=['wfepy'],
-    install_requires=['attrs', 'graphviz'],
+    install_requires=['attrs>=19.2'],
+    extras_require={'graphviz': ['graphviz'], 'yaml': ['PyYAML']},
     python_requires='>=3.5, <4',
 )
@@ -0,0 +1,106 @@
+import unittest
+
+import wfepy
+
+
+@wfepy.task()
+@wfepy.start_point()
+@wfepy.followed_by('wait')
+def start(ctx):
+    ctx['done'].append('start')
+    return True
+
+
+@wfepy.task()
+@wfepy.followed_by('end')
+def wait(ctx):
+    ctx['done'].append('wait')
+    if ctx.get('fail'):
+        raise RuntimeError
+    return not ctx['wait']
+
+
+@wfepy.task()
+@wfepy.end_point()
+def end(ctx):
+    ctx['done'].append('end')
+    return True
+
+
+class BatchRunnerTestCase(unittest.TestCase):
+    """
+    Batch runner must run only instances that can make progress. Instances
+    with waiting tasks are run only when woken up or when waiting instances
+    are requested explicitly.
+    """
+
+    def setUp(self):
+        self.workflow = wfepy.Workflow()
+        self.workflow.load_tasks(__name__)
+        self.workflow.check_graph()
+        self.batch = wfepy.BatchRunner(self.workflow)
+        self.contexts = {}
+        for key in range(5):
+            self.contexts[key] = {'done': [], 'wait': key % 2 == 0}
+            self.batch.add(key, self.contexts[key])
+
+    def test_add(self):
+        """Test if instances were added as runnable."""
+        self.assertListEqual(self.batch.keys(wfepy.InstanceStatus.RUNNABLE),
+                             [0, 1, 2, 3, 4])
+        with self.assertRaises(KeyError):
+            self.batch.add(0)
+
+    def test_run(self):
+        """Test if waiting and finished instances are skipped."""
+        results = self.batch.run()
+        self.assertListEqual([(r.key, r.status) for r in results], [
+            (0, wfepy.InstanceStatus.WAITING),
+            (1, wfepy.InstanceStatus.FINISHED),
+            (2, wfepy.InstanceStatus.WAITING),
+            (3, wfepy.InstanceStatus.FINISHED),
+            (4, wfepy.InstanceStatus.WAITING),
+        ])
+        self.assertListEqual(self.batch.run(), [])
+        self.assertListEqual(self.contexts[0]['done'], ['start', 'wait'])
+
+        self.contexts[2]['wait'] = False
+        self.batch.wake(2)
+        results = self.batch.run()
+        self.assertListEqual([(r.key, r.finished) for r in results], [(2, True)])
+        self.assertListEqual(self.contexts[2]['done'], ['start', 'wait', 'wait', 'end'])
+
+        results = self.batch.run(waiting=True)
+        self.assertListEqual([(r.key, r.finished) for r in results],
+                             [(0, False), (4, False)])
+        self.assertListEqual(self.batch.keys(wfepy.InstanceStatus.FINISHED),
+                             [1, 3, 2])
+
+    def test_run_error(self):
+        """Test if error of instance is reported and other instances run."""
+        self.contexts[1]['fail'] = True
+        results = self.batch.run()
+        self.assertIsInstance(results[1].error, RuntimeError)
+        self.assertEqual(results[1].status, wfepy.InstanceStatus.RUNNABLE)
+        self.assertTrue(results[3].finished)
+
+        self.contexts[1]['fail'] = False
+        results = self.batch.run()
+        self.assertListEqual([(r.key, r.finished) for r in results], [(1, True)])
+
+    def test_state(self):
+        """Test if instance can be added with stored state."""
+        self.batch.remove(0)
+        self.batch.add(0, self.contexts[0], [('wait', wfepy.TaskState.WAITING)])
+        self.assertEqual(self.batch.statuses[0], wfepy.InstanceStatus.WAITING)
+        self.batch.add(5, {'done': []}, [])
+        self.assertEqual(self.batch.statuses[5], wfepy.InstanceStatus.FINISHED)
+
+    def test_compact_state(self):
+        """Test if stored state of instance is kept as compact state."""
+        batch = wfepy.BatchRunner(self.workflow, runner_options={
+            'incremental': True, 'compact_state': True})
+        runner = batch.add(0, {'done': [], 'wait': True},
+                           [('wait', wfepy.TaskState.WAITING)])
+        self.assertIsInstance(runner.state, wfepy.CompactState)
+        self.assertEqual(batch.statuses[0], wfepy.InstanceStatus.WAITING)
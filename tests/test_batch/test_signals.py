@@ -0,0 +1,48 @@
+import unittest
+
+import wfepy
+
+
+@wfepy.task()
+@wfepy.start_point()
+@wfepy.followed_by('end')
+def start(ctx, payload=None):
+    if payload is None:
+        return wfepy.Wait(event=ctx['event'])
+    ctx['payload'] = payload
+    return True
+
+
+@wfepy.task()
+@wfepy.end_point()
+def end(ctx):
+    return True
+
+
+class BatchRunnerSignalsTestCase(unittest.TestCase):
+    """
+    Signal must be routed only to instances waiting for its event.
+    """
+
+    def setUp(self):
+        self.workflow = wfepy.Workflow()
+        self.workflow.load_tasks(__name__)
+        self.workflow.check_graph()
+        self.batch = wfepy.BatchRunner(self.workflow)
+        for key, event in enumerate(['a', 'b', 'a']):
+            self.batch.add(key, {'event': event})
+        self.batch.run()
+
+    def test_signal(self):
+        """Test if only instances waiting for event are woken up and run."""
+        self.assertListEqual(self.batch.signal('c'), [])
+        self.assertListEqual(self.batch.signal('a', 42), [0, 2])
+        self.assertListEqual(self.batch.signal('a', 43), [])
+        results = self.batch.run()
+        self.assertListEqual([(r.key, r.finished) for r in results],
+                             [(0, True), (2, True)])
+        self.assertEqual(self.batch.runners[2].context['payload'], 42)
+        self.assertNotIn('payload', self.batch.runners[1].context)
+
+        self.batch.remove(1)
+        self.assertListEqual(self.batch.signal('b'), [])
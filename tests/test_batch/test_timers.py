@@ -0,0 +1,54 @@
+import time
+import unittest
+
+import wfepy
+
+
+@wfepy.task()
+@wfepy.start_point()
+@wfepy.followed_by('end')
+def start(ctx):
+    ctx['runs'] += 1
+    if ctx['runs'] == 1:
+        return wfepy.Wait(after=ctx['after'])
+    return True
+
+
+@wfepy.task()
+@wfepy.end_point()
+def end(ctx):
+    return True
+
+
+class BatchRunnerTimersTestCase(unittest.TestCase):
+    """
+    Instances waiting for deadline must be woken up and run when their deadline
+    passed, in order of deadlines.
+    """
+
+    def setUp(self):
+        self.workflow = wfepy.Workflow()
+        self.workflow.load_tasks(__name__)
+        self.workflow.check_graph()
+        self.batch = wfepy.BatchRunner(self.workflow)
+        for key, after in enumerate([3600, 7200, 1800]):
+            self.batch.add(key, {'runs': 0, 'after': after})
+        self.batch.run()
+
+    def test_wake_due(self):
+        """Test if instances are woken up by deadlines."""
+        now = time.time()
+        self.assertAlmostEqual(self.batch.next_wakeup, now + 1800, delta=60)
+        self.assertListEqual(self.batch.wake_due(now), [])
+        self.assertListEqual(self.batch.wake_due(now + 5000), [2, 0])
+        self.assertListEqual(self.batch.keys(wfepy.InstanceStatus.RUNNABLE), [2, 0])
+        self.assertAlmostEqual(self.batch.next_wakeup, now + 7200, delta=60)
+
+    def test_run(self):
+        """Test if due instances are run."""
+        self.assertListEqual(self.batch.run(), [])
+        self.batch.runners[1].wakeups['start'] = time.time() - 1
+        self.batch.update(1)
+        results = self.batch.run()
+        self.assertListEqual([(r.key, r.finished) for r in results], [(1, True)])
+        self.assertEqual(self.batch.runners[0].context['runs'], 1)
@@ -0,0 +1,73 @@
+import importlib
+import os
+import subprocess
+import sys
+import unittest
+
+import wfepy
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Budget of import of package in seconds, can be raised for slow machines.
+BUDGET = float(os.environ.get('WFEPY_IMPORT_BUDGET', '0.3'))
+
+# Modules needed only by optional features.
+DEFERRED = ('asyncio', 'pickle', 'sqlite3', 'concurrent.futures', 'graphviz',
+            'yaml', 'wfepy.batch', 'wfepy.process', 'wfepy.store')
+
+
+def run_python(*args):
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    return subprocess.run(
+        [sys.executable] + list(args), env=env, check=True,
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+
+
+def import_time(module_name):
+    """Cumulative import time of module in seconds, see ``-X importtime``."""
+    output = run_python('-X', 'importtime', '-c', 'import ' + module_name).stderr
+    for line in output.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        if name.strip() == module_name:
+            return int(cumulative) / 1e6
+    raise AssertionError('Import of %s not reported' % module_name)
+
+
+class ImportTestCase(unittest.TestCase):
+    """
+    Import of package must not import optional features and must fit into
+    startup budget.
+    """
+
+    @unittest.skipIf(sys.version_info < (3, 7), 'requires -X importtime')
+    def test_import_time(self):
+        """Test if import of package is under budget."""
+        # Best of few runs, first run can be slowed down by compilation.
+        duration = min(import_time('wfepy') for _ in range(3))
+        self.assertLess(duration, BUDGET)
+
+    @unittest.skipIf(sys.version_info < (3, 7), 'requires PEP 562')
+    def test_deferred(self):
+        """Test if optional modules are not imported by import of package."""
+        output = run_python('-c', 'import sys, wfepy; print(" ".join(sys.modules))')
+        imported = set(output.stdout.split())
+        self.assertListEqual([name for name in DEFERRED if name in imported], [])
+
+    def test_deferred_submodules(self):
+        """Test if optional modules are not imported by import of submodules."""
+        output = run_python('-c', 'import sys, wfepy.workqueue; '
+                                  'print("sqlite3" in sys.modules)')
+        self.assertEqual(output.stdout.strip(), 'False')
+
+    def test_lazy_names(self):
+        """Test if lazy names of package match exported names of submodules."""
+        for module_name, names in wfepy._LAZY_NAMES.items():
+            module = importlib.import_module('wfepy.' + module_name)
+            self.assertCountEqual(names, module.__all__)
+            for name in names:
+                self.assertIs(getattr(wfepy, name), getattr(module, name))
+                self.assertIn(name, dir(wfepy))
+        self.assertFalse(hasattr(wfepy, 'missing'))
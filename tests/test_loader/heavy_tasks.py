@@ -0,0 +1,10 @@
+# Module of tasks that must not be imported until tasks are executed.
+
+
+def process(ctx):
+    ctx['done'].append('process')
+    return True
+
+
+def is_valid(ctx):
+    return ctx['valid']
@@ -0,0 +1,105 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+import wfepy
+import wfepy.loader
+
+
+HEAVY = 'tests.test_loader.heavy_tasks'
+
+
+def start(ctx):
+    ctx['done'].append('start')
+    return ctx['ready']
+
+
+def end(ctx):
+    ctx['done'].append('end')
+    return True
+
+
+DEFINITION = {
+    'tasks': {
+        'start': {
+            'func': __name__ + ':start',
+            'start_point': True,
+            'followed_by': ['process'],
+        },
+        'process': {
+            'func': HEAVY + ':process',
+            'followed_by': [{'dest': 'end', 'cond': HEAVY + ':is_valid'}],
+        },
+        'end': {
+            'func': __name__ + ':end',
+            'end_point': True,
+        },
+    },
+}
+
+
+class LazyLoadingTestCase(unittest.TestCase):
+    """
+    Functions of lazily loaded workflow must be imported only when they are
+    called for the first time.
+    """
+
+    def setUp(self):
+        sys.modules.pop(HEAVY, None)
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.path = os.path.join(tmpdir.name, 'workflow.json')
+        with open(self.path, 'w') as f:
+            json.dump(DEFINITION, f)
+
+    def test_loader(self):
+        """Test if task is imported when it is executed."""
+        workflow = wfepy.loader.WorkflowLoader(lazy=True).load(self.path)
+        self.assertNotIn(HEAVY, sys.modules)
+        process = workflow.tasks['process']
+        self.assertIsInstance(process.func, wfepy.LazyFunction)
+        self.assertEqual(process.func.__module__, HEAVY)
+
+        context = {'done': [], 'ready': False, 'valid': True}
+        runner = workflow.create_runner(context)
+        runner.run()
+        self.assertNotIn(HEAVY, sys.modules)
+        report = wfepy.loader.import_report(workflow)
+        self.assertListEqual([record.name for record in report.loaded], ['start'])
+        self.assertCountEqual([record.name for record in report.deferred],
+                              ['process', 'process->end', 'end'])
+
+        context['ready'] = True
+        runner.run()
+        self.assertTrue(runner.finished)
+        self.assertListEqual(context['done'], ['start', 'start', 'process', 'end'])
+        report = wfepy.loader.import_report(workflow)
+        self.assertListEqual(report.deferred, [])
+        record, = [record for record in report.records if record.name == 'process']
+        self.assertIn(HEAVY, record.modules)
+        self.assertGreaterEqual(report.load_time, record.load_time)
+        self.assertIn('4 of 4 functions imported', report.format())
+
+    def test_builder(self):
+        """Test if builder accepts import paths of functions."""
+        builder = wfepy.WorkflowBuilder()
+        builder.add_task('start', HEAVY + ':process', start_point=True, end_point=True)
+        builder.add_transition('start', 'start', cond=HEAVY + ':is_valid')
+        workflow = builder.build(check=False)
+        self.assertNotIn(HEAVY, sys.modules)
+        self.assertEqual(workflow.tasks['start'].func.reference, HEAVY + ':process')
+
+        report = wfepy.loader.import_report(workflow, measure=True)
+        self.assertEqual(len(report.deferred), 2)
+        self.assertGreater(report.saved_time, 0)
+        self.assertNotIn(HEAVY, sys.modules)
+
+    def test_invalid_reference(self):
+        """Test if invalid import path is rejected without import."""
+        with self.assertRaises(wfepy.WorkflowError):
+            wfepy.LazyFunction('tests.test_loader.heavy_tasks.process')
+        func = wfepy.LazyFunction(HEAVY + ':missing')
+        with self.assertRaises(wfepy.WorkflowError):
+            func({})
@@ -0,0 +1,164 @@
+import importlib.util
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import wfepy
+import wfepy.loader
+
+
+def start(ctx):
+    ctx['done'].append('start')
+    return True
+
+
+def review(ctx):
+    ctx['done'].append('review')
+    return True
+
+
+def end(ctx):
+    ctx['done'].append('end')
+    return True
+
+
+def approved(ctx):
+    return ctx['approved']
+
+
+DEFINITION = {
+    'conditions': {
+        'approved': __name__ + ':approved',
+    },
+    'tasks': {
+        'start': {
+            'func': __name__ + ':start',
+            'start_point': True,
+            'followed_by': ['review'],
+        },
+        'review': {
+            'func': __name__ + ':review',
+            'labels': ['manual'],
+            'followed_by': [{'dest': 'end', 'cond': 'approved'}],
+        },
+        'end': {
+            'func': __name__ + ':end',
+            'end_point': True,
+        },
+    },
+}
+
+YAML_DEFINITION = """
+tasks:
+  start:
+    func: {module}:start
+    start_point: true
+    followed_by: [end]
+  end:
+    func: {module}:end
+    end_point: true
+""".format(module=__name__)
+
+
+class WorkflowLoaderTestCase(unittest.TestCase):
+    """
+    Workflow loaded from definition file must have tasks and transitions from
+    definition. Validated definition is cached by hash of file.
+    """
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache_dir = os.path.join(self.tmp_dir.name, 'cache')
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def write(self, name, content):
+        path = os.path.join(self.tmp_dir.name, name)
+        with open(path, 'w') as f:
+            f.write(content)
+        return path
+
+    def test_load(self):
+        """Test if workflow is loaded from JSON and can be run."""
+        path = self.write('workflow.json', json.dumps(DEFINITION))
+        workflow = wfepy.loader.WorkflowLoader().load(path)
+        self.assertListEqual(workflow.start_points, ['start'])
+        self.assertSetEqual(workflow.tasks['review'].labels, {'manual'})
+        self.assertSetEqual(workflow.tasks['end'].preceded_by, {'review'})
+
+        context = {'done': [], 'approved': False}
+        runner = workflow.create_runner(context)
+        runner.run()
+        self.assertTrue(runner.finished)
+        self.assertListEqual(context['done'], ['start', 'review'])
+
+    @unittest.skipUnless(importlib.util.find_spec('yaml'), 'requires PyYAML')
+    def test_load_yaml(self):
+        """Test if workflow is loaded from YAML."""
+        path = self.write('workflow.yaml', YAML_DEFINITION)
+        workflow = wfepy.loader.WorkflowLoader().load(path)
+        self.assertCountEqual(workflow.tasks, ['start', 'end'])
+        self.assertListEqual(workflow.end_points, ['end'])
+
+    def test_cache(self):
+        """Test if cached definition skips validation and graph check."""
+        path = self.write('workflow.json', json.dumps(DEFINITION))
+        loader = wfepy.loader.WorkflowLoader(cache_dir=self.cache_dir)
+        loader.load(path)
+        self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+
+        with mock.patch.object(loader, 'validate') as validate, \
+                mock.patch.object(wfepy.Workflow, 'check_graph') as check_graph:
+            workflow = loader.load(path)
+        validate.assert_not_called()
+        check_graph.assert_not_called()
+        self.assertSetEqual(workflow.tasks['end'].preceded_by, {'review'})
+
+        # changed file is validated again
+        path = self.write('workflow.json', json.dumps(DEFINITION, indent=2))
+        with mock.patch.object(wfepy.Workflow, 'check_graph') as check_graph:
+            loader.load(path)
+        check_graph.assert_called_once_with()
+        self.assertEqual(len(os.listdir(self.cache_dir)), 2)
+
+    def test_invalid(self):
+        """Test if invalid definitions and graphs raise error."""
+        loader = wfepy.loader.WorkflowLoader(cache_dir=self.cache_dir)
+        invalid = [
+            {},
+            {'tasks': {'start': {'start_point': True}}},
+            {'tasks': {'start': {'func': __name__ + ':start', 'foo': 1}}},
+            {'tasks': {'start': {'func': __name__ + ':start',
+                                 'followed_by': [{'dest': 'end', 'cond': 'x'}]}}},
+            {'tasks': {'start': {'func': __name__ + ':missing'}}},
+            {'tasks': {'start': {'func': __name__ + ':start'}}},
+        ]
+        for data in invalid:
+            path = self.write('workflow.json', json.dumps(data))
+            with self.assertRaises(wfepy.WorkflowError):
+                loader.load(path)
+        self.assertFalse(os.path.exists(self.cache_dir))
+
+        changes = [
+            ('invalid depends', 'review', 'followed_by',
+             [{'dest': 'end', 'depends': 'approved'}]),
+            ('invalid ttl', 'review', 'followed_by', [{'dest': 'end', 'ttl': -1}]),
+            ('invalid ttl', 'review', 'followed_by', [{'dest': 'end', 'ttl': '10'}]),
+            ('invalid labels', 'review', 'labels', 'manual'),
+            ('invalid labels', 'review', 'labels', [1]),
+            ('invalid start_point', 'start', 'start_point', 'false'),
+            ('invalid end_point', 'end', 'end_point', 1),
+        ]
+        for msg, task, key, value in changes:
+            data = json.loads(json.dumps(DEFINITION))
+            data['tasks'][task][key] = value
+            with self.assertRaisesRegex(wfepy.WorkflowError, msg):
+                loader.validate(data)
+
+        data = json.loads(json.dumps(DEFINITION))
+        data['tasks']['review']['followed_by'][0]['ttl'] = 0.5
+        spec = loader.validate(data)
+        self.assertEqual(spec['tasks']['review']['followed_by'][0]['ttl'], 0.5)
@@ -0,0 +1,82 @@
+import json
+import unittest
+
+import wfepy
+import wfepy.profiling
+
+
+@wfepy.task()
+@wfepy.start_point()
+@wfepy.followed_by('task_a')
+@wfepy.followed_by('task_b', cond=lambda ctx: ctx['fork'])
+def start(ctx):
+    return True
+
+
+@wfepy.task()
+@wfepy.followed_by('end')
+def task_a(ctx):
+    return True
+
+
+@wfepy.task()
+@wfepy.followed_by('end')
+def task_b(ctx):
+    return True
+
+
+@wfepy.task()
+@wfepy.join_point()
+@wfepy.end_point()
+def end(ctx):
+    return True
+
+
+class ProfilerTestCase(unittest.TestCase):
+    """
+    Profiler shared by runners must collect statistics of all of them and
+    export them as dict and in Prometheus text format.
+    """
+
+    def setUp(self):
+        self.workflow = wfepy.Workflow()
+        self.workflow.load_tasks(__name__)
+        self.workflow.check_graph()
+        self.profiler = wfepy.profiling.Profiler()
+        for fork in (True, False):
+            runner = self.workflow.create_runner({'fork': fork},
+                                                 hooks=[self.profiler])
+            runner.run()
+
+    def test_histogram(self):
+        """Test if values are counted to buckets."""
+        histogram = wfepy.profiling.Histogram([1, 10])
+        for value in (0.5, 1, 5, 50):
+            histogram.observe(value)
+        self.assertListEqual(histogram.counts, [2, 1, 1])
+        self.assertListEqual(histogram.cumulative(),
+                             [(1, 2), (10, 3), (float('inf'), 4)])
+        self.assertEqual(histogram.sum, 56.5)
+
+    def test_as_dict(self):
+        """Test if statistics are collected for tasks, conditions and joins."""
+        stats = self.profiler.as_dict()
+        json.dumps(stats)
+        self.assertListEqual(list(stats['tasks']), ['end', 'start', 'task_a', 'task_b'])
+        self.assertEqual(stats['tasks']['start']['wall_time']['count'], 2)
+        self.assertEqual(stats['tasks']['task_b']['cpu_time']['count'], 1)
+        self.assertEqual(stats['conditions']['start->task_b']['count'], 2)
+        self.assertDictEqual(stats['joins'], {'end': 2})
+        self.assertEqual(stats['state_size']['count'], stats['steps'])
+
+    def test_prometheus(self):
+        """Test if statistics are exported in Prometheus text format."""
+        lines = self.profiler.prometheus().splitlines()
+        self.assertIn('# TYPE wfepy_task_wall_seconds histogram', lines)
+        self.assertIn('wfepy_task_wall_seconds_count{task="start"} 2', lines)
+        self.assertIn('wfepy_task_wall_seconds_bucket{le="+Inf",task="task_b"} 1',
+                      lines)
+        self.assertIn('wfepy_condition_seconds_count{dest="task_b",task="start"} 2',
+                      lines)
+        self.assertIn('wfepy_joins_total{task="end"} 2', lines)
+        self.assertIn('wfepy_steps_total %d' % self.profiler.steps, lines)
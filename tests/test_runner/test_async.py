@@ -0,0 +1,126 @@
+import asyncio
+import unittest
+
+import wfepy
+
+
+async def fork(ctx):
+    await asyncio.sleep(0)
+    return ctx.fork
+
+
+@wfepy.task()
+@wfepy.start_point()
+@wfepy.followed_by('ping')
+@wfepy.followed_by('pong')
+@wfepy.followed_by('skipped', cond=fork)
+async def start(ctx):
+    ctx.event = asyncio.Event()
+    ctx.done.add('start')
+    return True
+
+
+@wfepy.task()
+@wfepy.followed_by('end')
+async def ping(ctx):
+    # Waits for `pong`, so both tasks must be executed concurrently.
+    await asyncio.wait_for(ctx.event.wait(), 5)
+    while ctx.hold:
+        await asyncio.sleep(0.01)
+    ctx.done.add('ping')
+    return True
+
+
+@wfepy.task()
+@wfepy.followed_by('end')
+async def pong(ctx):
+    ctx.event.set()
+    ctx.done.add('pong')
+    return not ctx.blocked
+
+
+@wfepy.task()
+@wfepy.followed_by('end')
+def skipped(ctx):
+    ctx.done.add('skipped')
+    return True
+
+
+@wfepy.task()
+@wfepy.join_point()
+@wfepy.end_point()
+def end(ctx):
+    ctx.done.add('end')
+    return True
+
+
+class Context:
+    def __init__(self):
+        self.done = set()
+        self.blocked = True
+        self.fork = False
+        self.hold = False
+        self.event = None
+
+
+class AsyncRunnerTestCase(unittest.TestCase):
+    """
+    Coroutine tasks `ping` and `pong` must be executed concurrently, coroutine
+    condition must be awaited and `skipped` must not be executed. Task `pong`
+    is waiting until `ctx.blocked` is changed to `False`.
+    """
+
+    def setUp(self):
+        self.workflow = wfepy.Workflow()
+        self.workflow.load_tasks(__name__)
+        self.workflow.check_graph()
+        self.loop = asyncio.new_event_loop()
+
+    def tearDown(self):
+        self.loop.close()
+
+    def test_create(self):
+        """Test if runner was created with start points."""
+        runner = wfepy.AsyncRunner(self.workflow)
+        self.assertIsInstance(runner, wfepy.Runner)
+        self.assertListEqual(runner.state, [('start', wfepy.TaskState.NEW)])
+
+    def test_run(self):
+        """Test if run was finished and all tasks executed."""
+        context = Context()
+        runner = wfepy.AsyncRunner(self.workflow, context)
+
+        self.loop.run_until_complete(runner.run())
+        self.assertFalse(runner.finished)
+        self.assertSetEqual(context.done, {'start', 'ping', 'pong'})
+
+        context.blocked = False
+        self.loop.run_until_complete(runner.run())
+        self.assertTrue(runner.finished)
+        self.assertSetEqual(context.done, {'start', 'ping', 'pong', 'end'})
+
+    def test_cancel(self):
+        """Test if tasks of canceled run remain ready."""
+        context = Context()
+        context.hold = True
+        runner = wfepy.AsyncRunner(self.workflow, context)
+
+        async def cancel():
+            run = asyncio.ensure_future(runner.run())
+            while 'pong' not in context.done:
+                await asyncio.sleep(0.01)
+            run.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await run
+
+        self.loop.run_until_complete(cancel())
+        self.assertFalse(runner.finished)
+        self.assertCountEqual(runner.state, [('ping', wfepy.TaskState.READY),
+                                             ('pong', wfepy.TaskState.READY),
+                                             ('end', wfepy.TaskState.CANCELED)])
+
+        context.hold = False
+        context.blocked = False
+        self.loop.run_until_complete(runner.run())
+        self.assertTrue(runner.finished)
+        self.assertSetEqual(context.done, {'start', 'ping', 'pong', 'end'})
@@ -0,0 +1,139 @@
+import unittest
+
+import wfepy
+
+
+TASK_CACHE = wfepy.LRUCache()
+
+
+@wfepy.task()
+@wfepy.start_point()
+@wfepy.followed_by('charge')
+def start(ctx):
+    ctx['done'].append('start')
+    return True
+
+
+@wfepy.task()
+@wfepy.cached(key=lambda ctx: ctx['order'])
+@wfepy.followed_by('notify')
+def charge(ctx):
+    ctx['done'].append('charge')
+    return not ctx['wait']
+
+
+@wfepy.task()
+@wfepy.cached(cache=TASK_CACHE)
+@wfepy.followed_by('end')
+def notify(ctx):
+    ctx['done'].append('notify')
+    if ctx['fail']:
+        raise RuntimeError('Notification failed')
+    return True
+
+
+@wfepy.task()
+@wfepy.end_point()
+def end(ctx):
+    ctx['done'].append('end')
+    return True
+
+
+class RunnerCachedTestCase(unittest.TestCase):
+    """
+    Completed cached tasks must not be executed again when workflow is
+    replayed with same cache, tasks that were waiting or failed are executed.
+    """
+
+    def setUp(self):
+        self.workflow = wfepy.Workflow()
+        self.workflow.load_tasks(__name__)
+        self.workflow.check_graph()
+        TASK_CACHE.delete(('notify',))
+
+    def context(self, **kwargs):
+        context = {'done': [], 'order': 1, 'wait': False, 'fail': False}
+        context.update(kwargs)
+        return context
+
+    def test_replay(self):
+        """Test if completed task is skipped when workflow is replayed."""
+        for incremental in (False, True):
+            cache = wfepy.LRUCache()
+            context = self.context(wait=True)
+            runner = self.workflow.create_runner(
+                context, incremental=incremental, result_cache=cache)
+            runner.run()
+            self.assertListEqual(context['done'], ['start', 'charge'])
+            self.assertEqual(len(cache), 0)
+
+            context = self.context(fail=True)
+            runner = self.workflow.create_runner(
+                context, incremental=incremental, result_cache=cache)
+            with self.assertRaises(RuntimeError):
+                runner.run()
+            self.assertListEqual(context['done'], ['start', 'charge', 'notify'])
+            self.assertEqual(len(TASK_CACHE), 0)
+
+            # replay after crash, charge was completed
+            context = self.context()
+            runner = self.workflow.create_runner(
+                context, incremental=incremental, result_cache=cache)
+            runner.run()
+            self.assertTrue(runner.finished)
+            self.assertListEqual(context['done'], ['start', 'notify', 'end'])
+            self.assertEqual(len(TASK_CACHE), 1)
+
+            # other key
+            context = self.context(order=2)
+            runner = self.workflow.create_runner(
+                context, incremental=incremental, result_cache=cache)
+            runner.run()
+            self.assertListEqual(context['done'], ['start', 'charge', 'end'])
+            TASK_CACHE.delete(('notify',))
+
+    def test_batch(self):
+        """Test if instances sharing cache do not skip tasks of each other."""
+        batch = wfepy.BatchRunner(self.workflow,
+                                  runner_options={'result_cache': wfepy.LRUCache()})
+        for key in range(3):
+            batch.add(key, self.context(order=key))
+        batch.run()
+        for key in range(3):
+            self.assertListEqual(batch.runners[key].context['done'],
+                                 ['start', 'charge', 'notify', 'end'])
+            TASK_CACHE.delete(('notify', key))
+        self.assertEqual(len(TASK_CACHE), 0)
+
+    def test_without_cache(self):
+        """Test if cached tasks are executed when runner has no cache."""
+        context = self.context()
+        runner = self.workflow.create_runner(context)
+        runner.run()
+        runner = self.workflow.create_runner(context)
+        runner.run()
+        self.assertEqual(context['done'].count('charge'), 2)
+        self.assertEqual(context['done'].count('notify'), 1)
+
+
+class LRUCacheTestCase(unittest.TestCase):
+    """Cache must evict least recently used and expired values."""
+
+    def test_evict(self):
+        """Test if least recently used value is evicted."""
+        cache = wfepy.LRUCache(maxsize=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        self.assertEqual(cache.get('a'), 1)
+        cache.set('c', 3)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), 1)
+        self.assertEqual(cache.get('c'), 3)
+        self.assertEqual((cache.hits, cache.misses), (3, 1))
+
+    def test_ttl(self):
+        """Test if expired value is not returned."""
+        cache = wfepy.LRUCache(ttl=-1)
+        cache.set('a', 1)
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(len(cache), 0)
@@ -0,0 +1,110 @@
+import os
+import tempfile
+import unittest
+
+import wfepy
+
+
+@wfepy.task()
+@wfepy.start_point()
+@wfepy.followed_by('blocked')
+@wfepy.followed_by('not_blocked')
+def start(ctx):
+    ctx.done.append('start')
+    return True
+
+
+@wfepy.task()
+@wfepy.followed_by('end')
+def blocked(ctx):
+    ctx.done.append('blocked')
+    return not ctx.blocked
+
+
+@wfepy.task()
+@wfepy.followed_by('end')
+def not_blocked(ctx):
+    ctx.done.append('not_blocked')
+    return True
+
+
+@wfepy.task()
+@wfepy.join_point()
+@wfepy.end_point()
+def end(ctx):
+    ctx.done.append('end')
+    return True
+
+
+class Context:
+    def __init__(self):
+        self.done = list()
+        self.blocked = True
+
+
+class RunnerCompactStateTestCase(unittest.TestCase):
+    """
+    Runner with compact state must keep state between runs in
+    :class:`wfepy.CompactState` that behaves same as list of tuples.
+    """
+
+    def setUp(self):
+        self.workflow = wfepy.Workflow()
+        self.workflow.load_tasks(__name__)
+        self.workflow.check_graph()
+
+    def test_container(self):
+        """Test if container is list-compatible."""
+        state = wfepy.CompactState(self.workflow.compile(),
+                                   [('start', wfepy.TaskState.NEW)])
+        state.append(('end', wfepy.TaskState.BLOCKED))
+        state.insert(0, ('blocked', wfepy.TaskState.WAITING))
+        state[1] = ('start', wfepy.TaskState.COMPLETE)
+        expected = [
+            ('blocked', wfepy.TaskState.WAITING),
+            ('start', wfepy.TaskState.COMPLETE),
+            ('end', wfepy.TaskState.BLOCKED),
+        ]
+        self.assertEqual(state, expected)
+        self.assertListEqual(list(state), expected)
+        self.assertListEqual(state[1:], expected[1:])
+        self.assertEqual(len(state), 3)
+        del state[0]
+        self.assertEqual(state, expected[1:])
+        with self.assertRaises(KeyError):
+            state.append(('missing', wfepy.TaskState.NEW))
+
+    def test_run(self):
+        """Test if runner with compact state is executed same as with list."""
+        for incremental in (False, True):
+            context = Context()
+            runner = self.workflow.create_runner(
+                context, incremental=incremental, compact_state=True)
+            self.assertIsInstance(runner.state, wfepy.CompactState)
+            runner.run()
+            self.assertIsInstance(runner.state, wfepy.CompactState)
+            self.assertCountEqual(runner.state, [
+                ('blocked', wfepy.TaskState.WAITING),
+                ('end', wfepy.TaskState.BLOCKED),
+            ])
+
+            context.blocked = False
+            runner.run()
+            self.assertTrue(runner.finished)
+            self.assertListEqual(context.done[-2:], ['blocked', 'end'])
+
+    def test_dump(self):
+        """Test if compact state is dumped as list and loaded back."""
+        runner = self.workflow.create_runner(Context(), compact_state=True)
+        runner.run()
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'runner.pickle')
+            runner.dump(path)
+            loaded = self.workflow.create_runner(compact_state=True)
+            loaded.load(path)
+            plain = self.workflow.create_runner()
+            plain.load(path)
+        self.assertIsInstance(loaded.state, wfepy.CompactState)
+        self.assertEqual(loaded.state, runner.state)
+        self.assertIsInstance(plain.state, list)
+        self.assertEqual(runner.state, plain.state)
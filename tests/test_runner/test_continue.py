@@ -0,0 +1,127 @@
+import os
+import tempfile
+import unittest
+
+import wfepy
+
+
+@wfepy.task()
+@wfepy.start_point()
+@wfepy.followed_by('broken')
+@wfepy.followed_by('first')
+def start(ctx):
+    ctx['done'].append('start')
+    return True
+
+
+@wfepy.task()
+@wfepy.followed_by('end')
+def broken(ctx):
+    ctx['done'].append('broken')
+    if ctx['broken']:
+        raise RuntimeError('Task is broken')
+    return True
+
+
+@wfepy.task()
+@wfepy.followed_by('second')
+def first(ctx):
+    ctx['done'].append('first')
+    return True
+
+
+@wfepy.task()
+@wfepy.followed_by('end')
+def second(ctx):
+    ctx['done'].append('second')
+    return True
+
+
+@wfepy.task()
+@wfepy.join_point()
+@wfepy.end_point()
+def end(ctx):
+    ctx['done'].append('end')
+    return True
+
+
+class RunnerContinueOnErrorTestCase(unittest.TestCase):
+    """
+    Failed task must not stop other branches in continue on error mode, it is
+    failed and executed again in next run.
+    """
+
+    def setUp(self):
+        self.workflow = wfepy.Workflow()
+        self.workflow.load_tasks(__name__)
+        self.workflow.check_graph()
+
+    def test_run(self):
+        """Test if other branch is executed and errors are reported."""
+        for incremental in (False, True):
+            context = {'done': [], 'broken': True}
+            runner = self.workflow.create_runner(
+                context, incremental=incremental, continue_on_error=True)
+            report = runner.run()
+            self.assertFalse(report.ok)
+            self.assertListEqual(list(report.errors), ['broken'])
+            self.assertIsInstance(report.errors['broken'], RuntimeError)
+            self.assertIsInstance(report.exception(), wfepy.TasksFailed)
+            self.assertCountEqual(context['done'],
+                                  ['start', 'broken', 'first', 'second'])
+            self.assertCountEqual(runner.state, [
+                ('broken', wfepy.TaskState.FAILED),
+                ('end', wfepy.TaskState.BLOCKED),
+            ])
+
+            # failed task is executed again in each run
+            report = runner.run()
+            self.assertListEqual(list(report.errors), ['broken'])
+            self.assertEqual(context['done'].count('broken'), 2)
+
+            context['broken'] = False
+            report = runner.run()
+            self.assertTrue(report.ok)
+            self.assertIsNone(report.exception())
+            self.assertTrue(runner.finished)
+            self.assertDictEqual(runner.errors, {})
+
+    def test_dump(self):
+        """Test if errors are reported after runner is loaded."""
+        runner = self.workflow.create_runner(
+            {'done': [], 'broken': True}, continue_on_error=True)
+        runner.run()
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'runner.pickle')
+            runner.dump(path)
+            loaded = self.workflow.create_runner(continue_on_error=True)
+            loaded.load(path)
+        self.assertDictEqual(loaded.errors,
+                             {'broken': "RuntimeError('Task is broken')"})
+        report = loaded.run()
+        self.assertListEqual(list(report.errors), ['broken'])
+        self.assertIsInstance(report.errors['broken'], RuntimeError)
+
+        loaded.context['broken'] = False
+        self.assertTrue(loaded.run().ok)
+
+    def test_raise(self):
+        """Test if error is raised without continue on error mode."""
+        runner = self.workflow.create_runner({'done': [], 'broken': True})
+        with self.assertRaises(RuntimeError):
+            runner.run()
+
+    def test_batch(self):
+        """Test if instance with failed task is waiting in batch."""
+        batch = wfepy.BatchRunner(self.workflow, runner_options={
+            'incremental': True, 'continue_on_error': True})
+        batch.add('one', {'done': [], 'broken': True})
+        result, = batch.run()
+        self.assertEqual(result.status, wfepy.InstanceStatus.WAITING)
+        self.assertIsInstance(result.error, wfepy.TasksFailed)
+        self.assertListEqual(batch.run(), [])
+
+        batch.runners['one'].context['broken'] = False
+        result, = batch.run(waiting=True)
+        self.assertTrue(result.finished)
+        self.assertIsNone(result.error)
@@ -0,0 +1,101 @@
+import concurrent.futures
+import threading
+import unittest
+
+import wfepy
+
+
+@wfepy.task()
+@wfepy.start_point()
+@wfepy.followed_by('left')
+@wfepy.followed_by('right')
+def start(ctx):
+    ctx.done.add('start')
+    return True
+
+
+@wfepy.task()
+@wfepy.followed_by('end')
+def left(ctx):
+    ctx.barrier.wait()
+    ctx.done.add('left')
+    return True
+
+
+@wfepy.task()
+@wfepy.followed_by('end')
+def right(ctx):
+    ctx.barrier.wait()
+    if ctx.fail:
+        raise RuntimeError
+    ctx.done.add('right')
+    return True
+
+
+@wfepy.task()
+@wfepy.join_point()
+@wfepy.end_point()
+def end(ctx):
+    ctx.done.add('end')
+    return True
+
+
+class Context:
+    def __init__(self):
+        self.done = set()
+        self.fail = False
+        # Both branches must be executed at same time to pass barrier.
+        self.barrier = threading.Barrier(2, timeout=5)
+
+
+class RunnerExecutorTestCase(unittest.TestCase):
+    """
+    Tasks `left` and `right` are in independent branches and must be executed
+    concurrently by executor. When `right` fails, result of `left` must be
+    stored and exception raised.
+    """
+
+    def setUp(self):
+        self.workflow = wfepy.Workflow()
+        self.workflow.load_tasks(__name__)
+        self.workflow.check_graph()
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=2)
+
+    def tearDown(self):
+        self.executor.shutdown()
+
+    def test_run(self):
+        """Test if run was finished and all tasks executed."""
+        for incremental in (False, True):
+            context = Context()
+            runner = self.workflow.create_runner(
+                context, incremental=incremental, executor=self.executor)
+            runner.run()
+            self.assertTrue(runner.finished)
+            self.assertSetEqual(context.done, {'start', 'left', 'right', 'end'})
+
+    def test_run_fail(self):
+        """Test if state contains results of all tasks when one of them failed."""
+        for incremental in (False, True):
+            context = Context()
+            context.fail = True
+            runner = self.workflow.create_runner(
+                context, incremental=incremental, executor=self.executor)
+            with self.assertRaises(RuntimeError):
+                runner.run()
+            self.assertFalse(runner.finished)
+            self.assertSetEqual(context.done, {'start', 'left'})
+            self.assertIn(('right', wfepy.TaskState.READY), runner.state)
+            self.assertNotIn(('left', wfepy.TaskState.READY), runner.state)
+
+            context.fail = False
+            context.barrier = threading.Barrier(1)
+            runner.run()
+            self.assertTrue(runner.finished)
+            self.assertSetEqual(context.done, {'start', 'left', 'right', 'end'})
+
+    def test_process_pool(self):
+        """Test if process pool is rejected."""
+        with concurrent.futures.ProcessPoolExecutor(max_workers=1) as executor:
+            with self.assertRaises(wfepy.WorkflowError):
+                self.workflow.create_runner(Context(), executor=executor)
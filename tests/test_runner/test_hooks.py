@@ -0,0 +1,93 @@
+import unittest
+
+import wfepy
+
+
+@wfepy.task()
+@wfepy.start_point()
+@wfepy.followed_by('task_a')
+@wfepy.followed_by('task_b', cond=lambda ctx: False)
+def start(ctx):
+    return True
+
+
+@wfepy.task()
+@wfepy.followed_by('end')
+def task_a(ctx):
+    return True
+
+
+@wfepy.task()
+@wfepy.followed_by('end')
+def task_b(ctx):
+    return True
+
+
+@wfepy.task()
+@wfepy.join_point()
+@wfepy.end_point()
+def end(ctx):
+    raise RuntimeError
+
+
+class Recorder(wfepy.Hooks):
+    def __init__(self):
+        self.calls = []
+        self.steps = []
+
+    def on_task_start(self, runner, task):
+        self.calls.append(('task_start', task.name))
+
+    def on_task_end(self, runner, task, result, error, duration):
+        self.calls.append(('task_end', task.name, result, type(error)))
+        assert duration >= 0
+
+    def on_transition(self, runner, task, transition, result, duration):
+        self.calls.append(('transition', task.name, transition.dest, result))
+
+    def on_join(self, runner, join_task, join_states):
+        self.calls.append(('join', join_task.name, sorted(s.name for s in join_states)))
+
+    def on_step(self, runner, state_size):
+        self.steps.append(state_size)
+
+
+class RunnerHooksTestCase(unittest.TestCase):
+    """
+    Hooks must be notified about task execution, condition evaluation, joins
+    and steps in both modes of runner.
+    """
+
+    def setUp(self):
+        self.workflow = wfepy.Workflow()
+        self.workflow.load_tasks(__name__)
+        self.workflow.check_graph()
+
+    def test_hooks(self):
+        """Test if hooks are called for all events."""
+        for incremental in (False, True):
+            recorder = Recorder()
+            runner = self.workflow.create_runner(incremental=incremental,
+                                                 hooks=[recorder, wfepy.Hooks()])
+            with self.assertRaises(RuntimeError):
+                runner.run()
+
+            calls = recorder.calls
+            self.assertListEqual(calls[:2], [
+                ('task_start', 'start'),
+                ('task_end', 'start', True, type(None)),
+            ])
+            self.assertCountEqual(calls[2:4], [
+                ('transition', 'start', 'task_a', True),
+                ('transition', 'start', 'task_b', False),
+            ])
+            self.assertListEqual(calls[4:], [
+                ('task_start', 'task_a'),
+                ('task_end', 'task_a', True, type(None)),
+                ('transition', 'task_a', 'end', True),
+                ('join', 'end', ['BLOCKED', 'CANCELED']),
+                ('task_start', 'end'),
+                ('task_end', 'end', False, RuntimeError),
+            ])
+            self.assertTrue(recorder.steps)
+            self.assertEqual(recorder.steps[-1], 1)
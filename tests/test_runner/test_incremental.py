@@ -0,0 +1,111 @@
+import unittest
+
+import wfepy
+
+
+@wfepy.task()
+@wfepy.start_point()
+@wfepy.followed_by('blocked')
+@wfepy.followed_by('not_blocked')
+@wfepy.followed_by('skipped', cond=lambda ctx: ctx.fork)
+def start(ctx):
+    ctx.done.append('start')
+    return True
+
+
+@wfepy.task()
+@wfepy.followed_by('join')
+def blocked(ctx):
+    ctx.done.append('blocked')
+    return not ctx.blocked
+
+
+@wfepy.task()
+@wfepy.followed_by('join')
+def not_blocked(ctx):
+    ctx.done.append('not_blocked')
+    return True
+
+
+@wfepy.task()
+@wfepy.followed_by('join')
+def skipped(ctx):
+    ctx.done.append('skipped')
+    return True
+
+
+@wfepy.task()
+@wfepy.join_point()
+@wfepy.followed_by('end')
+def join(ctx):
+    ctx.done.append('join')
+    return True
+
+
+@wfepy.task()
+@wfepy.end_point()
+def end(ctx):
+    ctx.done.append('end')
+    return True
+
+
+class Context:
+    def __init__(self):
+        self.done = list()
+        self.blocked = True
+        self.fork = False
+
+
+class RunnerIncrementalTestCase(unittest.TestCase):
+    """
+    Runner in incremental mode must execute same tasks and end in same state as
+    runner processing whole state in every step.
+    """
+
+    def setUp(self):
+        self.workflow = wfepy.Workflow()
+        self.workflow.load_tasks(__name__)
+        self.workflow.check_graph()
+
+    def test_create(self):
+        """Test if runner was created with start points."""
+        runner = self.workflow.create_runner(incremental=True)
+        self.assertIsInstance(runner, wfepy.Runner)
+        self.assertListEqual(runner.state, [('start', wfepy.TaskState.NEW)])
+
+    def test_run(self):
+        """Test if run in both modes ends in same state."""
+        contexts = [Context(), Context()]
+        runners = [self.workflow.create_runner(contexts[0]),
+                   self.workflow.create_runner(contexts[1], incremental=True)]
+
+        for runner in runners:
+            runner.run()
+        self.assertFalse(runners[1].finished)
+        self.assertCountEqual(runners[0].state, runners[1].state)
+        self.assertCountEqual(contexts[0].done, contexts[1].done)
+        self.assertCountEqual(contexts[1].done, ['start', 'blocked', 'not_blocked'])
+
+        for context in contexts:
+            context.blocked = False
+        for runner in runners:
+            runner.run()
+        self.assertTrue(runners[1].finished)
+        self.assertCountEqual(runners[0].state, runners[1].state)
+        self.assertListEqual(contexts[0].done, contexts[1].done)
+        self.assertListEqual(contexts[1].done[-3:], ['blocked', 'join', 'end'])
+
+    def test_run_scheduler(self):
+        """Test if scheduler sorts tasks to queues and counts join arrivals."""
+        context = Context()
+        runner = self.workflow.create_runner(context, incremental=True)
+        runner.run()
+
+        graph = self.workflow.compile()
+        scheduler = wfepy.Scheduler(graph)
+        scheduler.extend(runner.state)
+        self.assertListEqual(scheduler.waiting, [graph.index['blocked']])
+        self.assertListEqual(list(scheduler.joins), [graph.index['join']])
+        self.assertCountEqual(scheduler.joins[graph.index['join']],
+                              [wfepy.TaskState.BLOCKED, wfepy.TaskState.CANCELED])
+        self.assertFalse(scheduler.queue or scheduler.ready or scheduler.joined)
@@ -0,0 +1,54 @@
+import unittest
+
+import wfepy
+
+
+@wfepy.task()
+@wfepy.start_point()
+@wfepy.followed_by('other')
+def start(ctx):
+    return True
+
+
+@wfepy.task()
+@wfepy.followed_by('interrupted')
+def other(ctx):
+    ctx['done'].append('other')
+    return True
+
+
+@wfepy.task()
+@wfepy.end_point()
+def interrupted(ctx):
+    if ctx['interrupt']:
+        ctx['interrupt'] = False
+        raise KeyboardInterrupt
+    ctx['done'].append('interrupted')
+    return True
+
+
+class RunnerInterruptTestCase(unittest.TestCase):
+    """
+    Task interrupted by exception that is not handled by runner (e.g.
+    KeyboardInterrupt) must remain ready, so workflow can be run again.
+    """
+
+    def setUp(self):
+        self.workflow = wfepy.Workflow()
+        self.workflow.load_tasks(__name__)
+        self.workflow.check_graph()
+
+    def test_interrupt(self):
+        """Test if interrupted task remains ready."""
+        for incremental in (False, True):
+            context = {'done': [], 'interrupt': True}
+            runner = self.workflow.create_runner(context, incremental=incremental)
+            with self.assertRaises(KeyboardInterrupt):
+                runner.run()
+            self.assertListEqual(runner.state,
+                                 [('interrupted', wfepy.TaskState.READY)])
+            self.assertFalse(runner.finished)
+
+            runner.run()
+            self.assertTrue(runner.finished)
+            self.assertListEqual(context['done'], ['other', 'interrupted'])
@@ -0,0 +1,71 @@
+import unittest
+
+import wfepy
+
+
+WIDTH = 50
+
+
+def start(ctx):
+    ctx['done'].append('start')
+    return True
+
+
+def branch(ctx):
+    ctx['done'].append('branch')
+    return not ctx['wait']
+
+
+def end(ctx):
+    ctx['done'].append('end')
+    return True
+
+
+def build():
+    builder = wfepy.WorkflowBuilder()
+    builder.add_task('start', start, start_point=True)
+    builder.add_task('end', end, join_point=True, end_point=True)
+    for i in range(WIDTH):
+        name = 'branch_%02d' % i
+        builder.add_task(name, branch, followed_by=['end'])
+        builder.add_transition('start', name,
+                               cond=lambda ctx, i=i: i not in ctx['skip'])
+    return builder.build()
+
+
+class RunnerWideJoinTestCase(unittest.TestCase):
+    """
+    Join point with many preceding tasks must wait until all of them arrive,
+    completed or canceled, and must be canceled if all of them are canceled.
+    """
+
+    def setUp(self):
+        self.workflow = build()
+
+    def test_blocked(self):
+        """Test if join point is blocked until all branches arrive."""
+        for incremental in (False, True):
+            context = {'done': [], 'wait': True, 'skip': {0, 1}}
+            runner = self.workflow.create_runner(context, incremental=incremental)
+            runner.run()
+            self.assertEqual(context['done'].count('branch'), WIDTH - 2)
+            self.assertCountEqual(
+                runner.state,
+                [('branch_%02d' % i, wfepy.TaskState.WAITING)
+                 for i in range(2, WIDTH)]
+                + [('end', wfepy.TaskState.CANCELED)] * 2,
+            )
+
+            context['wait'] = False
+            runner.run()
+            self.assertTrue(runner.finished)
+            self.assertEqual(context['done'][-1], 'end')
+
+    def test_canceled(self):
+        """Test if join point is canceled when all branches are canceled."""
+        for incremental in (False, True):
+            context = {'done': [], 'wait': False, 'skip': set(range(WIDTH))}
+            runner = self.workflow.create_runner(context, incremental=incremental)
+            runner.run()
+            self.assertTrue(runner.finished)
+            self.assertListEqual(context['done'], ['start'])
@@ -0,0 +1,97 @@
+import os
+import subprocess
+import sys
+import unittest
+from unittest import mock
+
+import wfepy
+
+
+@wfepy.task()
+@wfepy.start_point()
+@wfepy.followed_by('body')
+def head(ctx):
+    ctx.done.append('head')
+    return True
+
+
+@wfepy.task()
+@wfepy.followed_by('head', cond=lambda ctx: len(ctx.done) < ctx.repeat * 2)
+@wfepy.followed_by('end', cond=lambda ctx: len(ctx.done) >= ctx.repeat * 2)
+def body(ctx):
+    ctx.done.append('body')
+    return True
+
+
+@wfepy.task()
+@wfepy.end_point()
+def end(ctx):
+    ctx.done.append('end')
+    return True
+
+
+class Context:
+    def __init__(self, repeat):
+        self.done = list()
+        self.repeat = repeat
+
+
+class RunnerLoopTestCase(unittest.TestCase):
+    """
+    Tasks `head` and `body` are executed in loop until condition on transition
+    back to `head` is false, then workflow continues to `end`.
+    """
+
+    def setUp(self):
+        self.workflow = wfepy.Workflow()
+        self.workflow.load_tasks(__name__)
+        self.workflow.check_graph()
+
+    def test_back_edges(self):
+        """Test if transition closing loop is detected."""
+        compiled = self.workflow.compile()
+        self.assertEqual(compiled.back_edges, {('body', 'head')})
+
+    def test_back_edges_order(self):
+        """Test if back edges of loop with two entries do not depend on hashes."""
+        # Loop a <-> b is entered from start by both a and b.
+        script = (
+            'import wfepy\n'
+            'builder = wfepy.WorkflowBuilder()\n'
+            'for name, dests in [("start", "ab"), ("a", "b"), ("b", "a")]:\n'
+            '    builder.add_task(name, print, start_point=name == "start",\n'
+            '                     followed_by=list(dests))\n'
+            'workflow = builder.build(check=False)\n'
+            'print(sorted(workflow.compile().back_edges))\n'
+        )
+        outputs = set()
+        for seed in range(8):
+            env = dict(os.environ, PYTHONHASHSEED=str(seed),
+                       PYTHONPATH=os.pathsep.join(sys.path))
+            outputs.add(subprocess.check_output([sys.executable, '-c', script],
+                                                env=env))
+        self.assertEqual(len(outputs), 1)
+        self.assertEqual(outputs.pop().decode().strip(), "[('b', 'a')]")
+
+    def test_run(self):
+        """Test if loop is repeated and canceled back edge is not propagated."""
+        for incremental in (False, True):
+            for repeat in (1, 3):
+                context = Context(repeat)
+                runner = self.workflow.create_runner(context, incremental=incremental)
+                runner.run()
+                self.assertTrue(runner.finished)
+                self.assertListEqual(context.done,
+                                     ['head', 'body'] * repeat + ['end'])
+
+    def test_cancel(self):
+        """Test if loop head is not canceled by false condition of back edge."""
+        for incremental in (False, True):
+            hooks = mock.Mock(spec=wfepy.Hooks)
+            runner = self.workflow.create_runner(
+                Context(1), incremental=incremental, hooks=[hooks])
+            runner.run()
+            self.assertTrue(runner.finished)
+            canceled = [call[0][1] for call in hooks.on_state_change.call_args_list
+                        if call[0][3] == wfepy.TaskState.CANCELED]
+            self.assertNotIn('head', canceled)
@@ -0,0 +1,101 @@
+import unittest
+from unittest import mock
+
+import wfepy
+
+
+def again(ctx):
+    return ctx['n'] < 3
+
+
+def enabled(ctx):
+    ctx['calls'] += 1
+    return ctx['feature']
+
+
+@wfepy.task()
+@wfepy.start_point()
+@wfepy.followed_by('body')
+def head(ctx):
+    ctx['n'] += 1
+    return True
+
+
+@wfepy.task()
+@wfepy.followed_by('head', cond=again)
+@wfepy.followed_by('end', cond=lambda ctx: not again(ctx))
+@wfepy.followed_by('side', cond=enabled, depends=['feature'])
+def body(ctx):
+    return True
+
+
+@wfepy.task()
+@wfepy.end_point()
+def side(ctx):
+    ctx['side'] += 1
+    return True
+
+
+@wfepy.task()
+@wfepy.end_point()
+def end(ctx):
+    return True
+
+
+class RunnerMemoizeTestCase(unittest.TestCase):
+    """
+    Condition with declared dependencies is evaluated again only when values
+    of context keys it depends on changed, other conditions are evaluated
+    every time.
+    """
+
+    def setUp(self):
+        self.workflow = wfepy.Workflow()
+        self.workflow.load_tasks(__name__)
+        self.workflow.check_graph()
+
+    def test_depends(self):
+        """Test if condition is memoized in loop until dependency changes."""
+        for incremental in (False, True):
+            context = {'n': 0, 'calls': 0, 'feature': False, 'side': 0}
+            runner = self.workflow.create_runner(context, incremental=incremental)
+            runner.run()
+            self.assertTrue(runner.finished)
+            self.assertEqual(context['calls'], 1)
+            self.assertEqual(context['side'], 0)
+            self.assertEqual(runner.condition_cache.hits, 2)
+            self.assertEqual(runner.condition_cache.misses, 1)
+
+            context.update(n=0, feature=True)
+            runner.state = [('head', wfepy.TaskState.NEW)]
+            runner.run()
+            self.assertEqual(context['calls'], 2)
+            self.assertEqual(context['side'], 3)
+            self.assertEqual(runner.condition_cache.hits, 4)
+
+    def test_depends_key(self):
+        """Test if single key is not split to characters."""
+        transition = wfepy.Transition('side', cond=enabled, depends='feature')
+        self.assertTupleEqual(transition.depends, ('feature',))
+        builder = wfepy.WorkflowBuilder()
+        builder.add_task('body', body.func)
+        builder.add_transition('body', 'side', cond=enabled, depends='feature')
+        transition, = builder.tasks['body'].followed_by
+        self.assertTupleEqual(transition.depends, ('feature',))
+
+    def test_ttl(self):
+        """Test if condition with TTL is memoized until it expires."""
+        transition = wfepy.Transition('end', cond=enabled, ttl=10)
+        cache = wfepy.ConditionCache()
+        with mock.patch('time.monotonic', return_value=100):
+            values, result = cache.lookup(transition, {})
+            self.assertIs(result, wfepy.ConditionCache.MISS)
+            cache.store(transition, values, True)
+            self.assertEqual(cache.lookup(transition, {}), ((), True))
+        with mock.patch('time.monotonic', return_value=110):
+            self.assertIs(cache.lookup(transition, {})[1], wfepy.ConditionCache.MISS)
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+
+        plain = wfepy.Transition('end', cond=enabled)
+        self.assertIs(cache.lookup(plain, {})[1], wfepy.ConditionCache.MISS)
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
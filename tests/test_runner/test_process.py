@@ -0,0 +1,111 @@
+import os
+import unittest
+from unittest import mock
+
+import wfepy
+import wfepy.profiling
+
+
+@wfepy.task()
+@wfepy.start_point()
+@wfepy.followed_by('parse')
+@wfepy.followed_by('local')
+def start(ctx):
+    ctx['pid'] = os.getpid()
+    return True
+
+
+@wfepy.task(labels={'cpu'})
+@wfepy.followed_by('end')
+def parse(ctx):
+    ctx['keys'] = sorted(ctx)
+    if ctx.get('fail'):
+        raise ValueError('Cannot parse')
+    ctx['parsed'] = sum(int(word) for word in ctx['raw'].split())
+    ctx['parse_pid'] = os.getpid()
+    del ctx['raw']
+    return True
+
+
+@wfepy.task()
+@wfepy.followed_by('end')
+def local(ctx):
+    ctx['local_pid'] = os.getpid()
+    return True
+
+
+@wfepy.task()
+@wfepy.join_point()
+@wfepy.end_point()
+def end(ctx):
+    return True
+
+
+class ProcessPoolRunnerTestCase(unittest.TestCase):
+    """
+    Tasks with cpu label must be executed in other process with snapshot of
+    context and their changes of context merged back.
+    """
+
+    def setUp(self):
+        self.workflow = wfepy.Workflow()
+        self.workflow.load_tasks(__name__)
+        self.workflow.check_graph()
+
+    def create_runner(self, context, **kwargs):
+        runner = wfepy.ProcessPoolRunner(self.workflow, context, max_workers=2,
+                                         **kwargs)
+        self.addCleanup(runner.shutdown)
+        return runner
+
+    def test_run(self):
+        """Test if cpu task is executed in process and context is merged."""
+        for incremental in (False, True):
+            context = {'raw': '1 2 3', 'other': 'value'}
+            runner = self.create_runner(context, incremental=incremental)
+            runner.run()
+            self.assertTrue(runner.finished)
+            self.assertEqual(context['parsed'], 6)
+            self.assertNotIn('raw', context)
+            self.assertEqual(context['local_pid'], os.getpid())
+            self.assertNotEqual(context['parse_pid'], os.getpid())
+            self.assertIn('other', context['keys'])
+
+    def test_context_keys(self):
+        """Test if task receives only declared keys."""
+        context = {'raw': '4 5', 'other': 'value'}
+        runner = self.create_runner(context, context_keys={'parse': ['raw']})
+        runner.run()
+        self.assertTrue(runner.finished)
+        self.assertEqual(context['parsed'], 9)
+        self.assertListEqual(context['keys'], ['raw'])
+        self.assertEqual(context['other'], 'value')
+
+    def test_cpu_time(self):
+        """Test if CPU time of task is measured in worker process."""
+        profiler = wfepy.profiling.Profiler()
+        for fail in (False, True):
+            hooks = mock.Mock(wraps=profiler)
+            runner = self.create_runner({'raw': '1', 'fail': fail}, hooks=[hooks])
+            try:
+                runner.run()
+            except ValueError:
+                pass
+            _, task, cpu_time = hooks.on_task_cpu.call_args[0]
+            self.assertEqual(task.name, 'parse')
+            if fail:
+                self.assertIsNone(cpu_time)
+            else:
+                self.assertGreaterEqual(cpu_time, 0)
+            hooks.on_task_cpu.assert_called_once_with(runner, task, cpu_time)
+        self.assertEqual(profiler.task_wall_time['parse'].count, 2)
+        self.assertEqual(profiler.task_cpu_time['parse'].count, 1)
+
+    def test_error(self):
+        """Test if exception from process is raised and task stays ready."""
+        context = {'raw': '', 'fail': True}
+        runner = self.create_runner(context)
+        with self.assertRaises(ValueError):
+            runner.run()
+        self.assertIn(('parse', wfepy.TaskState.READY), runner.state)
+        self.assertIn('local_pid', context)
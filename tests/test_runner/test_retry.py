@@ -0,0 +1,103 @@
+import time
+import unittest
+
+import wfepy
+
+
+@wfepy.task()
+@wfepy.start_point()
+@wfepy.followed_by('flaky')
+@wfepy.followed_by('other')
+def start(ctx):
+    ctx['done'].append('start')
+    return True
+
+
+@wfepy.task()
+@wfepy.retry(attempts=3, backoff=0, exceptions=[ConnectionError])
+@wfepy.followed_by('end')
+def flaky(ctx):
+    ctx['done'].append('flaky')
+    if ctx['failures']:
+        ctx['failures'] -= 1
+        raise ctx['error']('Service unavailable')
+    return True
+
+
+@wfepy.task()
+@wfepy.followed_by('end')
+def other(ctx):
+    ctx['done'].append('other')
+    return True
+
+
+@wfepy.task()
+@wfepy.join_point()
+@wfepy.end_point()
+def end(ctx):
+    ctx['done'].append('end')
+    return True
+
+
+class RunnerRetryTestCase(unittest.TestCase):
+    """
+    Failed task with retry policy must wait for next attempt while other
+    branches are executed, error is raised when it runs out of attempts.
+    """
+
+    def setUp(self):
+        self.workflow = wfepy.Workflow()
+        self.workflow.load_tasks(__name__)
+        self.workflow.check_graph()
+
+    def context(self, failures, error=ConnectionError):
+        return {'done': [], 'failures': failures, 'error': error}
+
+    def test_retry(self):
+        """Test if task is retried and other branch is not blocked."""
+        for incremental in (False, True):
+            context = self.context(2)
+            runner = self.workflow.create_runner(context, incremental=incremental)
+            runner.run()
+            self.assertCountEqual(context['done'], ['start', 'flaky', 'other'])
+            self.assertDictEqual(runner.retries, {'flaky': 1})
+            self.assertIn(('flaky', wfepy.TaskState.WAITING), runner.state)
+
+            runner.run()
+            self.assertDictEqual(runner.retries, {'flaky': 2})
+            runner.run()
+            self.assertTrue(runner.finished)
+            self.assertListEqual(context['done'][-2:], ['flaky', 'end'])
+            self.assertDictEqual(runner.retries, {})
+
+    def test_exhausted(self):
+        """Test if error is raised when task runs out of attempts."""
+        for incremental in (False, True):
+            runner = self.workflow.create_runner(self.context(5),
+                                                 incremental=incremental)
+            runner.run()
+            runner.run()
+            with self.assertRaises(ConnectionError):
+                runner.run()
+            self.assertDictEqual(runner.retries, {})
+            self.assertIn(('flaky', wfepy.TaskState.READY), runner.state)
+
+    def test_not_retryable(self):
+        """Test if other exceptions are raised immediately."""
+        runner = self.workflow.create_runner(self.context(1, ValueError))
+        with self.assertRaises(ValueError):
+            runner.run()
+        self.assertDictEqual(runner.retries, {})
+
+    def test_backoff(self):
+        """Test if delay grows exponentially and is limited."""
+        policy = wfepy.RetryPolicy(attempts=5, backoff=1, factor=3, max_backoff=5)
+        self.assertListEqual([policy.delay(n) for n in range(1, 5)], [1, 3, 5, 5])
+
+        flaky.retry, retry = wfepy.RetryPolicy(backoff=60), flaky.retry
+        try:
+            runner = self.workflow.create_runner(self.context(1))
+            runner.run()
+        finally:
+            flaky.retry = retry
+        self.assertAlmostEqual(runner.next_wakeup, time.time() + 60, delta=5)
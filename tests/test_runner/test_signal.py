@@ -0,0 +1,114 @@
+import unittest
+
+import wfepy
+
+
+@wfepy.task()
+@wfepy.start_point()
+@wfepy.followed_by('webhook')
+@wfepy.followed_by('approval')
+def start(ctx):
+    ctx.done.append('start')
+    return True
+
+
+@wfepy.task()
+@wfepy.followed_by('end')
+def webhook(ctx, payload=None):
+    ctx.done.append('webhook')
+    if payload is None:
+        return wfepy.Wait(event='webhook:%d' % ctx.id)
+    ctx.payloads.append(payload)
+    return True
+
+
+@wfepy.task()
+@wfepy.followed_by('end')
+def approval(ctx, payload=None):
+    ctx.done.append('approval')
+    if payload is None:
+        return wfepy.Wait(event='approval')
+    if ctx.fail:
+        raise RuntimeError
+    ctx.payloads.append(payload)
+    return True
+
+
+@wfepy.task()
+@wfepy.start_point()
+@wfepy.followed_by('end')
+def manual(ctx):
+    ctx.done.append('manual')
+    return ctx.done.count('manual') > 1 or wfepy.Wait(event='manual')
+
+
+@wfepy.task()
+@wfepy.join_point()
+@wfepy.end_point()
+def end(ctx):
+    ctx.done.append('end')
+    return True
+
+
+class Context:
+    def __init__(self):
+        self.id = 1
+        self.done = list()
+        self.payloads = list()
+        self.fail = False
+
+
+class RunnerSignalTestCase(unittest.TestCase):
+    """
+    Tasks waiting for events must not be executed again by run until they are
+    woken up by signal. Signal payload must be delivered to task.
+    """
+
+    def setUp(self):
+        self.workflow = wfepy.Workflow()
+        self.workflow.load_tasks(__name__)
+        self.workflow.check_graph()
+
+    def test_signal(self):
+        """Test if only task woken up by signal is executed."""
+        for incremental in (False, True):
+            context = Context()
+            runner = self.workflow.create_runner(context, incremental=incremental)
+            runner.run()
+            runner.run()
+            self.assertCountEqual(context.done,
+                                  ['start', 'webhook', 'approval', 'manual'])
+            self.assertDictEqual(runner.events, {'webhook': 'webhook:1',
+                                                 'approval': 'approval',
+                                                 'manual': 'manual'})
+
+            self.assertEqual(runner.signal('unknown'), 0)
+            self.assertEqual(runner.signal('webhook:1', {'status': 'ok'}), 1)
+            runner.run()
+            self.assertListEqual(context.done[4:], ['webhook'])
+            self.assertListEqual(context.payloads, [{'status': 'ok'}])
+            self.assertFalse(runner.finished)
+
+            # Signal can be sent also to task by its name, task that accepts
+            # only context can be signaled without payload.
+            self.assertEqual(runner.signal('approval', 'yes'), 1)
+            self.assertEqual(runner.signal('manual'), 1)
+            runner.run()
+            self.assertTrue(runner.finished)
+            self.assertListEqual(context.payloads, [{'status': 'ok'}, 'yes'])
+            self.assertDictEqual(runner.signals, {})
+
+    def test_signal_error(self):
+        """Test if payload is delivered again when task failed."""
+        context = Context()
+        context.fail = True
+        runner = self.workflow.create_runner(context)
+        runner.run()
+        runner.signal('approval', 'yes')
+        with self.assertRaises(RuntimeError):
+            runner.run()
+        self.assertDictEqual(runner.signals, {'approval': 'yes'})
+
+        context.fail = False
+        runner.run()
+        self.assertListEqual(context.payloads, ['yes'])
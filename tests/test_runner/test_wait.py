@@ -0,0 +1,91 @@
+import os
+import tempfile
+import time
+import unittest
+
+import wfepy
+
+
+@wfepy.task()
+@wfepy.start_point()
+@wfepy.followed_by('sleep')
+@wfepy.followed_by('poll')
+def start(ctx):
+    ctx.done.append('start')
+    return True
+
+
+@wfepy.task()
+@wfepy.followed_by('end')
+def sleep(ctx):
+    ctx.done.append('sleep')
+    if ctx.sleep:
+        return wfepy.Wait(after=3600)
+    return True
+
+
+@wfepy.task()
+@wfepy.followed_by('end')
+def poll(ctx):
+    ctx.done.append('poll')
+    return not ctx.poll
+
+
+@wfepy.task()
+@wfepy.join_point()
+@wfepy.end_point()
+def end(ctx):
+    ctx.done.append('end')
+    return True
+
+
+class Context:
+    def __init__(self):
+        self.done = list()
+        self.sleep = True
+        self.poll = True
+
+
+class RunnerWaitTestCase(unittest.TestCase):
+    """
+    Task `sleep` returned `Wait` and must not be executed again until its
+    deadline passed. Task `poll` returned `False` and is executed in each run.
+    """
+
+    def setUp(self):
+        self.workflow = wfepy.Workflow()
+        self.workflow.load_tasks(__name__)
+        self.workflow.check_graph()
+
+    def test_run(self):
+        """Test if task is executed again only when deadline passed."""
+        for incremental in (False, True):
+            context = Context()
+            runner = self.workflow.create_runner(context, incremental=incremental)
+            runner.run()
+            self.assertCountEqual(context.done, ['start', 'sleep', 'poll'])
+            self.assertAlmostEqual(runner.next_wakeup, time.time() + 3600, delta=60)
+
+            context.poll = False
+            runner.run()
+            self.assertCountEqual(context.done, ['start', 'sleep', 'poll', 'poll'])
+            self.assertFalse(runner.finished)
+
+            context.sleep = False
+            runner.wakeups['sleep'] = time.time() - 1
+            runner.run()
+            self.assertTrue(runner.finished)
+            self.assertListEqual(context.done[-2:], ['sleep', 'end'])
+            self.assertDictEqual(runner.wakeups, {})
+            self.assertIsNone(runner.next_wakeup)
+
+    def test_dump(self):
+        """Test if deadlines are dumped with state."""
+        runner = self.workflow.create_runner(Context())
+        runner.run()
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'runner.pickle')
+            runner.dump(path)
+            loaded = self.workflow.create_runner()
+            loaded.load(path)
+        self.assertDictEqual(loaded.wakeups, runner.wakeups)
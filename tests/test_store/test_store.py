@@ -0,0 +1,209 @@
+import os
+import tempfile
+import time
+import unittest
+
+import wfepy
+import wfepy.store
+
+
+@wfepy.task()
+@wfepy.start_point()
+@wfepy.followed_by('wait')
+def start(ctx):
+    ctx['done'].append('start')
+    return True
+
+
+@wfepy.task()
+@wfepy.followed_by('end')
+def wait(ctx):
+    ctx['done'].append('wait')
+    return not ctx['wait']
+
+
+@wfepy.task()
+@wfepy.end_point()
+def end(ctx):
+    ctx['done'].append('end')
+    return True
+
+
+class StoreTestMixin:
+    """
+    Runner stored to store must be loaded with same state and context. Changes
+    of state are appended to store and compacted to snapshot.
+    """
+
+    def setUp(self):
+        self.workflow = wfepy.Workflow()
+        self.workflow.load_tasks(__name__)
+        self.workflow.check_graph()
+
+    def create_store(self, **kwargs):
+        raise NotImplementedError
+
+    def test_encode(self):
+        """Test if state is encoded to four bytes per task."""
+        graph = self.workflow.compile()
+        state = [('wait', wfepy.TaskState.WAITING), ('end', wfepy.TaskState.NEW)]
+        data = wfepy.store.encode_state(graph, state)
+        self.assertEqual(len(data), 12)
+        self.assertListEqual(wfepy.store.decode_state(graph, data), state)
+
+        other = wfepy.Workflow()
+        other.load_tasks(__name__)
+        other.tasks.pop('end')
+        with self.assertRaises(wfepy.WorkflowError):
+            wfepy.store.decode_state(other.compile(), data)
+
+    def test_save(self):
+        """Test if runner is loaded with state and context."""
+        store = self.create_store()
+        runner = self.workflow.create_runner({'done': [], 'wait': True})
+        runner.run()
+        runner.wakeups['wait'] = 1234.5
+        runner.events['wait'] = 'event'
+        runner.signals['wait'] = {'payload': 1}
+        runner.retries['wait'] = 2
+        runner.errors['wait'] = RuntimeError('Task failed')
+        store.save('one', runner)
+        self.assertListEqual(store.keys(), ['one'])
+
+        loaded = self.workflow.create_runner()
+        store.load('one', loaded)
+        self.assertListEqual(loaded.state, runner.state)
+        self.assertDictEqual(loaded.context, runner.context)
+        self.assertDictEqual(loaded.wakeups, runner.wakeups)
+        self.assertDictEqual(loaded.events, runner.events)
+        self.assertDictEqual(loaded.signals, runner.signals)
+        self.assertDictEqual(loaded.retries, runner.retries)
+        self.assertDictEqual(loaded.errors,
+                             {'wait': "RuntimeError('Task failed')"})
+        loaded.wakeups.clear()
+        loaded.events.clear()
+        loaded.signals.clear()
+
+        loaded.context['wait'] = False
+        loaded.run()
+        self.assertTrue(loaded.finished)
+
+        store.delete('one')
+        self.assertListEqual(store.keys(), [])
+        with self.assertRaises(KeyError):
+            store.load('one', loaded)
+
+    def test_save_state(self):
+        """Test if changes of state are appended and compacted."""
+        store = self.create_store(compact_after=2)
+        context = {'done': [], 'wait': True}
+        runner = self.workflow.create_runner(context)
+        store.save('one', runner)
+        runner.run()
+        store.save_state('one', runner)
+        runner.state.append(('end', wfepy.TaskState.NEW))
+        store.save_state('one', runner)
+
+        loaded = self.workflow.create_runner()
+        store.load('one', loaded)
+        self.assertCountEqual(loaded.state, runner.state)
+        # Context is not stored with changes of state.
+        self.assertListEqual(loaded.context['done'], [])
+
+        runner.state = [('end', wfepy.TaskState.READY)]
+        store.save_state('one', runner)
+        loaded = self.workflow.create_runner()
+        store.load('one', loaded)
+        self.assertListEqual(loaded.state, runner.state)
+
+        # Waiting task must not be executed again after load.
+        runner.state = [('wait', wfepy.TaskState.WAITING)]
+        runner.wakeups['wait'] = time.time() + 3600
+        runner.events['wait'] = 'event'
+        store.save_state('one', runner)
+        loaded = self.workflow.create_runner()
+        store.load('one', loaded)
+        self.assertListEqual(loaded.state, runner.state)
+        self.assertDictEqual(loaded.wakeups, runner.wakeups)
+        self.assertDictEqual(loaded.events, runner.events)
+        loaded.run()
+        self.assertListEqual(loaded.context['done'], ['start', 'wait'])
+
+
+class MemoryStoreTestCase(StoreTestMixin, unittest.TestCase):
+
+    def create_store(self, **kwargs):
+        return wfepy.store.MemoryStore(self.workflow, **kwargs)
+
+
+class FileStoreTestCase(StoreTestMixin, unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def create_store(self, **kwargs):
+        return wfepy.store.FileStore(self.workflow, directory=self.tmp_dir.name,
+                                     **kwargs)
+
+    def test_changes_generation(self):
+        """Test if changes stored before last snapshot are ignored."""
+        store = self.create_store()
+        runner = self.workflow.create_runner({'done': [], 'wait': True})
+        store.save('one', runner)
+        runner.run()
+        store.save_state('one', runner)
+        path = os.path.join(self.tmp_dir.name, 'one.changes')
+        with open(path, 'rb') as f:
+            changes = f.read()
+
+        store.save('one', runner)
+        # Simulate crash after snapshot was written.
+        with open(path, 'wb') as f:
+            f.write(changes)
+        loaded = self.workflow.create_runner()
+        store.load('one', loaded)
+        self.assertListEqual(loaded.state, runner.state)
+
+
+class SQLiteStoreTestCase(StoreTestMixin, unittest.TestCase):
+
+    def create_store(self, **kwargs):
+        store = wfepy.store.SQLiteStore(self.workflow, **kwargs)
+        self.addCleanup(store.close)
+        return store
+
+    def test_checkpoint(self):
+        """Test if runners are stored at once and indexed by status."""
+        store = self.create_store()
+        batch = wfepy.BatchRunner(self.workflow)
+        for key in range(4):
+            batch.add(key, {'done': [], 'wait': key % 2 == 0})
+        store.checkpoint(batch.runners.items())
+        self.assertListEqual(store.keys(wfepy.InstanceStatus.RUNNABLE), [0, 1, 2, 3])
+
+        batch.run()
+        store.checkpoint(batch.runners.items(), context=False)
+        self.assertListEqual(store.keys(wfepy.InstanceStatus.WAITING), [0, 2])
+        self.assertListEqual(store.keys(wfepy.InstanceStatus.FINISHED), [1, 3])
+        self.assertEqual(store.status(1), wfepy.InstanceStatus.FINISHED)
+        self.assertListEqual(store.keys(), [0, 1, 2, 3])
+
+        runner = self.workflow.create_runner()
+        store.load(2, runner)
+        self.assertListEqual(runner.state, batch.runners[2].state)
+
+    def test_transaction(self):
+        """Test if writes are rolled back when transaction fails."""
+        store = self.create_store()
+        runner = self.workflow.create_runner({'done': [], 'wait': True})
+        with self.assertRaises(RuntimeError):
+            with store.transaction():
+                store.save('one', runner)
+                raise RuntimeError
+        self.assertListEqual(store.keys(), [])
+        with self.assertRaises(KeyError):
+            store.status('one')
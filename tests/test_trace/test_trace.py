@@ -0,0 +1,141 @@
+import os
+import tempfile
+import threading
+import unittest
+
+import wfepy
+from wfepy.trace import (IteratorSink, JSONLinesSink, RingBufferSink, TraceEvent,
+                         Tracer, read_events)
+
+
+S = wfepy.TaskState
+
+
+@wfepy.task()
+@wfepy.start_point()
+@wfepy.followed_by('task_a')
+@wfepy.followed_by('task_b', cond=lambda ctx: False)
+def start(ctx):
+    return True
+
+
+@wfepy.task()
+@wfepy.followed_by('end')
+def task_a(ctx):
+    if ctx['fail']:
+        raise ValueError('Task failed')
+    return ctx['ready']
+
+
+@wfepy.task()
+@wfepy.followed_by('end')
+def task_b(ctx):
+    return True
+
+
+@wfepy.task()
+@wfepy.join_point()
+@wfepy.end_point()
+def end(ctx):
+    return True
+
+
+def transitions(events):
+    return [(event.task, event.old_state, event.new_state, event.source)
+            for event in events]
+
+
+class TracerTestCase(unittest.TestCase):
+    """Runner must emit event for each change of task state to sink."""
+
+    def setUp(self):
+        self.workflow = wfepy.Workflow()
+        self.workflow.load_tasks(__name__)
+        self.workflow.check_graph()
+
+    def run_workflow(self, sink, **kwargs):
+        context = {'ready': False, 'fail': False}
+        runner = self.workflow.create_runner(context, hooks=[Tracer(sink)], **kwargs)
+        runner.run()
+        context['ready'] = True
+        runner.run()
+        self.assertTrue(runner.finished)
+        return runner
+
+    def test_events(self):
+        """Test if all changes of states are emitted in both modes."""
+        expected = [
+            ('start', S.NEW, S.READY, None),
+            ('start', S.READY, S.COMPLETE, None),
+            ('task_a', None, S.NEW, 'start'),
+            ('task_b', None, S.CANCELED, 'start'),
+            ('task_a', S.NEW, S.READY, None),
+            ('end', None, S.CANCELED, 'task_b'),
+            ('task_a', S.READY, S.WAITING, None),
+            ('task_a', S.WAITING, S.READY, None),
+            ('task_a', S.READY, S.COMPLETE, None),
+            ('end', None, S.NEW, 'task_a'),
+            ('end', S.NEW, S.BLOCKED, None),
+            ('end', S.BLOCKED, S.READY, None),
+            ('end', S.READY, S.COMPLETE, None),
+        ]
+        for incremental in (False, True):
+            sink = RingBufferSink()
+            self.run_workflow(sink, incremental=incremental)
+            self.assertCountEqual(transitions(sink), expected)
+            executed = [event for event in sink if event.old_state == S.READY]
+            self.assertEqual(len(executed), 4)
+            self.assertTrue(all(event.duration >= 0 for event in executed))
+            self.assertTrue(all(event.duration is None for event in sink
+                                if event.old_state != S.READY))
+
+    def test_error(self):
+        """Test if exception raised by task is recorded."""
+        sink = RingBufferSink()
+        runner = self.workflow.create_runner({'ready': True, 'fail': True},
+                                             hooks=[Tracer(sink)],
+                                             continue_on_error=True)
+        runner.run()
+        event, = [event for event in sink if event.task == 'task_a'
+                  and event.old_state == S.READY]
+        self.assertEqual(event.new_state, S.FAILED)
+        self.assertIn('Task failed', event.error)
+
+    def test_ring_buffer(self):
+        """Test if ring buffer keeps only last events."""
+        sink = RingBufferSink(maxlen=3)
+        self.run_workflow(sink)
+        self.assertEqual(len(sink), 3)
+        self.assertEqual(sink.dropped, 10)
+        self.assertEqual(sink.events[-1].new_state, S.COMPLETE)
+
+    def test_json_lines(self):
+        """Test if events are written in batches and can be read back."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'trace.jsonl')
+            ring = RingBufferSink()
+            with JSONLinesSink(path, batch_size=5) as sink:
+                tracer = Tracer(sink)
+                runner = self.workflow.create_runner(
+                    {'ready': True, 'fail': False}, hooks=[tracer, Tracer(ring)])
+                runner.run()
+                with open(path) as f:
+                    self.assertEqual(len(f.readlines()), 10)
+            self.assertListEqual(transitions(read_events(path)), transitions(ring))
+
+    def test_iterator(self):
+        """Test if events are consumed by other thread."""
+        sink = IteratorSink()
+        consumed = []
+        consumer = threading.Thread(target=lambda: consumed.extend(sink))
+        consumer.start()
+        self.run_workflow(sink)
+        sink.close()
+        consumer.join()
+        self.assertEqual(len(consumed), 13)
+        self.assertListEqual(sink.drain(), [])
+
+    def test_event_dict(self):
+        """Test if event can be converted to dict and back."""
+        event = TraceEvent('end', None, S.NEW, 1.5, source='task_a')
+        self.assertEqual(TraceEvent.from_dict(event.to_dict()), event)
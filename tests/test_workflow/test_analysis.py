@@ -0,0 +1,87 @@
+import unittest
+
+import wfepy
+from wfepy.analysis import IssueKind, analyze, check_workflow
+
+
+def task(ctx):
+    return True
+
+
+def cond(ctx):
+    return True
+
+
+def build(transitions, start_points=('start',), join_points=(), end_points=('end',)):
+    builder = wfepy.WorkflowBuilder()
+    names = {name for transition in transitions for name in transition[:2]}
+    for name in sorted(names):
+        builder.add_task(name, task,
+                         start_point=name in start_points,
+                         join_point=name in join_points,
+                         end_point=name in end_points)
+    builder.add_transitions(transitions)
+    return builder.build(check=False)
+
+
+class WorkflowAnalysisTestCase(unittest.TestCase):
+    """
+    Analysis must find unreachable tasks, join points that can never be
+    satisfied and cycles that cannot be stopped, with paths to them.
+    """
+
+    def assertIssues(self, workflow, expected):
+        issues = analyze(workflow)
+        self.assertCountEqual(
+            [(issue.kind, issue.task, issue.path) for issue in issues],
+            expected,
+        )
+
+    def test_valid(self):
+        """Test if valid graphs with loop and join have no issues."""
+        workflow = build([
+            ('start', 'a'), ('start', 'b'), ('a', 'join'), ('b', 'join'),
+            ('join', 'end'), ('head', 'body'), ('body', 'head', cond),
+            ('body', 'done', cond),
+        ], start_points=['start', 'head'], join_points=['join'],
+            end_points=['end', 'done'])
+        self.assertIssues(workflow, [])
+        check_workflow(workflow)
+
+    def test_unreachable(self):
+        """Test if unreachable tasks and joins waiting for them are found."""
+        workflow = build([
+            ('start', 'a'), ('a', 'join'), ('orphan', 'b'), ('b', 'join'),
+            ('join', 'end'), ('x', 'y'), ('y', 'x'), ('y', 'end'),
+        ], join_points=['join', 'end'])
+        self.assertIssues(workflow, [
+            (IssueKind.UNREACHABLE, 'orphan', ('orphan',)),
+            (IssueKind.UNREACHABLE, 'b', ('orphan', 'b')),
+            (IssueKind.UNREACHABLE, 'x', ('x',)),
+            (IssueKind.UNREACHABLE, 'y', ('x', 'y')),
+            (IssueKind.UNSATISFIABLE_JOIN, 'join', ('start', 'a', 'join')),
+            (IssueKind.UNSATISFIABLE_JOIN, 'end', ('start', 'a', 'join', 'end')),
+            (IssueKind.ENDLESS_CYCLE, 'x', ('x', 'y', 'x')),
+        ])
+        with self.assertRaises(wfepy.WorkflowError):
+            check_workflow(workflow)
+
+    def test_join_in_cycle(self):
+        """Test if join point waiting for task after it is found."""
+        workflow = build([
+            ('start', 'join'), ('join', 'a'), ('a', 'join', cond), ('a', 'end', cond),
+        ], join_points=['join'])
+        self.assertIssues(workflow, [
+            (IssueKind.UNSATISFIABLE_JOIN, 'join', ('join', 'a', 'join')),
+        ])
+
+    def test_endless_cycle(self):
+        """Test if cycles without exit or without condition are found."""
+        workflow = build([
+            ('start', 'a'), ('a', 'b'), ('b', 'a'), ('b', 'end'),
+            ('start', 'c'), ('c', 'c', cond),
+        ])
+        self.assertIssues(workflow, [
+            (IssueKind.ENDLESS_CYCLE, 'a', ('a', 'b', 'a')),
+            (IssueKind.ENDLESS_CYCLE, 'c', ('c', 'c')),
+        ])
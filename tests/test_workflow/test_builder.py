@@ -0,0 +1,87 @@
+import unittest
+
+import wfepy
+
+
+@wfepy.task()
+@wfepy.start_point()
+@wfepy.followed_by('task_a')
+@wfepy.followed_by('task_b')
+def start(ctx):
+    ctx.append('start')
+    return True
+
+
+def task_a(ctx):
+    ctx.append('task_a')
+    return True
+
+
+def task_b(ctx):
+    ctx.append('task_b')
+    return True
+
+
+def end(ctx):
+    ctx.append('end')
+    return True
+
+
+class WorkflowBuilderTestCase(unittest.TestCase):
+    """
+    Workflow built from data must have same graph as workflow loaded from
+    decorated functions.
+    """
+
+    def setUp(self):
+        self.builder = wfepy.WorkflowBuilder()
+        self.builder.add_tasks([
+            start,
+            ('task_a', task_a),
+            {'name': 'task_b', 'func': task_b, 'labels': ['label']},
+            {'name': 'end', 'func': end, 'join_point': True, 'end_point': True},
+        ])
+        self.builder.add_transitions([
+            ('task_a', 'end'),
+            {'src': 'task_b', 'dest': 'end', 'cond': lambda ctx: True},
+        ])
+
+    def test_build(self):
+        """Test if preceding tasks are created and workflow can be run."""
+        workflow = self.builder.build()
+        self.assertCountEqual(workflow.tasks, ['start', 'task_a', 'task_b', 'end'])
+        self.assertSetEqual(workflow.tasks['end'].preceded_by, {'task_a', 'task_b'})
+        self.assertSetEqual(workflow.tasks['task_a'].preceded_by, {'start'})
+        self.assertSetEqual(workflow.tasks['start'].preceded_by, set())
+        self.assertSetEqual(workflow.tasks['task_b'].labels, {'label'})
+        self.assertListEqual(workflow.start_points, ['start'])
+
+        context = []
+        runner = workflow.create_runner(context)
+        runner.run()
+        self.assertTrue(runner.finished)
+        self.assertCountEqual(context, ['start', 'task_a', 'task_b', 'end'])
+
+    def test_shared_tasks(self):
+        """Test if added tasks are not changed by build."""
+        start.preceded_by.add('task_a')
+        self.addCleanup(start.preceded_by.discard, 'task_a')
+        workflow = self.builder.build()
+        self.assertSetEqual(start.preceded_by, {'task_a'})
+        self.assertSetEqual(workflow.tasks['start'].preceded_by, set())
+
+        self.builder.add_transition('task_a', 'task_b')
+        self.assertSetEqual(workflow.tasks['task_b'].preceded_by, {'start'})
+        self.assertSetEqual(self.builder.build(check=False).tasks['task_b'].preceded_by,
+                            {'start', 'task_a'})
+
+    def test_errors(self):
+        """Test duplicate tasks, unknown source tasks and invalid graph."""
+        with self.assertRaises(wfepy.WorkflowError):
+            self.builder.add_task('task_a', task_b)
+        with self.assertRaises(wfepy.WorkflowError):
+            self.builder.add_transition('missing', 'end')
+        self.builder.add_transition('task_a', 'missing')
+        with self.assertRaises(wfepy.WorkflowError):
+            self.builder.build()
+        self.assertIsInstance(self.builder.build(check=False), wfepy.Workflow)
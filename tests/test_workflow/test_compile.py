@@ -0,0 +1,74 @@
+import unittest
+
+import wfepy
+
+
+@wfepy.task()
+@wfepy.start_point()
+@wfepy.followed_by('task_a')
+@wfepy.followed_by('task_b', cond=lambda ctx: True)
+def start(ctx):
+    return True
+
+
+@wfepy.task()
+@wfepy.followed_by('end')
+def task_a(ctx):
+    return True
+
+
+@wfepy.task()
+@wfepy.followed_by('end')
+def task_b(ctx):
+    return True
+
+
+@wfepy.task()
+@wfepy.join_point()
+@wfepy.end_point()
+def end(ctx):
+    return True
+
+
+class WorkflowCompileTestCase(unittest.TestCase):
+    """
+    Compiled workflow must contain same graph as workflow with tasks indexed
+    by position of their name in sorted list of names.
+    """
+
+    def setUp(self):
+        self.workflow = wfepy.Workflow()
+        self.workflow.load_tasks(__name__)
+        self.workflow.check_graph()
+
+    def test_compile(self):
+        """Test if graph is compiled to arrays indexed by task ids."""
+        graph = self.workflow.compile()
+        self.assertTupleEqual(graph.names, ('end', 'start', 'task_a', 'task_b'))
+        self.assertDictEqual(graph.index,
+                             {'end': 0, 'start': 1, 'task_a': 2, 'task_b': 3})
+        self.assertIs(graph.tasks[1], start)
+        self.assertCountEqual(graph.successors[1], [2, 3])
+        self.assertTupleEqual(graph.successors[0], ())
+        self.assertListEqual(list(graph.preceded_count), [2, 0, 1, 1])
+        self.assertListEqual(
+            [t.dest for t in graph.transitions[1]],
+            [graph.names[task_id] for task_id in graph.successors[1]],
+        )
+
+    def test_flags(self):
+        """Test if start, join and end points are marked in bitmap."""
+        graph = self.workflow.compile()
+        self.assertListEqual([graph.is_start_point(i) for i in range(4)],
+                             [False, True, False, False])
+        self.assertListEqual([graph.is_join_point(i) for i in range(4)],
+                             [True, False, False, False])
+        self.assertListEqual([graph.is_end_point(i) for i in range(4)],
+                             [True, False, False, False])
+
+    def test_cache(self):
+        """Test if compiled graph is cached until tasks are loaded again."""
+        graph = self.workflow.compile()
+        self.assertIs(self.workflow.compile(), graph)
+        self.workflow.load_tasks(__name__)
+        self.assertIsNot(self.workflow.compile(), graph)
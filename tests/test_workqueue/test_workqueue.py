@@ -0,0 +1,202 @@
+import multiprocessing
+import os
+import tempfile
+import unittest
+
+import wfepy
+from wfepy.workqueue import (JobResult, JobStatus, QueueRunner, SQLiteWorkQueue,
+                             Worker)
+
+
+@wfepy.task()
+@wfepy.start_point()
+@wfepy.followed_by('resize')
+def start(ctx):
+    ctx['done'].append('start')
+    return True
+
+
+@wfepy.task(labels={'remote'})
+@wfepy.followed_by('end')
+def resize(ctx):
+    if ctx.get('fail'):
+        raise ValueError('Cannot resize')
+    ctx['size'] = ctx['width'] * 2
+    ctx['worker_pid'] = os.getpid()
+    del ctx['width']
+    return True
+
+
+@wfepy.task()
+@wfepy.end_point()
+def end(ctx):
+    ctx['done'].append('end')
+    return True
+
+
+def work(path):
+    queue = SQLiteWorkQueue(path)
+    Worker(queue).run()
+    queue.close()
+
+
+class QueueRunnerTestCase(unittest.TestCase):
+    """
+    Remote tasks must be dispatched to work queue and wait until result of job
+    executed by worker is delivered.
+    """
+
+    def setUp(self):
+        self.workflow = wfepy.Workflow()
+        self.workflow.load_tasks(__name__)
+        self.workflow.check_graph()
+        self.queue = SQLiteWorkQueue()
+        self.addCleanup(self.queue.close)
+
+    def create_runner(self, context, **kwargs):
+        return QueueRunner(self.workflow, context, queue=self.queue, **kwargs)
+
+    def test_run(self):
+        """Test if task waits for job and context changes are merged."""
+        for incremental in (False, True):
+            context = {'done': [], 'width': 2}
+            runner = self.create_runner(context, incremental=incremental)
+            runner.run()
+            self.assertIn(('resize', wfepy.TaskState.WAITING), runner.state)
+            job_id = runner.events['resize']
+            self.assertEqual(self.queue.status(job_id), JobStatus.QUEUED)
+
+            worker = Worker(self.queue)
+            worker.run()
+            self.assertEqual(worker.processed, 1)
+            self.assertEqual(self.queue.status(job_id), JobStatus.DONE)
+            self.assertEqual(context, {'done': ['start'], 'width': 2})
+
+            runner.run()
+            self.assertTrue(runner.finished)
+            self.assertEqual(context['size'], 4)
+            self.assertNotIn('width', context)
+            self.assertListEqual(context['done'], ['start', 'end'])
+            with self.assertRaises(KeyError):
+                self.queue.status(job_id)
+
+    def test_error(self):
+        """Test if error raised in worker is raised and task is dispatched again."""
+        context = {'done': [], 'width': 2, 'fail': True}
+        runner = self.create_runner(context)
+        runner.run()
+        Worker(self.queue).run()
+        with self.assertRaises(ValueError):
+            runner.run()
+        self.assertEqual(self.queue.completed(), [])
+
+        context['fail'] = False
+        runner.run()
+        self.assertIn(('resize', wfepy.TaskState.WAITING), runner.state)
+        Worker(self.queue).run()
+        runner.run()
+        self.assertTrue(runner.finished)
+
+    def test_batch(self):
+        """Test if results are delivered to batch runner instances."""
+        batch = wfepy.BatchRunner(self.workflow, runner_class=QueueRunner,
+                                  runner_options={'queue': self.queue})
+        for key in range(3):
+            batch.add(key, {'done': [], 'width': key})
+        batch.run()
+        self.assertListEqual(batch.keys(wfepy.InstanceStatus.WAITING), [0, 1, 2])
+
+        Worker(self.queue).run()
+        self.assertEqual(self.queue.deliver(batch), 3)
+        batch.run()
+        self.assertListEqual([batch.runners[key].context['size'] for key in range(3)],
+                             [0, 2, 4])
+        self.assertListEqual(batch.keys(wfepy.InstanceStatus.FINISHED), [0, 1, 2])
+
+    def test_not_importable(self):
+        """Test if task with local function is not dispatched."""
+        def local(ctx):
+            return True
+
+        runner = self.create_runner({'done': []})
+        task = wfepy.Task(local, 'local', labels={'remote'})
+        self.assertTrue(runner.is_remote(task))
+        with self.assertRaises(wfepy.WorkflowError):
+            runner.dispatch(task)
+        self.assertTupleEqual(runner.function_reference(self.workflow.tasks['resize']),
+                              (__name__, 'resize'))
+
+    def test_processes(self):
+        """Test if jobs are executed by worker processes."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'queue.db')
+            queue = SQLiteWorkQueue(path)
+            self.addCleanup(queue.close)
+            runners = [QueueRunner(self.workflow, {'done': [], 'width': i}, queue=queue)
+                       for i in range(4)]
+            for runner in runners:
+                runner.run()
+
+            workers = [multiprocessing.Process(target=work, args=(path,))
+                       for _ in range(2)]
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+
+            for i, runner in enumerate(runners):
+                runner.run()
+                self.assertTrue(runner.finished)
+                self.assertEqual(runner.context['size'], i * 2)
+                self.assertNotEqual(runner.context['worker_pid'], os.getpid())
+
+
+class SQLiteWorkQueueTestCase(unittest.TestCase):
+    """Leased jobs must be invisible until their lease expires."""
+
+    def setUp(self):
+        self.workflow = wfepy.Workflow()
+        self.workflow.load_tasks(__name__)
+        self.queue = SQLiteWorkQueue(max_attempts=2)
+        self.addCleanup(self.queue.close)
+        runner = QueueRunner(self.workflow, {'done': [], 'width': 1},
+                             queue=self.queue)
+        runner.run()
+        self.job_id = runner.events['resize']
+
+    def test_visibility_timeout(self):
+        """Test if job is leased again when lease expires."""
+        job = self.queue.lease('first', 60)
+        self.assertEqual((job.id, job.worker, job.attempt), (self.job_id, 'first', 1))
+        self.assertIsNone(self.queue.lease('second', 60))
+
+        self.assertTrue(self.queue.extend(job, -1))
+        other = self.queue.lease('second', 60)
+        self.assertEqual((other.id, other.attempt), (self.job_id, 2))
+
+        # first worker lost lease
+        self.assertFalse(self.queue.complete(job, Worker(self.queue).execute(job)))
+        self.assertFalse(self.queue.extend(job, 60))
+        self.assertTrue(self.queue.complete(other, Worker(self.queue).execute(other)))
+        (job_id, result), = self.queue.completed()
+        self.assertEqual(job_id, self.job_id)
+        self.assertEqual(result.changes['size'], 2)
+        self.assertTupleEqual(result.deleted, ('width',))
+
+    def test_completed(self):
+        """Test if completed jobs are selected by keys in chunks."""
+        self.queue.CHUNK_SIZE = 2
+        self.queue.complete(self.queue.lease('first', 60), JobResult(True))
+        ids = [self.job_id] + [str(i) for i in range(4)]
+        self.assertListEqual([job_id for job_id, _ in self.queue.completed(ids)],
+                             [self.job_id])
+        self.assertListEqual(self.queue.completed(['other']), [])
+        self.assertEqual(len(self.queue.completed()), 1)
+
+    def test_max_attempts(self):
+        """Test if job fails when its lease expires too many times."""
+        self.queue.lease('first', -1)
+        self.queue.lease('second', -1)
+        self.assertIsNone(self.queue.lease('third', 60))
+        (job_id, result), = self.queue.completed()
+        self.assertIsInstance(result.error, wfepy.WorkflowError)
@@ -1,3 +1,33 @@
 __version__ = '0.1.1'
 
+import sys
+
 from .workflow import *     # noqa: F401, F403
+
+# Names of other submodules, they are imported on first access of their
+# attributes (PEP 562) to keep import of package fast.
+_LAZY_NAMES = {
+    'batch': ['BatchRunner', 'BatchResult', 'InstanceStatus'],
+    'builder': ['WorkflowBuilder'],
+    'cache': ['ResultCache', 'LRUCache'],
+    'process': ['ProcessPoolRunner', 'RemoteTaskMixin', 'execute_snapshot'],
+}
+_LAZY = {name: module for module, names in _LAZY_NAMES.items() for name in names}
+
+if sys.version_info < (3, 7):
+    from .batch import *    # noqa: F401, F403
+    from .builder import *  # noqa: F401, F403
+    from .cache import *    # noqa: F401, F403
+    from .process import *  # noqa: F401, F403
+else:
+    def __getattr__(name):
+        module_name = _LAZY.get(name)
+        if module_name is None:
+            raise AttributeError('module %r has no attribute %r' % (__name__, name))
+        import importlib
+        value = getattr(importlib.import_module('.' + module_name, __name__), name)
+        globals()[name] = value
+        return value
+
+    def __dir__():
+        return sorted(set(globals()) | set(_LAZY))
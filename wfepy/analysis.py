@@ -0,0 +1,240 @@
+import collections
+import enum
+import logging
+
+import attr
+
+from .workflow import WorkflowError
+
+
+__all__ = ['IssueKind', 'Issue', 'analyze', 'check_workflow']
+
+logger = logging.getLogger(__name__)
+
+
+@enum.unique
+class IssueKind(enum.Enum):
+    """
+    Enumeration of problems found by :func:`analyze`.
+
+    :cvar UNREACHABLE: task is not reachable from any start point
+    :cvar UNSATISFIABLE_JOIN: join point waits for preceding task that never
+                              arrives, it is unreachable or reachable only
+                              through join point itself
+    :cvar ENDLESS_CYCLE: cycle without exit or without condition that could
+                         stop it
+    """
+
+    UNREACHABLE = 1
+    UNSATISFIABLE_JOIN = 2
+    ENDLESS_CYCLE = 3
+
+
+@attr.s(frozen=True)
+class Issue:
+    """
+    Problem in workflow graph found by :func:`analyze`.
+
+    :ivar kind: :class:`IssueKind`
+    :ivar task: name of task with problem
+    :ivar path: names of tasks showing problem, path from start point to
+                join point, from task without incoming transitions to
+                unreachable task or around cycle
+    :ivar message: human readable description
+    """
+
+    kind = attr.ib()
+    task = attr.ib()
+    path = attr.ib(converter=tuple)
+    message = attr.ib()
+
+
+def analyze(workflow):
+    """
+    Analyze workflow graph and return list of :class:`Issue`. Unlike
+    :meth:`.Workflow.check_graph` that checks only each task alone, this finds
+    problems of whole graph that make runner stuck or running forever.
+
+    Problems are found in time linear to number of tasks and transitions, only
+    paths around cycles are searched again for each reported problem.
+    """
+    graph = workflow.compile()
+    predecessors = [[] for _ in graph.names]
+    for task_id, dest_ids in enumerate(graph.successors):
+        for dest_id in dest_ids:
+            predecessors[dest_id].append(task_id)
+
+    issues = []
+    start_ids = [task_id for task_id in range(len(graph.names))
+                 if graph.is_start_point(task_id)]
+    parents = _search(graph, start_ids)
+    unreachable = [task_id for task_id in range(len(graph.names))
+                   if task_id not in parents]
+    # Paths to unreachable tasks lead from tasks without incoming
+    # transitions, or from anywhere in cycles that are not reachable at all.
+    roots = [task_id for task_id in unreachable if not predecessors[task_id]]
+    unreachable_parents = _search(graph, roots + unreachable, parents)
+    for task_id in unreachable:
+        issues.append(Issue(
+            kind=IssueKind.UNREACHABLE,
+            task=graph.names[task_id],
+            path=_path(graph, unreachable_parents, task_id),
+            message='Task %s is not reachable from any start point.'
+                    % graph.names[task_id],
+        ))
+
+    components = _strongly_connected(graph)
+    for task_id in range(len(graph.names)):
+        if not graph.is_join_point(task_id) or task_id not in parents:
+            continue
+        for pred_id in predecessors[task_id]:
+            if pred_id not in parents:
+                reason = 'is not reachable from any start point'
+                path = _path(graph, parents, task_id)
+            elif components[pred_id] == components[task_id]:
+                reason = 'is reachable only after join point'
+                path = _cycle(graph, components, task_id, pred_id)
+            else:
+                continue
+            issues.append(Issue(
+                kind=IssueKind.UNSATISFIABLE_JOIN,
+                task=graph.names[task_id],
+                path=path,
+                message='Join point %s waits for task %s that %s.'
+                        % (graph.names[task_id], graph.names[pred_id], reason),
+            ))
+
+    members = collections.defaultdict(list)
+    for task_id, component in enumerate(components):
+        members[component].append(task_id)
+    for component, task_ids in sorted(members.items()):
+        first_id = task_ids[0]
+        if len(task_ids) == 1 and first_id not in graph.successors[first_id]:
+            continue
+        has_exit = has_cond = False
+        for task_id in task_ids:
+            for transition, dest_id in zip(graph.transitions[task_id],
+                                           graph.successors[task_id]):
+                if components[dest_id] != component:
+                    has_exit = True
+                elif transition.cond:
+                    has_cond = True
+        if has_exit and has_cond:
+            continue
+        names = ', '.join(graph.names[task_id] for task_id in task_ids)
+        pred_id = next(pred_id for pred_id in predecessors[first_id]
+                       if components[pred_id] == component)
+        issues.append(Issue(
+            kind=IssueKind.ENDLESS_CYCLE,
+            task=graph.names[first_id],
+            path=_cycle(graph, components, first_id, pred_id),
+            message='Cycle of tasks %s has %s.'
+                    % (names, 'no conditional transition' if has_exit
+                       else 'no exit'),
+        ))
+    return issues
+
+
+def check_workflow(workflow):
+    """
+    Check workflow graph by :meth:`.Workflow.check_graph` and :func:`analyze`.
+
+    :raises WorkflowError: when there are some problems with workflow graph
+    """
+    workflow.check_graph()
+    issues = analyze(workflow)
+    if issues:
+        for issue in issues:
+            logger.error('%s Path: %s', issue.message, ' -> '.join(issue.path))
+        raise WorkflowError('Invalid graph! '
+                            + ' '.join(issue.message for issue in issues))
+
+
+def _search(graph, seed_ids, visited=None):
+    # Breadth first search, returns dict of parents of visited tasks. Tasks
+    # already in `visited` are not visited again.
+    visited = visited or {}
+    parents = {}
+    queue = collections.deque()
+    for task_id in seed_ids:
+        if task_id not in visited and task_id not in parents:
+            parents[task_id] = None
+            queue.append(task_id)
+            while queue:
+                current_id = queue.popleft()
+                for dest_id in graph.successors[current_id]:
+                    if dest_id not in visited and dest_id not in parents:
+                        parents[dest_id] = current_id
+                        queue.append(dest_id)
+    return parents
+
+
+def _path(graph, parents, task_id):
+    path = []
+    while task_id is not None:
+        path.append(graph.names[task_id])
+        task_id = parents[task_id]
+    return reversed(path)
+
+
+def _cycle(graph, components, task_id, pred_id):
+    # Path from task to its preceding task within same component, closed by
+    # transition back to task.
+    if pred_id != task_id:
+        component = components[task_id]
+        parents = {task_id: None}
+        queue = collections.deque([task_id])
+        while pred_id not in parents:
+            current_id = queue.popleft()
+            for dest_id in graph.successors[current_id]:
+                if components[dest_id] == component and dest_id not in parents:
+                    parents[dest_id] = current_id
+                    queue.append(dest_id)
+        return tuple(_path(graph, parents, pred_id)) + (graph.names[task_id],)
+    return graph.names[task_id], graph.names[task_id]
+
+
+def _strongly_connected(graph):
+    # Iterative Tarjan's algorithm, returns list with component number of each
+    # task.
+    size = len(graph.names)
+    index = [None] * size
+    lowlink = [0] * size
+    on_stack = bytearray(size)
+    components = [None] * size
+    stack = []
+    counter = component = 0
+    for root_id in range(size):
+        if index[root_id] is not None:
+            continue
+        index[root_id] = lowlink[root_id] = counter
+        counter += 1
+        stack.append(root_id)
+        on_stack[root_id] = 1
+        work = [(root_id, iter(graph.successors[root_id]))]
+        while work:
+            task_id, dest_ids = work[-1]
+            for dest_id in dest_ids:
+                if index[dest_id] is None:
+                    index[dest_id] = lowlink[dest_id] = counter
+                    counter += 1
+                    stack.append(dest_id)
+                    on_stack[dest_id] = 1
+                    work.append((dest_id, iter(graph.successors[dest_id])))
+                    break
+                if on_stack[dest_id]:
+                    lowlink[task_id] = min(lowlink[task_id], index[dest_id])
+            else:
+                work.pop()
+                if work:
+                    parent_id = work[-1][0]
+                    lowlink[parent_id] = min(lowlink[parent_id], lowlink[task_id])
+                if lowlink[task_id] == index[task_id]:
+                    while True:
+                        member_id = stack.pop()
+                        on_stack[member_id] = 0
+                        components[member_id] = component
+                        if member_id == task_id:
+                            break
+                    component += 1
+    return components
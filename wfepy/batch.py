@@ -0,0 +1,256 @@
+import collections
+import enum
+import heapq
+import itertools
+import logging
+import time
+
+import attr
+
+from .workflow import Runner, TaskState
+
+
+__all__ = ['BatchRunner', 'BatchResult', 'InstanceStatus']
+
+logger = logging.getLogger(__name__)
+
+
+@enum.unique
+class InstanceStatus(enum.Enum):
+    """
+    Enumeration of workflow instance statuses in :class:`BatchRunner`.
+
+    :cvar RUNNABLE: instance has tasks that can be executed or expanded
+    :cvar WAITING: instance has waiting or failed tasks, but no tasks that can
+                   be executed
+    :cvar BLOCKED: all tasks are join points blocked by preceding tasks
+    :cvar FINISHED: workflow execution finished
+    """
+
+    RUNNABLE = 1
+    WAITING = 2
+    BLOCKED = 3
+    FINISHED = 4
+
+    @classmethod
+    def from_runner(cls, runner):
+        """Get status of instance from state of :class:`.Runner`."""
+        if runner.finished:
+            return cls.FINISHED
+        graph = runner.workflow.compile()
+        task_states = set()
+        for task_name, task_state in runner.state:
+            if (task_state == TaskState.CANCELED
+                    and graph.is_join_point(graph.index[task_name])):
+                task_state = TaskState.BLOCKED
+            task_states.add(task_state)
+        if task_states == {TaskState.CANCELED}:
+            # All tasks canceled, runner will clear state in next run.
+            return cls.RUNNABLE
+        if task_states - {TaskState.WAITING, TaskState.BLOCKED, TaskState.FAILED}:
+            return cls.RUNNABLE
+        if task_states & {TaskState.WAITING, TaskState.FAILED}:
+            return cls.WAITING
+        return cls.BLOCKED
+
+
+@attr.s
+class BatchResult:
+    """
+    Result of workflow instance run by :class:`BatchRunner`.
+
+    :ivar key: key of instance
+    :ivar status: :class:`InstanceStatus` after run
+    :ivar error: exception raised by task or ``None``
+    """
+
+    key = attr.ib()
+    status = attr.ib()
+    error = attr.ib(default=None)
+
+    @property
+    def finished(self):
+        """Workflow execution of instance finished."""
+        return self.status == InstanceStatus.FINISHED
+
+
+@attr.s
+class BatchRunner:
+    """
+    Execution engine for many instances of same workflow.
+
+    Each instance is identified by key and has its own state and context.
+    Instances are indexed by :class:`InstanceStatus`, so :meth:`run` advances
+    only instances that can make progress and does not touch others. Waiting
+    instances with tasks that returned :class:`.Wait` are kept in heap ordered
+    by their deadline and woken up when deadline passed, instances waiting for
+    events are indexed by event keys and woken up by :meth:`signal`.
+
+    :ivar workflow: :class:`.Workflow`
+    :ivar runner_class: class of runners that execute instances
+    :ivar runner_options: keyword arguments passed to runners, incremental mode
+                          is used by default
+    :ivar runners: runners of instances, dict with instance key as key
+    :ivar statuses: instance statuses, dict with instance key as key
+    """
+
+    workflow = attr.ib()
+    runner_class = attr.ib(default=Runner)
+    runner_options = attr.ib(factory=lambda: {'incremental': True})
+    runners = attr.ib(factory=collections.OrderedDict, init=False)
+    statuses = attr.ib(factory=dict, init=False)
+    _index = attr.ib(init=False, repr=False)
+    _timers = attr.ib(factory=list, init=False, repr=False)
+    _deadlines = attr.ib(factory=dict, init=False, repr=False)
+    _sequence = attr.ib(factory=itertools.count, init=False, repr=False)
+    _events = attr.ib(factory=dict, init=False, repr=False)
+    _instance_events = attr.ib(factory=dict, init=False, repr=False)
+
+    @_index.default
+    def _index_default(self):
+        # Ordered dicts are used as ordered sets, so instances are run in
+        # order in which they became runnable (plain dicts are not ordered in
+        # Python 3.5).
+        return {status: collections.OrderedDict() for status in InstanceStatus}
+
+    def add(self, key, context=None, state=None):
+        """
+        Add workflow instance and return its runner. If state is not set,
+        instance starts from start points of workflow. Instance key is used as
+        :attr:`.Runner.cache_scope` if runner options do not set it.
+        """
+        if key in self.runners:
+            raise KeyError('Duplicate instance %r' % (key,))
+        runner = self.runner_class(self.workflow, context, **self.runner_options)
+        if runner.cache_scope is None:
+            runner.cache_scope = key
+        if state is not None:
+            runner._store_state(list(state))
+        self.runners[key] = runner
+        self.update(key)
+        return runner
+
+    def remove(self, key):
+        """Remove workflow instance and return its runner."""
+        del self._index[self.statuses.pop(key)][key]
+        self._deadlines.pop(key, None)
+        self._index_events(key, ())
+        return self.runners.pop(key)
+
+    def keys(self, status=None):
+        """Get list of keys of all instances or instances with status."""
+        if status is None:
+            return list(self.runners)
+        return list(self._index[status])
+
+    def update(self, key):
+        """
+        Update status of instance from state of its runner. Must be called
+        when state of runner was changed outside of :meth:`run`.
+        """
+        runner = self.runners[key]
+        status = self._set_status(key, InstanceStatus.from_runner(runner))
+        deadline = None
+        if status == InstanceStatus.WAITING:
+            deadline = runner.next_wakeup
+        if deadline is None:
+            self._deadlines.pop(key, None)
+        elif self._deadlines.get(key) != deadline:
+            # Old entry in heap is ignored when it is popped.
+            self._deadlines[key] = deadline
+            heapq.heappush(self._timers, (deadline, next(self._sequence), key))
+        self._index_events(key, runner.events.values())
+        return status
+
+    @property
+    def next_wakeup(self):
+        """Earliest deadline of waiting instances or ``None``."""
+        while self._timers:
+            deadline, _, key = self._timers[0]
+            if self._deadlines.get(key) == deadline:
+                return deadline
+            heapq.heappop(self._timers)
+        return None
+
+    def wake_due(self, now=None):
+        """Wake up waiting instances with passed deadline and return their keys."""
+        if now is None:
+            now = time.time()
+        keys = []
+        while self._timers and self._timers[0][0] <= now:
+            deadline, _, key = heapq.heappop(self._timers)
+            if self._deadlines.get(key) == deadline:
+                del self._deadlines[key]
+                keys.append(key)
+        self.wake(*keys)
+        return keys
+
+    def signal(self, event, payload=None):
+        """
+        Deliver signal to all instances waiting for event, see
+        :meth:`.Runner.signal`. Woken up instances are runnable and will be run
+        in next :meth:`run`. Returns list of keys of woken up instances.
+        """
+        keys = list(self._events.get(event, ()))
+        for key in keys:
+            self.runners[key].signal(event, payload)
+            self.update(key)
+        return keys
+
+    def wake(self, *keys):
+        """
+        Mark waiting instances as runnable, their waiting tasks will be
+        executed in next :meth:`run`.
+        """
+        for key in keys:
+            if self.statuses[key] == InstanceStatus.WAITING:
+                self._set_status(key, InstanceStatus.RUNNABLE)
+
+    def run(self, waiting=False):
+        """
+        Run all runnable instances, instances woken up by :meth:`wake_due` and
+        waiting instances if ``waiting`` is ``True``. Instances that are blocked
+        or finished are skipped.
+
+        Exceptions raised by tasks are not propagated, they are reported in
+        returned list of :class:`BatchResult` of instances that were run,
+        including errors of tasks failed in :attr:`.Runner.continue_on_error`
+        mode.
+        """
+        self.wake_due()
+        keys = list(self._index[InstanceStatus.RUNNABLE])
+        if waiting:
+            keys.extend(self._index[InstanceStatus.WAITING])
+        results = []
+        for key in keys:
+            error = None
+            try:
+                report = self.runners[key].run()
+                if report is not None:
+                    error = report.exception()
+            except Exception as e:
+                logger.error('Instance %r failed: %s', key, e)
+                error = e
+            results.append(BatchResult(key, self.update(key), error))
+        return results
+
+    def _index_events(self, key, events):
+        old_events = self._instance_events.pop(key, frozenset())
+        new_events = frozenset(events)
+        for event in old_events - new_events:
+            del self._events[event][key]
+            if not self._events[event]:
+                del self._events[event]
+        for event in new_events - old_events:
+            self._events.setdefault(event, collections.OrderedDict())[key] = None
+        if new_events:
+            self._instance_events[key] = new_events
+
+    def _set_status(self, key, status):
+        old_status = self.statuses.get(key)
+        if old_status != status:
+            if old_status is not None:
+                del self._index[old_status][key]
+            self._index[status][key] = None
+            self.statuses[key] = status
+        return status
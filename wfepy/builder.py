@@ -0,0 +1,139 @@
+import copy
+import logging
+
+import attr
+
+from .workflow import LazyFunction, Task, Transition, Workflow, WorkflowError
+
+
+__all__ = ['WorkflowBuilder']
+
+logger = logging.getLogger(__name__)
+
+
+@attr.s
+class WorkflowBuilder:
+    """
+    Build :class:`.Workflow` from data instead of loading decorated functions
+    from modules by :meth:`.Workflow.load_tasks`.
+
+    Tasks and transitions can be added one by one or in bulk, graph of
+    preceding tasks is created only once by :meth:`build`.
+
+    .. code:: python
+
+        builder = WorkflowBuilder()
+        builder.add_tasks([
+            {'name': 'start', 'func': start, 'start_point': True},
+            {'name': 'end', 'func': end, 'end_point': True},
+        ])
+        builder.add_transitions([('start', 'end')])
+        workflow = builder.build()
+
+    :ivar tasks: collection of added tasks, dict with task name as key
+    """
+
+    tasks = attr.ib(factory=dict, init=False)
+
+    def add_task(self, name, func, labels=(), start_point=False,
+                 join_point=False, end_point=False, followed_by=()):
+        """
+        Add new task. Task is created from function, see :class:`.Task`.
+        Function can be import path ``package.module:name``, it is imported
+        when task is executed (see :class:`.LazyFunction`). Transitions in
+        ``followed_by`` can be names of following tasks or
+        :class:`.Transition` objects.
+
+        :raises WorkflowError: if name of task is not unique
+        """
+        if isinstance(func, str):
+            func = LazyFunction(func)
+        task = Task(func, name=name, labels=labels)
+        task.is_start_point = start_point
+        task.is_join_point = join_point
+        task.is_end_point = end_point
+        for transition in followed_by:
+            if not isinstance(transition, Transition):
+                transition = Transition(transition)
+            task.followed_by.add(transition)
+        return self.add(task)
+
+    def add(self, task):
+        """
+        Add existing :class:`.Task`, eg. created by decorators.
+
+        :raises WorkflowError: if name of task is not unique
+        """
+        if task.name in self.tasks and self.tasks[task.name] is not task:
+            raise WorkflowError('Duplicate tasks: ' + task.name)
+        self.tasks[task.name] = task
+        return task
+
+    def add_tasks(self, tasks):
+        """
+        Add tasks in bulk. Each item can be :class:`.Task`, dict with keyword
+        arguments of :meth:`add_task` or tuple of its positional arguments.
+        """
+        for item in tasks:
+            if isinstance(item, Task):
+                self.add(item)
+            elif isinstance(item, dict):
+                self.add_task(**item)
+            else:
+                self.add_task(*item)
+
+    def add_transition(self, src, dest, cond=None, depends=None, ttl=None):
+        """
+        Add transition from task ``src`` to task ``dest``, see
+        :class:`.Transition`. Destination task does not have to be added yet.
+        Condition can be import path, see :meth:`add_task`.
+
+        :raises WorkflowError: if task ``src`` was not added
+        """
+        try:
+            task = self.tasks[src]
+        except KeyError:
+            raise WorkflowError('Missing task %s.' % src) from None
+        if isinstance(cond, str):
+            cond = LazyFunction(cond)
+        transition = Transition(dest, cond=cond, depends=depends, ttl=ttl)
+        task.followed_by.add(transition)
+        return transition
+
+    def add_transitions(self, transitions):
+        """
+        Add transitions in bulk. Each item can be dict with keyword arguments
+        of :meth:`add_transition` or tuple ``(src, dest)`` or
+        ``(src, dest, cond)``.
+        """
+        for item in transitions:
+            if isinstance(item, dict):
+                self.add_transition(**item)
+            else:
+                self.add_transition(*item)
+
+    def build(self, check=True):
+        """
+        Create :class:`.Workflow` from copies of added tasks, so added tasks
+        can be shared with other workflows. Preceding tasks of all tasks are
+        computed in single pass over transitions.
+
+        :param check: check graph by :meth:`.Workflow.check_graph`
+        :raises WorkflowError: when there are some problems with workflow graph
+        """
+        tasks = {}
+        for name, task in self.tasks.items():
+            task = tasks[name] = copy.copy(task)
+            task.followed_by = set(task.followed_by)
+            task.preceded_by = set()
+        for name, task in tasks.items():
+            for transition in task.followed_by:
+                dest = tasks.get(transition.dest)
+                if dest is not None:
+                    dest.preceded_by.add(name)
+        workflow = Workflow()
+        workflow.tasks.update(tasks)
+        logger.debug('Built workflow with %d tasks', len(workflow.tasks))
+        if check:
+            workflow.check_graph()
+        return workflow
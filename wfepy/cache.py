@@ -0,0 +1,83 @@
+import collections
+import threading
+import time
+
+import attr
+
+
+__all__ = ['ResultCache', 'LRUCache']
+
+
+@attr.s
+class ResultCache:
+    """
+    Base class of caches of results of completed tasks, see :func:`.cached`.
+
+    Keys are tuples of task name and key returned by key function of task.
+    Subclasses must implement :meth:`get`, :meth:`set` and :meth:`delete`, they
+    can be backed by persistent storage so completed tasks are skipped even
+    after crash of process. Methods can be called from multiple threads if
+    runner has executor.
+    """
+
+    def get(self, key):
+        """Return stored value or ``None`` if there is no value for key."""
+        raise NotImplementedError
+
+    def set(self, key, value):
+        """Store value for key."""
+        raise NotImplementedError
+
+    def delete(self, key):
+        """Remove value for key if there is any."""
+        raise NotImplementedError
+
+
+@attr.s
+class LRUCache(ResultCache):
+    """
+    In-memory cache with least recently used eviction and optional expiration.
+
+    :ivar maxsize: maximal number of stored values, least recently used values
+                   are evicted first
+    :ivar ttl: number of seconds values expire after, never if ``None``
+    :ivar hits: number of lookups that found value
+    :ivar misses: number of lookups that did not find value
+    """
+
+    maxsize = attr.ib(default=1024)
+    ttl = attr.ib(default=None)
+    hits = attr.ib(default=0, init=False)
+    misses = attr.ib(default=0, init=False)
+    _data = attr.ib(factory=collections.OrderedDict, init=False, repr=False)
+    _lock = attr.ib(factory=threading.Lock, init=False, repr=False, eq=False)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and (entry[1] is None
+                                      or entry[1] > time.monotonic()):
+                self._data.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if entry is not None:
+                del self._data[key]
+            self.misses += 1
+            return None
+
+    def set(self, key, value):
+        expires = None
+        if self.ttl is not None:
+            expires = time.monotonic() + self.ttl
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def __len__(self):
+        return len(self._data)
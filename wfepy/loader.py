@@ -0,0 +1,421 @@
+import hashlib
+import importlib
+import json
+import logging
+import os
+import subprocess
+import sys
+
+import attr
+
+from .builder import WorkflowBuilder
+from .workflow import LazyFunction, Task, Transition, WorkflowError
+
+
+__all__ = ['WorkflowLoader', 'ImportRecord', 'ImportReport', 'resolve',
+           'import_report']
+
+logger = logging.getLogger(__name__)
+
+TASK_KEYS = {'func', 'labels', 'start_point', 'join_point', 'end_point',
+             'followed_by'}
+TRANSITION_KEYS = {'dest', 'cond', 'depends', 'ttl'}
+FLAG_KEYS = ('start_point', 'join_point', 'end_point')
+
+
+def _is_list_of_str(value):
+    return isinstance(value, list) and all(isinstance(item, str) for item in value)
+
+
+def resolve(reference):
+    """
+    Import object referenced by import path ``package.module:name``, name can
+    be dotted path to attribute of object in module.
+
+    :raises WorkflowError: if module or object does not exist
+    """
+    module_name, sep, name = reference.partition(':')
+    if not sep or not module_name or not name:
+        raise WorkflowError('Invalid reference %s, must be module:name.'
+                            % reference)
+    try:
+        obj = importlib.import_module(module_name)
+        for attr_name in name.split('.'):
+            obj = getattr(obj, attr_name)
+    except (ImportError, AttributeError) as e:
+        raise WorkflowError('Cannot resolve %s: %s' % (reference, e)) from e
+    return obj
+
+
+@attr.s
+class WorkflowLoader:
+    """
+    Load :class:`.Workflow` from definition in YAML or JSON file.
+
+    Definition contains tasks, by name, with import paths of task functions,
+    their flags and transitions. Conditions of transitions are import paths
+    too or names of conditions defined in ``conditions`` section. Transitions
+    can declare ``depends`` and ``ttl`` of condition, see :class:`.Transition`.
+
+    .. code:: yaml
+
+        conditions:
+          approved: package.module:is_approved
+        tasks:
+          start:
+            func: package.module:start
+            start_point: true
+            followed_by:
+              - review
+          review:
+            func: package.module:review
+            labels: [manual]
+            followed_by:
+              - {dest: end, cond: approved, depends: [review_id]}
+          end:
+            func: package.module:end
+            end_point: true
+
+    YAML files (``.yaml`` or ``.yml``) require PyYAML, other files are
+    parsed as JSON.
+
+    If ``cache_dir`` is set, validated definition is cached in it, keyed by
+    SHA-256 hash of file content. Loading file with cached definition skips
+    validation of definition and :meth:`.Workflow.check_graph`.
+
+    If ``lazy`` is set, only graph of workflow is loaded, functions of tasks
+    and conditions are imported when they are called for the first time (see
+    :class:`.LazyFunction` and :func:`import_report`).
+
+    :ivar cache_dir: directory for cached definitions or ``None``
+    :ivar lazy: import functions on demand
+    """
+
+    CACHE_VERSION = 2
+
+    cache_dir = attr.ib(default=None)
+    lazy = attr.ib(default=False)
+
+    def load(self, path):
+        """
+        Load workflow from file.
+
+        :raises WorkflowError: if definition or workflow graph is invalid
+        """
+        with open(path, 'rb') as f:
+            content = f.read()
+        digest = hashlib.sha256(content).hexdigest()
+        spec = self._read_cache(digest)
+        if spec is not None:
+            logger.debug('Loaded cached definition of %s', path)
+            return self._build(spec, check=False)
+
+        spec = self.validate(self.parse(path, content))
+        workflow = self._build(spec, check=True)
+        self._write_cache(digest, spec)
+        return workflow
+
+    def parse(self, path, content):
+        """Parse content of file to data, YAML or JSON by file extension."""
+        if os.path.splitext(path)[1] in ('.yaml', '.yml'):
+            try:
+                import yaml
+            except ImportError:
+                raise WorkflowError('PyYAML is required to load %s' % path) from None
+            return yaml.safe_load(content)
+        return json.loads(content.decode())
+
+    def validate(self, data):
+        """
+        Validate and normalize definition, transitions are converted to dicts
+        and names of conditions are replaced by their import paths.
+
+        :raises WorkflowError: if definition is invalid
+        """
+        problems = []
+        if not isinstance(data, dict) or not isinstance(data.get('tasks'), dict):
+            raise WorkflowError('Invalid definition! Missing tasks.')
+        conditions = data.get('conditions') or {}
+        if not isinstance(conditions, dict):
+            raise WorkflowError('Invalid definition! Conditions must be mapping.')
+        unknown = set(data) - {'tasks', 'conditions'}
+        if unknown:
+            problems.append('Unknown sections %s.' % ', '.join(sorted(unknown)))
+
+        tasks = {}
+        for name, task_data in data['tasks'].items():
+            if isinstance(task_data, str):
+                task_data = {'func': task_data}
+            if (not isinstance(task_data, dict)
+                    or not isinstance(task_data.get('func'), str)):
+                problems.append('Task %s has no function.' % name)
+                continue
+            unknown = set(task_data) - TASK_KEYS
+            if unknown:
+                problems.append('Task %s has unknown keys %s.'
+                                % (name, ', '.join(sorted(unknown))))
+            transitions = []
+            for transition in task_data.get('followed_by') or []:
+                if isinstance(transition, str):
+                    transition = {'dest': transition}
+                if (not isinstance(transition, dict)
+                        or not isinstance(transition.get('dest'), str)
+                        or set(transition) - TRANSITION_KEYS):
+                    problems.append('Task %s has invalid transition %r.'
+                                    % (name, transition))
+                    continue
+                cond = transition.get('cond')
+                if cond is not None:
+                    cond = conditions.get(cond, cond)
+                    if not isinstance(cond, str) or ':' not in cond:
+                        problems.append('Task %s has unknown condition %r.'
+                                        % (name, transition['cond']))
+                        continue
+                depends = transition.get('depends')
+                if depends is not None and not _is_list_of_str(depends):
+                    problems.append('Task %s has invalid depends %r, must be '
+                                    'list of keys.' % (name, depends))
+                    continue
+                ttl = transition.get('ttl')
+                if ttl is not None and (not isinstance(ttl, (int, float))
+                                        or isinstance(ttl, bool) or ttl < 0):
+                    problems.append('Task %s has invalid ttl %r, must be '
+                                    'non-negative number.' % (name, ttl))
+                    continue
+                transitions.append({
+                    'dest': transition['dest'],
+                    'cond': cond,
+                    'depends': depends,
+                    'ttl': ttl,
+                })
+            labels = task_data.get('labels')
+            if labels is None:
+                labels = []
+            if not _is_list_of_str(labels):
+                problems.append('Task %s has invalid labels %r, must be list of '
+                                'strings.' % (name, labels))
+            for key in FLAG_KEYS:
+                if not isinstance(task_data.get(key, False), bool):
+                    problems.append('Task %s has invalid %s %r, must be boolean.'
+                                    % (name, key, task_data[key]))
+            tasks[name] = {
+                'func': task_data['func'],
+                'labels': sorted(labels) if _is_list_of_str(labels) else [],
+                'start_point': task_data.get('start_point', False),
+                'join_point': task_data.get('join_point', False),
+                'end_point': task_data.get('end_point', False),
+                'followed_by': transitions,
+            }
+        if problems:
+            for msg in problems:
+                logger.error(msg)
+            raise WorkflowError('Invalid definition! ' + ' '.join(problems))
+        return {'tasks': tasks}
+
+    def _build(self, spec, check):
+        builder = WorkflowBuilder()
+        conditions = {}
+        for name, task_data in spec['tasks'].items():
+            func = self._resolve(task_data['func'])
+            if isinstance(func, Task):
+                func = func.func
+            transitions = []
+            for transition in task_data['followed_by']:
+                cond = transition['cond']
+                if cond is not None:
+                    if cond not in conditions:
+                        conditions[cond] = self._resolve(cond)
+                    cond = conditions[cond]
+                transitions.append(Transition(
+                    transition['dest'],
+                    cond=cond,
+                    depends=transition['depends'],
+                    ttl=transition['ttl'],
+                ))
+            builder.add_task(
+                name, func,
+                labels=task_data['labels'],
+                start_point=task_data['start_point'],
+                join_point=task_data['join_point'],
+                end_point=task_data['end_point'],
+                followed_by=transitions,
+            )
+        return builder.build(check=check)
+
+    def _resolve(self, reference):
+        if self.lazy:
+            return LazyFunction(reference)
+        return resolve(reference)
+
+    def _cache_path(self, digest):
+        return os.path.join(self.cache_dir, digest + '.json')
+
+    def _read_cache(self, digest):
+        if self.cache_dir is None:
+            return None
+        try:
+            with open(self._cache_path(digest)) as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if cached.get('version') != self.CACHE_VERSION:
+            return None
+        return cached['spec']
+
+    def _write_cache(self, digest, spec):
+        if self.cache_dir is None:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._cache_path(digest)
+        # Write to temporary file first, other processes can read cache.
+        tmp_path = '%s.%d.tmp' % (path, os.getpid())
+        with open(tmp_path, 'w') as f:
+            json.dump({'version': self.CACHE_VERSION, 'spec': spec}, f,
+                      sort_keys=True)
+        os.replace(tmp_path, path)
+
+
+@attr.s(frozen=True)
+class ImportRecord:
+    """
+    Import of lazy function, see :func:`import_report`.
+
+    :ivar name: name of task or ``src->dest`` for condition of transition
+    :ivar reference: import path of function
+    :ivar load_time: number of seconds import took, ``None`` if function was
+                     not imported
+    :ivar modules: names of modules imported by import of function
+    :ivar saved: number of seconds import of module of function that was not
+                 imported would take, ``None`` if it was not measured
+    """
+
+    name = attr.ib()
+    reference = attr.ib()
+    load_time = attr.ib(default=None)
+    modules = attr.ib(default=(), repr=False)
+    saved = attr.ib(default=None)
+
+    @property
+    def loaded(self):
+        """Function was imported."""
+        return self.load_time is not None
+
+
+@attr.s
+class ImportReport:
+    """
+    Report of imports of lazy functions of workflow, see :func:`import_report`.
+
+    :ivar records: list of :class:`ImportRecord`
+    """
+
+    records = attr.ib(factory=list)
+
+    @property
+    def loaded(self):
+        """Records of imported functions."""
+        return [record for record in self.records if record.loaded]
+
+    @property
+    def deferred(self):
+        """Records of functions that were not imported."""
+        return [record for record in self.records if not record.loaded]
+
+    @property
+    def load_time(self):
+        """Number of seconds spent by imports of functions."""
+        return sum(record.load_time for record in self.loaded)
+
+    @property
+    def saved_time(self):
+        """
+        Number of seconds saved by functions that were not imported, ``None``
+        if it was not measured. Each module is counted once.
+        """
+        saved = {}
+        for record in self.deferred:
+            if record.saved is None:
+                return None
+            saved[record.reference.partition(':')[0]] = record.saved
+        return sum(saved.values())
+
+    def format(self):
+        """Format report as text table."""
+        lines = ['%-30s %-50s %10s %8s' % ('name', 'reference', 'seconds', 'modules')]
+        records = sorted(self.records,
+                         key=lambda r: -(r.load_time or r.saved or 0))
+        for record in records:
+            if record.loaded:
+                seconds = '%10.4f' % record.load_time
+            elif record.saved is not None:
+                seconds = '%10s' % ('(%.4f)' % record.saved)
+            else:
+                seconds = '%10s' % '-'
+            lines.append('%-30s %-50s %s %8d' % (record.name, record.reference,
+                                                 seconds, len(record.modules)))
+        saved = self.saved_time
+        lines.append('%d of %d functions imported in %.4f seconds, %d deferred%s'
+                     % (len(self.loaded), len(self.records), self.load_time,
+                        len(self.deferred),
+                        '' if saved is None else ' saving %.4f seconds' % saved))
+        return '\n'.join(lines)
+
+
+_MEASURE_IMPORT = (
+    'import importlib, sys, time\n'
+    'start = time.perf_counter()\n'
+    'importlib.import_module(sys.argv[1])\n'
+    'print(time.perf_counter() - start)\n'
+)
+
+
+def _measure_import(module_name):
+    # Module is imported in fresh interpreter, with modules of this process it
+    # could be already imported.
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    try:
+        output = subprocess.check_output(
+            [sys.executable, '-c', _MEASURE_IMPORT, module_name], env=env,
+            stderr=subprocess.DEVNULL)
+    except (OSError, subprocess.CalledProcessError) as e:
+        logger.warning('Cannot measure import of %s: %s', module_name, e)
+        return None
+    return float(output)
+
+
+def import_report(workflow, measure=False):
+    """
+    Create :class:`ImportReport` of lazy functions of tasks and conditions of
+    workflow loaded by :class:`WorkflowLoader` with ``lazy`` option or built
+    with import paths by :class:`.WorkflowBuilder`.
+
+    If ``measure`` is set, import of each module of functions that were not
+    imported is measured in subprocess, modules already imported save nothing.
+    """
+    functions = []
+    for name, task in workflow.tasks.items():
+        if isinstance(task.func, LazyFunction):
+            functions.append((name, task.func))
+        for transition in sorted(task.followed_by, key=lambda t: t.dest):
+            if isinstance(transition.cond, LazyFunction):
+                functions.append(('%s->%s' % (name, transition.dest), transition.cond))
+    # Condition used by multiple transitions is reported once.
+    unique = {}
+    for name, func in functions:
+        unique.setdefault(id(func), (name, func))
+    functions = list(unique.values())
+
+    measured = {}
+    records = []
+    for name, func in functions:
+        saved = None
+        if not func.loaded and measure:
+            if func.__module__ in sys.modules:
+                saved = 0.0
+            else:
+                if func.__module__ not in measured:
+                    measured[func.__module__] = _measure_import(func.__module__)
+                saved = measured[func.__module__]
+        records.append(ImportRecord(name, func.reference, func.load_time,
+                                    func.modules, saved))
+    return ImportReport(records)
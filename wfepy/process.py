@@ -0,0 +1,187 @@
+import collections.abc
+import concurrent.futures
+import copy
+import logging
+import time
+
+import attr
+
+from .loader import resolve
+from .workflow import Runner, Task, WorkflowError
+
+
+__all__ = ['ProcessPoolRunner', 'RemoteTaskMixin', 'execute_snapshot']
+
+logger = logging.getLogger(__name__)
+
+
+def execute_snapshot(module_name, qualname, snapshot, args=()):
+    """
+    Execute task function referenced by module and qualified name (see
+    :meth:`RemoteTaskMixin.function_reference`) with context snapshot, in
+    worker process. Returns result of task, keys of snapshot changed by task
+    (dict), list of deleted keys and CPU time of task in seconds.
+    """
+    func = resolve(module_name + ':' + qualname)
+    # Decorated function is replaced by task in its module.
+    if isinstance(func, Task):
+        func = func.func
+    original = copy.deepcopy(snapshot)
+    cpu_start = time.process_time()
+    result = func(snapshot, *args)
+    cpu_time = time.process_time() - cpu_start
+    changes = {key: value for key, value in snapshot.items()
+               if key not in original or original[key] != value}
+    deleted = [key for key in original if key not in snapshot]
+    return result, changes, deleted, cpu_time
+
+
+class RemoteTaskMixin:
+    """
+    Mixin of runners that execute tasks with :attr:`labels` in other
+    processes. Context must be mapping, tasks receive its snapshot created by
+    :meth:`snapshot` and changes of snapshot are merged back by :meth:`merge`.
+
+    Class using mixin must have attributes ``labels`` and ``context_keys``,
+    context keys used by tasks, dict with task name as key, whole context is
+    sent to tasks not listed.
+    """
+
+    def is_remote(self, task):
+        """Task has some of :attr:`labels` and is executed in other process."""
+        return task.has_labels(self.labels, reducer=any)
+
+    def function_reference(self, task):
+        """
+        Module and qualified name of task function, see
+        :func:`execute_snapshot`.
+
+        :raises WorkflowError: if function is not importable
+        """
+        func = task.func
+        if '<locals>' in func.__qualname__:
+            raise WorkflowError('Task %s cannot be executed in other process, '
+                                'its function is not importable.' % task.name)
+        return func.__module__, func.__qualname__
+
+    def snapshot(self, task):
+        """Create snapshot of context for task executed in other process."""
+        if not isinstance(self.context, collections.abc.MutableMapping):
+            raise WorkflowError('Context of task %s executed in other process '
+                                'must be mapping.' % task.name)
+        keys = self.context_keys.get(task.name)
+        if keys is None:
+            return dict(self.context)
+        return {key: self.context[key] for key in keys if key in self.context}
+
+    def merge(self, task, changes, deleted):
+        """Merge changes of context snapshot made by task to context."""
+        self.context.update(changes)
+        for key in deleted:
+            self.context.pop(key, None)
+
+
+@attr.s
+class ProcessPoolRunner(RemoteTaskMixin, Runner):
+    """
+    Workflow execution engine that executes CPU-bound tasks in pool of worker
+    processes, so they are not serialized by GIL.
+
+    Tasks with :attr:`labels` are executed in processes, other tasks are
+    executed in this process (by :attr:`~Runner.executor` if set) meanwhile.
+    All ready tasks of step are executed at once.
+
+    Tasks are resolved in worker processes by module and qualified name of
+    their function, so functions must be importable. Context must be mapping,
+    tasks receive its snapshot, copy of keys listed in :attr:`context_keys` or
+    of whole context, see :class:`RemoteTaskMixin`. Keys changed or deleted
+    by task are merged back to context after other tasks of step were
+    executed, in order of tasks, so result does not depend on timing of
+    processes. Snapshot, task result and changes must be picklable.
+
+    :ivar pool: :class:`concurrent.futures.ProcessPoolExecutor`, created with
+                ``max_workers`` if not set and shut down by :meth:`shutdown`
+    :ivar max_workers: number of processes of created pool
+    :ivar labels: labels of tasks executed in processes
+    :ivar context_keys: context keys used by tasks, dict with task name as
+                        key, whole context is sent to tasks not listed
+    """
+
+    pool = attr.ib(default=None, kw_only=True, repr=False, eq=False)
+    max_workers = attr.ib(default=None, kw_only=True)
+    labels = attr.ib(default=frozenset({'cpu'}), kw_only=True, converter=frozenset)
+    context_keys = attr.ib(factory=dict, kw_only=True)
+    _own_pool = attr.ib(default=False, init=False, repr=False, eq=False)
+
+    def shutdown(self):
+        """Shut down pool of processes if it was created by runner."""
+        if self._own_pool:
+            self.pool.shutdown()
+            self.pool = None
+            self._own_pool = False
+
+    @property
+    def _concurrent(self):
+        return True
+
+    def _execute_concurrent(self, tasks):
+        submitted = {}
+        for index, task in enumerate(tasks):
+            if self.is_remote(task):
+                submitted[index] = self._submit(task)
+
+        others = [task for index, task in enumerate(tasks) if index not in submitted]
+        if self.executor is not None:
+            futures = [self.executor.submit(self._task_call, task) for task in others]
+            results = [future.result() for future in futures]
+        else:
+            results = [self._task_call(task) for task in others]
+        results.reverse()
+
+        states = []
+        for index, task in enumerate(tasks):
+            if index in submitted:
+                result, error = self._collect(task, *submitted[index])
+            else:
+                result, error = results.pop()
+            states.append(self._task_result(task, result, error))
+        return states
+
+    def _submit(self, task):
+        logger.info('Executing task %s in process', task.name)
+        self._notify('on_task_start', task)
+        start = time.perf_counter()
+        cache = cache_key = None
+        try:
+            cache, cache_key = self._task_cache(task)
+            if cache is not None and cache.get(cache_key):
+                logger.info('Task %s was already completed, skipping', task.name)
+                return None, (cache, cache_key), start
+            module_name, qualname = self.function_reference(task)
+            if self.pool is None:
+                self.pool = concurrent.futures.ProcessPoolExecutor(self.max_workers)
+                self._own_pool = True
+            future = self.pool.submit(
+                execute_snapshot, module_name, qualname,
+                self.snapshot(task), self._task_args(task)[1:])
+        except Exception as e:
+            future = concurrent.futures.Future()
+            future.set_exception(e)
+        return future, (cache, cache_key), start
+
+    def _collect(self, task, future, cache_info, start):
+        if future is None:
+            result, error = True, None
+        else:
+            try:
+                result, changes, deleted, cpu_time = future.result()
+                self._notify('on_task_cpu', task, cpu_time)
+                self.merge(task, changes, deleted)
+                self._task_cache_store(*cache_info, result)
+                error = None
+            except Exception as e:
+                logger.exception(e)
+                result, error = False, e
+                self._notify('on_task_cpu', task, None)
+        self._notify('on_task_end', task, result, error, time.perf_counter() - start)
+        return result, error
@@ -0,0 +1,223 @@
+import bisect
+import collections
+import threading
+import time
+
+import attr
+
+from .workflow import Hooks
+
+
+__all__ = ['Histogram', 'Profiler']
+
+
+# Thread CPU time is not available in Python < 3.7.
+_cpu_time = getattr(time, 'thread_time', time.process_time)
+
+
+@attr.s
+class Histogram:
+    """
+    Histogram of observed values with fixed buckets, compatible with
+    Prometheus histograms.
+
+    :ivar buckets: upper bounds of buckets, sorted
+    :ivar counts: number of values in each bucket (not cumulative), last item
+                  is number of values greater than all bounds
+    :ivar count: number of observed values
+    :ivar sum: sum of observed values
+    """
+
+    TIME_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10, 60)
+    SIZE_BUCKETS = (1, 10, 100, 1000, 10000, 100000)
+
+    buckets = attr.ib(default=TIME_BUCKETS, converter=tuple)
+    counts = attr.ib(init=False)
+    count = attr.ib(default=0, init=False)
+    sum = attr.ib(default=0, init=False)
+
+    @counts.default
+    def _counts_default(self):
+        return [0] * (len(self.buckets) + 1)
+
+    def observe(self, value):
+        """Add value to histogram."""
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self):
+        """List of pairs of bucket upper bound and cumulative count."""
+        bounds = list(self.buckets) + [float('inf')]
+        total = 0
+        result = []
+        for bound, count in zip(bounds, self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+    def as_dict(self):
+        """Convert histogram to dict."""
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'buckets': [[bound, count] for bound, count in self.cumulative()],
+        }
+
+
+def _metric(name, **labels):
+    def escape(value):
+        return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+    if not labels:
+        return name
+    return '%s{%s}' % (name, ','.join('%s="%s"' % (label, escape(value))
+                                      for label, value in sorted(labels.items())))
+
+
+def _format_bound(bound):
+    return '+Inf' if bound == float('inf') else repr(float(bound))
+
+
+@attr.s
+class Profiler(Hooks):
+    """
+    Collector of execution statistics, add it to :attr:`.Runner.hooks`. Same
+    profiler can be shared by many runners.
+
+    CPU time of task is measured in thread that executed task. It is not
+    accurate for :class:`.AsyncRunner`, coroutine tasks executed concurrently
+    share one thread. CPU time of task executed by :class:`.ProcessPoolRunner`
+    is measured in worker process and it is not observed if task failed.
+
+    :ivar task_wall_time: histograms of task wall time, dict with task name as key
+    :ivar task_cpu_time: histograms of task CPU time, dict with task name as key
+    :ivar task_errors: number of task failures, dict with task name as key
+    :ivar condition_time: histograms of condition evaluation time, dict with
+                          pair of task name and following task name as key
+    :ivar joins: number of joins, dict with join point name as key
+    :ivar steps: number of steps
+    :ivar state_size: histogram of number of tasks in state after each step
+    """
+
+    task_wall_time = attr.ib(factory=dict, init=False)
+    task_cpu_time = attr.ib(factory=dict, init=False)
+    task_errors = attr.ib(factory=collections.Counter, init=False)
+    condition_time = attr.ib(factory=dict, init=False)
+    joins = attr.ib(factory=collections.Counter, init=False)
+    steps = attr.ib(default=0, init=False)
+    state_size = attr.ib(factory=lambda: Histogram(Histogram.SIZE_BUCKETS),
+                         init=False)
+    _cpu_start = attr.ib(factory=dict, init=False, repr=False)
+    _cpu_remote = attr.ib(factory=dict, init=False, repr=False)
+    _lock = attr.ib(factory=threading.Lock, init=False, repr=False)
+
+    def on_task_start(self, runner, task):
+        self._cpu_start[threading.get_ident(), task.name] = _cpu_time()
+
+    def on_task_cpu(self, runner, task, cpu_time):
+        self._cpu_remote[threading.get_ident(), task.name] = cpu_time
+
+    def on_task_end(self, runner, task, result, error, duration):
+        key = threading.get_ident(), task.name
+        cpu_start = self._cpu_start.pop(key, None)
+        if key in self._cpu_remote:
+            cpu_duration = self._cpu_remote.pop(key)
+        elif cpu_start is not None:
+            cpu_duration = _cpu_time() - cpu_start
+        else:
+            cpu_duration = 0
+        with self._lock:
+            self._histogram(self.task_wall_time, task.name).observe(duration)
+            if cpu_duration is not None:
+                self._histogram(self.task_cpu_time, task.name).observe(cpu_duration)
+            if error is not None:
+                self.task_errors[task.name] += 1
+
+    def on_transition(self, runner, task, transition, result, duration):
+        with self._lock:
+            self._histogram(self.condition_time,
+                            (task.name, transition.dest)).observe(duration)
+
+    def on_join(self, runner, join_task, join_states):
+        with self._lock:
+            self.joins[join_task.name] += 1
+
+    def on_step(self, runner, state_size):
+        with self._lock:
+            self.steps += 1
+            self.state_size.observe(state_size)
+
+    def as_dict(self):
+        """Export collected statistics as dict (can be serialized to JSON)."""
+        with self._lock:
+            return {
+                'tasks': {
+                    name: {
+                        'wall_time': self.task_wall_time[name].as_dict(),
+                        'cpu_time': self.task_cpu_time[name].as_dict(),
+                        'errors': self.task_errors[name],
+                    }
+                    for name in sorted(self.task_wall_time)
+                },
+                'conditions': {
+                    '%s->%s' % key: histogram.as_dict()
+                    for key, histogram in sorted(self.condition_time.items())
+                },
+                'joins': dict(self.joins),
+                'steps': self.steps,
+                'state_size': self.state_size.as_dict(),
+            }
+
+    def prometheus(self, prefix='wfepy'):
+        """Export collected statistics in Prometheus text format."""
+        lines = []
+
+        def histograms(name, help_text, items):
+            name = prefix + '_' + name
+            lines.append('# HELP %s %s' % (name, help_text))
+            lines.append('# TYPE %s histogram' % name)
+            for labels, histogram in items:
+                for bound, count in histogram.cumulative():
+                    bucket = _metric(name + '_bucket',
+                                     le=_format_bound(bound), **labels)
+                    lines.append('%s %d' % (bucket, count))
+                lines.append('%s %r' % (_metric(name + '_sum', **labels),
+                                        float(histogram.sum)))
+                lines.append('%s %d' % (_metric(name + '_count', **labels),
+                                        histogram.count))
+
+        def counters(name, help_text, items):
+            name = prefix + '_' + name
+            lines.append('# HELP %s %s' % (name, help_text))
+            lines.append('# TYPE %s counter' % name)
+            for labels, value in items:
+                lines.append('%s %d' % (_metric(name, **labels), value))
+
+        with self._lock:
+            histograms('task_wall_seconds', 'Wall time of task execution.',
+                       [({'task': name}, histogram)
+                        for name, histogram in sorted(self.task_wall_time.items())])
+            histograms('task_cpu_seconds', 'CPU time of task execution.',
+                       [({'task': name}, histogram)
+                        for name, histogram in sorted(self.task_cpu_time.items())])
+            counters('task_errors_total', 'Number of task failures.',
+                     [({'task': name}, count)
+                      for name, count in sorted(self.task_errors.items())])
+            histograms('condition_seconds',
+                       'Time of transition condition evaluation.',
+                       [({'task': task, 'dest': dest}, histogram)
+                        for (task, dest), histogram
+                        in sorted(self.condition_time.items())])
+            counters('joins_total', 'Number of joins of join points.',
+                     [({'task': name}, count)
+                      for name, count in sorted(self.joins.items())])
+            counters('steps_total', 'Number of runner steps.', [({}, self.steps)])
+            histograms('state_size', 'Number of tasks in state after step.',
+                       [({}, self.state_size)])
+        return '\n'.join(lines) + '\n'
+
+    @staticmethod
+    def _histogram(histograms, key):
+        if key not in histograms:
+            histograms[key] = Histogram()
+        return histograms[key]
@@ -0,0 +1,481 @@
+import collections
+import contextlib
+import json
+import os
+import struct
+import zlib
+
+import attr
+
+from .batch import InstanceStatus
+from .workflow import CompactState, TaskState, WorkflowError, error_reprs
+
+
+__all__ = [
+    'JSONCodec', 'PickleCodec', 'StateStore', 'MemoryStore', 'FileStore',
+    'SQLiteStore', 'encode_state', 'decode_state',
+]
+
+
+@attr.s
+class JSONCodec:
+    """Codec for contexts that can be serialized to JSON (dicts, lists, ...)."""
+
+    def encode(self, obj):
+        return json.dumps(obj, sort_keys=True, separators=(',', ':')).encode()
+
+    def decode(self, data):
+        return json.loads(data.decode())
+
+
+@attr.s
+class PickleCodec:
+    """
+    Codec for arbitrary contexts. Use only for trusted stores, loading pickle
+    can execute arbitrary code.
+
+    :ivar protocol: pickle protocol, highest protocol if negative
+    """
+
+    protocol = attr.ib(default=-1)
+
+    def encode(self, obj):
+        import pickle
+
+        return pickle.dumps(obj, protocol=self.protocol)
+
+    def decode(self, data):
+        import pickle
+
+        return pickle.loads(data)
+
+
+def _graph_checksum(graph):
+    return zlib.crc32('\n'.join(graph.names).encode())
+
+
+def _pack(graph, state):
+    # Each task is packed to single integer, task id and task state value (3
+    # bits are enough for all states).
+    if isinstance(state, CompactState) and state.graph is graph:
+        return state.entries
+    return [graph.index[task_name] << 3 | task_state.value
+            for task_name, task_state in state]
+
+
+def _unpack(graph, entries):
+    return [(graph.names[entry >> 3], TaskState(entry & 7)) for entry in entries]
+
+
+def encode_state(graph, state):
+    """
+    Encode :attr:`.Runner.state` to bytes. Tasks are stored by their ids in
+    :class:`.CompiledWorkflow` with checksum of graph task names.
+    """
+    entries = _pack(graph, state)
+    return struct.pack('<I%dI' % len(entries), _graph_checksum(graph), *entries)
+
+
+def decode_state(graph, data):
+    """
+    Decode :attr:`.Runner.state` from bytes, see :func:`encode_state`.
+
+    :raises WorkflowError: if state was encoded for different workflow graph
+    """
+    checksum, = struct.unpack_from('<I', data)
+    if checksum != _graph_checksum(graph):
+        raise WorkflowError('State was stored for different workflow graph.')
+    return _unpack(graph, struct.unpack_from('<%dI' % (len(data) // 4 - 1), data, 4))
+
+
+@attr.s
+class StateStore:
+    """
+    Base class of stores of runners state and context.
+
+    :meth:`save` stores full snapshot of runner (state, context, wakeups,
+    events, signals, retries and errors), :meth:`save_state` appends only
+    changes of state since last save or load, so it does not depend on size
+    of context and whole state. When there are more than
+    :attr:`compact_after` changes stored, state snapshot is rewritten.
+
+    Subclasses must implement :meth:`keys`, :meth:`delete` and methods for
+    reading and writing of encoded snapshots and changes.
+
+    :ivar workflow: :class:`.Workflow`
+    :ivar codec: codec of context, :class:`JSONCodec` by default
+    :ivar compact_after: max number of stored changes
+    """
+
+    workflow = attr.ib()
+    codec = attr.ib(factory=JSONCodec)
+    compact_after = attr.ib(default=100)
+    _saved = attr.ib(factory=dict, init=False, repr=False)
+
+    def save(self, key, runner):
+        """Store snapshot of runner state and context."""
+        graph = self.workflow.compile()
+        with self.transaction():
+            self._write_snapshot(key, encode_state(graph, runner.state),
+                                 self._encode_data(runner))
+            self._write_status(key, runner)
+        self._saved[key] = (collections.Counter(_pack(graph, runner.state)), 0,
+                            self._encode_header(runner))
+
+    def save_state(self, key, runner):
+        """
+        Store changes of runner state since last :meth:`save` or
+        :meth:`load`, context and signals are not stored. Whole runner is
+        stored by :meth:`save` if wakeups, events, retries or errors changed.
+        """
+        if key not in self._saved:
+            self.save(key, runner)
+            return
+        saved, changes, header = self._saved[key]
+        if self._encode_header(runner) != header:
+            # Waiting tasks must not be executed again after load.
+            self.save(key, runner)
+            return
+        graph = self.workflow.compile()
+        current = collections.Counter(_pack(graph, runner.state))
+        removed = list((saved - current).elements())
+        added = list((current - saved).elements())
+        if not removed and not added:
+            return
+        with self.transaction():
+            if changes + 1 > self.compact_after:
+                self._write_snapshot(key, encode_state(graph, runner.state))
+                changes = -1
+            else:
+                self._append_changes(key, struct.pack(
+                    '<II%dI' % (len(removed) + len(added)),
+                    len(removed), len(added), *(removed + added)))
+            self._write_status(key, runner)
+        self._saved[key] = (current, changes + 1, header)
+
+    def checkpoint(self, runners, context=True):
+        """
+        Store many runners at once, in single transaction if store supports
+        transactions. Runners are pairs of key and runner, eg. items of
+        :attr:`.BatchRunner.runners`. If ``context`` is ``False`` only changes
+        of state are stored, see :meth:`save_state`.
+        """
+        with self.transaction():
+            for key, runner in runners:
+                if context:
+                    self.save(key, runner)
+                else:
+                    self.save_state(key, runner)
+
+    @contextlib.contextmanager
+    def transaction(self):
+        """
+        Context manager, all writes inside are done in single transaction.
+        Does nothing if store does not support transactions.
+        """
+        yield
+
+    def load(self, key, runner):
+        """
+        Load runner state and context from store.
+
+        :raises KeyError: if there is no runner stored under key
+        """
+        graph = self.workflow.compile()
+        state_data, context_data, changes = self._read(key)
+        entries = collections.Counter(_pack(graph, decode_state(graph, state_data)))
+        for data in changes:
+            removed_count, added_count = struct.unpack_from('<II', data)
+            items = struct.unpack_from('<%dI' % (removed_count + added_count), data, 8)
+            entries.subtract(items[:removed_count])
+            entries.update(items[removed_count:])
+        runner.state = _unpack(graph, entries.elements())
+        self._decode_data(runner, context_data)
+        self._saved[key] = (+entries, len(changes), self._encode_header(runner))
+
+    def _encode_header(self, runner):
+        return json.dumps([runner.wakeups, runner.events, runner.retries,
+                           error_reprs(runner.errors)]).encode()
+
+    def _encode_data(self, runner):
+        # Wakeups, events, retries and errors are stored as JSON, followed by
+        # context and signals payloads encoded by codec.
+        header = self._encode_header(runner)
+        context = self.codec.encode(runner.context)
+        return (struct.pack('<II', len(header), len(context)) + header + context
+                + self.codec.encode(runner.signals))
+
+    def _decode_data(self, runner, data):
+        header_size, context_size = struct.unpack_from('<II', data)
+        offset = 8 + header_size
+        (runner.wakeups, runner.events, runner.retries,
+         runner.errors) = json.loads(data[8:offset].decode())
+        runner.context = self.codec.decode(data[offset:offset + context_size])
+        runner.signals = self.codec.decode(data[offset + context_size:])
+
+    def keys(self):
+        """List of keys of stored runners."""
+        raise NotImplementedError
+
+    def delete(self, key):
+        """Delete runner from store."""
+        raise NotImplementedError
+
+    def _write_snapshot(self, key, state_data, context_data=None):
+        """Write snapshot and drop stored changes, keep context if ``None``."""
+        raise NotImplementedError
+
+    def _write_status(self, key, runner):
+        """Store :class:`.InstanceStatus` of runner if store supports it."""
+
+    def _append_changes(self, key, data):
+        raise NotImplementedError
+
+    def _read(self, key):
+        """Return state snapshot, context and list of changes."""
+        raise NotImplementedError
+
+
+@attr.s
+class MemoryStore(StateStore):
+    """
+    Store that keeps encoded runners in memory.
+
+    :ivar data: dict with key as key and list of state snapshot, context and
+                list of changes as value
+    """
+
+    data = attr.ib(factory=dict, init=False)
+
+    def keys(self):
+        return list(self.data)
+
+    def delete(self, key):
+        del self.data[key]
+        self._saved.pop(key, None)
+
+    def _write_snapshot(self, key, state_data, context_data=None):
+        if context_data is None:
+            context_data = self.data[key][1]
+        self.data[key] = [state_data, context_data, []]
+
+    def _append_changes(self, key, data):
+        self.data[key][2].append(data)
+
+    def _read(self, key):
+        state_data, context_data, changes = self.data[key]
+        return state_data, context_data, list(changes)
+
+
+@attr.s
+class FileStore(StateStore):
+    """
+    Store that keeps each runner in directory in three files, state snapshot,
+    context and append-only log of state changes. Keys must be valid file
+    names.
+
+    :ivar directory: path to directory with stored runners
+    """
+
+    directory = attr.ib(default='.')
+
+    STATE_SUFFIX = '.state'
+    CONTEXT_SUFFIX = '.context'
+    CHANGES_SUFFIX = '.changes'
+
+    def keys(self):
+        return sorted(name[:-len(self.STATE_SUFFIX)]
+                      for name in os.listdir(self.directory)
+                      if name.endswith(self.STATE_SUFFIX))
+
+    def delete(self, key):
+        for suffix in (self.STATE_SUFFIX, self.CONTEXT_SUFFIX, self.CHANGES_SUFFIX):
+            try:
+                os.remove(self._path(key, suffix))
+            except FileNotFoundError:
+                pass
+        self._saved.pop(key, None)
+
+    def _path(self, key, suffix):
+        return os.path.join(self.directory, key + suffix)
+
+    def _write_file(self, path, data):
+        # Write to temporary file first, so file is not broken on crash.
+        with open(path + '.tmp', 'wb') as f:
+            f.write(data)
+        os.replace(path + '.tmp', path)
+
+    def _write_snapshot(self, key, state_data, context_data=None):
+        # Snapshot and log of changes are marked by generation, so changes
+        # stored before snapshot are ignored if new log was not created yet.
+        generation = self._generation(key) + 1
+        if context_data is not None:
+            self._write_file(self._path(key, self.CONTEXT_SUFFIX), context_data)
+        self._write_file(self._path(key, self.STATE_SUFFIX),
+                         struct.pack('<I', generation) + state_data)
+        self._write_file(self._path(key, self.CHANGES_SUFFIX),
+                         struct.pack('<I', generation))
+
+    def _append_changes(self, key, data):
+        with open(self._path(key, self.CHANGES_SUFFIX), 'ab') as f:
+            f.write(struct.pack('<I', len(data)) + data)
+
+    def _generation(self, key):
+        try:
+            with open(self._path(key, self.STATE_SUFFIX), 'rb') as f:
+                generation, = struct.unpack('<I', f.read(4))
+        except FileNotFoundError:
+            generation = 0
+        return generation
+
+    def _read(self, key):
+        try:
+            with open(self._path(key, self.STATE_SUFFIX), 'rb') as f:
+                generation, = struct.unpack('<I', f.read(4))
+                state_data = f.read()
+        except FileNotFoundError:
+            raise KeyError(key)
+        with open(self._path(key, self.CONTEXT_SUFFIX), 'rb') as f:
+            context_data = f.read()
+        try:
+            with open(self._path(key, self.CHANGES_SUFFIX), 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            data = b''
+        changes = []
+        if data[:4] != struct.pack('<I', generation):
+            return state_data, context_data, changes
+        offset = 4
+        while offset + 4 <= len(data):
+            size, = struct.unpack_from('<I', data, offset)
+            if offset + 4 + size > len(data):
+                # Incomplete record written during crash.
+                break
+            changes.append(data[offset + 4:offset + 4 + size])
+            offset += 4 + size
+        return state_data, context_data, changes
+
+
+@attr.s
+class SQLiteStore(StateStore):
+    """
+    Store that keeps runners in sqlite3 database.
+
+    Status of each runner (see :class:`.InstanceStatus`) is stored in indexed
+    column, so runners that can be resumed can be selected by :meth:`keys`
+    without loading them. Use :meth:`checkpoint` to store all runners after
+    :meth:`.BatchRunner.run` in single transaction.
+
+    :ivar path: path to database file, ``:memory:`` for in-memory database
+    """
+
+    path = attr.ib(default=':memory:')
+    connection = attr.ib(init=False, repr=False)
+    _depth = attr.ib(default=0, init=False, repr=False)
+
+    SCHEMA = (
+        'CREATE TABLE IF NOT EXISTS runners ('
+        ' key PRIMARY KEY, state BLOB NOT NULL, context BLOB NOT NULL,'
+        ' status INTEGER NOT NULL)',
+        'CREATE INDEX IF NOT EXISTS runners_status ON runners (status)',
+        'CREATE TABLE IF NOT EXISTS changes ('
+        ' id INTEGER PRIMARY KEY AUTOINCREMENT, key NOT NULL, data BLOB NOT NULL)',
+        'CREATE INDEX IF NOT EXISTS changes_key ON changes (key)',
+    )
+
+    @connection.default
+    def _connection_default(self):
+        import sqlite3
+
+        # Transactions are controlled explicitly by transaction().
+        connection = sqlite3.connect(self.path, isolation_level=None)
+        for statement in self.SCHEMA:
+            connection.execute(statement)
+        return connection
+
+    def close(self):
+        """Close database connection."""
+        self.connection.close()
+
+    @contextlib.contextmanager
+    def transaction(self):
+        if self._depth:
+            self._depth += 1
+            try:
+                yield
+            finally:
+                self._depth -= 1
+            return
+        self.connection.execute('BEGIN')
+        self._depth = 1
+        try:
+            yield
+        except BaseException:
+            self.connection.execute('ROLLBACK')
+            # Saved states may not be stored, next save must be full.
+            self._saved.clear()
+            raise
+        else:
+            self.connection.execute('COMMIT')
+        finally:
+            self._depth = 0
+
+    def keys(self, status=None):
+        """List of keys of stored runners, all or with :class:`.InstanceStatus`."""
+        if status is None:
+            cursor = self.connection.execute('SELECT key FROM runners ORDER BY rowid')
+        else:
+            cursor = self.connection.execute(
+                'SELECT key FROM runners WHERE status = ? ORDER BY rowid',
+                (status.value,))
+        return [key for key, in cursor]
+
+    def status(self, key):
+        """
+        Get :class:`.InstanceStatus` of stored runner.
+
+        :raises KeyError: if there is no runner stored under key
+        """
+        row = self.connection.execute('SELECT status FROM runners WHERE key = ?',
+                                      (key,)).fetchone()
+        if row is None:
+            raise KeyError(key)
+        return InstanceStatus(row[0])
+
+    def delete(self, key):
+        with self.transaction():
+            self.connection.execute('DELETE FROM runners WHERE key = ?', (key,))
+            self.connection.execute('DELETE FROM changes WHERE key = ?', (key,))
+        self._saved.pop(key, None)
+
+    def _write_snapshot(self, key, state_data, context_data=None):
+        if context_data is None:
+            self.connection.execute('UPDATE runners SET state = ? WHERE key = ?',
+                                    (state_data, key))
+        else:
+            # Status is set by _write_status() in same transaction. Upsert
+            # (ON CONFLICT) is not used, it requires SQLite 3.24.
+            self.connection.execute(
+                'INSERT OR IGNORE INTO runners (key, state, context, status) '
+                'VALUES (?, ?, ?, 0)', (key, state_data, context_data))
+            self.connection.execute(
+                'UPDATE runners SET state = ?, context = ? WHERE key = ?',
+                (state_data, context_data, key))
+        self.connection.execute('DELETE FROM changes WHERE key = ?', (key,))
+
+    def _write_status(self, key, runner):
+        self.connection.execute('UPDATE runners SET status = ? WHERE key = ?',
+                                (InstanceStatus.from_runner(runner).value, key))
+
+    def _append_changes(self, key, data):
+        self.connection.execute('INSERT INTO changes (key, data) VALUES (?, ?)',
+                                (key, data))
+
+    def _read(self, key):
+        row = self.connection.execute(
+            'SELECT state, context FROM runners WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            raise KeyError(key)
+        changes = [data for data, in self.connection.execute(
+            'SELECT data FROM changes WHERE key = ? ORDER BY id', (key,))]
+        return row[0], row[1], changes
@@ -0,0 +1,260 @@
+import collections
+import json
+import threading
+import time
+
+import attr
+
+from .workflow import Hooks, TaskState
+
+
+__all__ = [
+    'TraceEvent', 'Tracer', 'TraceSink', 'RingBufferSink', 'JSONLinesSink',
+    'IteratorSink', 'read_events',
+]
+
+
+def _state_name(task_state):
+    return None if task_state is None else task_state.name
+
+
+def _state(name):
+    return None if name is None else TaskState[name]
+
+
+@attr.s(frozen=True, slots=True)
+class TraceEvent:
+    """
+    Change of :class:`.TaskState` of task, see :class:`Tracer`.
+
+    :ivar task: name of task
+    :ivar old_state: state before change, ``None`` if task was enqueued
+    :ivar new_state: state after change
+    :ivar timestamp: time of change, seconds since epoch
+    :ivar duration: number of seconds task was executed, ``None`` if change was
+                    not result of execution
+    :ivar source: name of completed or canceled task that enqueued task
+    :ivar error: representation of exception raised by task or ``None``
+    """
+
+    task = attr.ib()
+    old_state = attr.ib()
+    new_state = attr.ib()
+    timestamp = attr.ib()
+    duration = attr.ib(default=None)
+    source = attr.ib(default=None)
+    error = attr.ib(default=None)
+
+    def to_dict(self):
+        """Convert event to dict that can be serialized to JSON."""
+        return {
+            'task': self.task,
+            'old_state': _state_name(self.old_state),
+            'new_state': _state_name(self.new_state),
+            'timestamp': self.timestamp,
+            'duration': self.duration,
+            'source': self.source,
+            'error': self.error,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Create event from dict created by :meth:`to_dict`."""
+        return cls(data['task'], _state(data['old_state']), _state(data['new_state']),
+                   data['timestamp'], data.get('duration'), data.get('source'),
+                   data.get('error'))
+
+
+@attr.s
+class Tracer(Hooks):
+    """
+    Hooks that emit :class:`TraceEvent` for each change of state of tasks to
+    :class:`TraceSink`. Events of executed tasks have duration of execution
+    and exception raised by task.
+
+    Tracer can be shared by runners that are not run concurrently, e.g. by
+    instances of :class:`.BatchRunner`.
+
+    :ivar sink: :class:`TraceSink`
+    """
+
+    sink = attr.ib()
+    _executed = attr.ib(factory=dict, init=False, repr=False)
+
+    def on_task_end(self, runner, task, result, error, duration):
+        # Called from thread of task, event is emitted when runner
+        # processes result.
+        self._executed[task.name] = (duration, None if error is None else repr(error))
+
+    def on_state_change(self, runner, task_name, old_state, new_state, source):
+        duration = error = None
+        if old_state == TaskState.READY:
+            duration, error = self._executed.pop(task_name, (None, None))
+        self.sink.write(TraceEvent(task_name, old_state, new_state, time.time(),
+                                   duration, source, error))
+
+
+@attr.s
+class TraceSink:
+    """
+    Base class of sinks of :class:`TraceEvent`. Subclasses must implement
+    :meth:`write`, sinks that buffer events should implement :meth:`flush`.
+    Sinks can be used as context managers, they are closed on exit.
+    """
+
+    def write(self, event):
+        """Write event to sink."""
+        raise NotImplementedError
+
+    def flush(self):
+        """Write buffered events."""
+
+    def close(self):
+        """Flush buffered events and release resources of sink."""
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+@attr.s
+class RingBufferSink(TraceSink):
+    """
+    Sink that keeps only last events in memory.
+
+    :ivar maxlen: maximal number of kept events
+    :ivar dropped: number of events that were dropped, oldest first
+    """
+
+    maxlen = attr.ib(default=1024)
+    dropped = attr.ib(default=0, init=False)
+    _events = attr.ib(init=False, repr=False)
+
+    @_events.default
+    def _events_default(self):
+        return collections.deque(maxlen=self.maxlen)
+
+    def write(self, event):
+        if len(self._events) == self.maxlen:
+            self.dropped += 1
+        self._events.append(event)
+
+    @property
+    def events(self):
+        """List of kept events, oldest first."""
+        return list(self._events)
+
+    def clear(self):
+        """Remove kept events."""
+        self._events.clear()
+
+    def __iter__(self):
+        return iter(self.events)
+
+    def __len__(self):
+        return len(self._events)
+
+
+@attr.s
+class JSONLinesSink(TraceSink):
+    """
+    Sink that appends events to file, one JSON object per line (see
+    :meth:`TraceEvent.to_dict`). Events are written in batches of
+    ``batch_size`` events, use :meth:`flush` or :meth:`close` to write rest.
+    Events can be read back by :func:`read_events`.
+
+    :ivar path: path to file, it is opened on first write
+    :ivar batch_size: number of buffered events
+    """
+
+    path = attr.ib()
+    batch_size = attr.ib(default=100)
+    _buffer = attr.ib(factory=list, init=False, repr=False)
+    _file = attr.ib(default=None, init=False, repr=False)
+
+    def write(self, event):
+        self._buffer.append(event)
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self._buffer:
+            return
+        if self._file is None:
+            self._file = open(self.path, 'a')
+        self._file.write(''.join(
+            json.dumps(event.to_dict(), sort_keys=True) + '\n'
+            for event in self._buffer))
+        self._file.flush()
+        del self._buffer[:]
+
+    def close(self):
+        self.flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def read_events(path):
+    """Iterate over events written to file by :class:`JSONLinesSink`."""
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                yield TraceEvent.from_dict(json.loads(line))
+
+
+@attr.s
+class IteratorSink(TraceSink):
+    """
+    Sink consumed by iteration, possibly in other thread than runner.
+
+    Iteration yields events as they are written and blocks until next event is
+    written or until sink is closed. :meth:`drain` returns written events
+    without blocking. If consumer does not keep up, oldest events are dropped,
+    so at most ``maxlen`` events are kept in memory.
+
+    :ivar maxlen: maximal number of events waiting for consumer
+    :ivar dropped: number of events that were dropped
+    """
+
+    maxlen = attr.ib(default=1024)
+    dropped = attr.ib(default=0, init=False)
+    closed = attr.ib(default=False, init=False)
+    _events = attr.ib(init=False, repr=False)
+    _condition = attr.ib(factory=threading.Condition, init=False, repr=False)
+
+    @_events.default
+    def _events_default(self):
+        return collections.deque(maxlen=self.maxlen)
+
+    def write(self, event):
+        with self._condition:
+            if len(self._events) == self.maxlen:
+                self.dropped += 1
+            self._events.append(event)
+            self._condition.notify()
+
+    def close(self):
+        with self._condition:
+            self.closed = True
+            self._condition.notify_all()
+
+    def drain(self):
+        """Return list of written events that were not consumed yet."""
+        with self._condition:
+            events = list(self._events)
+            self._events.clear()
+        return events
+
+    def __iter__(self):
+        while True:
+            with self._condition:
+                while not self._events and not self.closed:
+                    self._condition.wait()
+                if not self._events:
+                    return
+                event = self._events.popleft()
+            yield event
@@ -1,7 +1,18 @@
-import graphviz
+from .workflow import WorkflowError
 
 
 def render_graph(workflow, output, format='png', state=None):
+    """
+    Render workflow graph to file, tasks in ``state`` are highlighted.
+    Requires graphviz.
+
+    :raises WorkflowError: if graphviz is not installed
+    """
+    try:
+        import graphviz
+    except ImportError:
+        raise WorkflowError('graphviz is required to render workflow graph.') from None
+
     dot = graphviz.Digraph('Workflow')
 
     def task_label(task):
@@ -1,9 +1,12 @@
 import sys
+import array
+import collections
+import collections.abc
 import functools
 import itertools
 import enum
-import pickle
 import logging
+import time
 
 import attr
 
@@ -15,6 +18,19 @@ class WorkflowError(RuntimeError):
     """Generic workflow error."""
 
 
+class TasksFailed(WorkflowError):
+    """
+    Error of tasks that failed in :attr:`Runner.continue_on_error` mode, see
+    :meth:`RunReport.exception`.
+
+    :ivar errors: exceptions raised by tasks, dict with task name as key
+    """
+
+    def __init__(self, errors):
+        super().__init__('Tasks failed: ' + ', '.join(sorted(errors)))
+        self.errors = errors
+
+
 @attr.s
 class Workflow:
     """
@@ -24,6 +40,7 @@ class Workflow:
     """
 
     tasks = attr.ib(factory=dict, init=False)
+    _compiled = attr.ib(default=None, init=False, repr=False, eq=False)
 
     def load_tasks(self, module):
         """
@@ -48,6 +65,7 @@ class Workflow:
                     self.tasks[name] = obj
         if duplicates:
             raise WorkflowError('Duplicate tasks: ' + ','.join(name))
+        self._compiled = None
         # rebuild graph
         for name, task in self.tasks.items():
             for transition in task.followed_by:
@@ -95,6 +113,16 @@ class Workflow:
                 logger.error(msg)
             raise WorkflowError('Invalid graph! ' + ' '.join(problems))
 
+    def compile(self):
+        """
+        Freeze workflow graph to :class:`CompiledWorkflow` used by runners.
+        Compiled graph is cached until tasks are loaded again by
+        :meth:`load_tasks`.
+        """
+        if self._compiled is None:
+            self._compiled = CompiledWorkflow.from_workflow(self)
+        return self._compiled
+
     def create_runner(self, *args, **kwargs):
         """Create :class:`Runner` from this workflow."""
         return Runner(self, *args, **kwargs)
@@ -107,31 +135,103 @@ class Runner:
 
     :ivar workflow: :class:`Workflow`
     :ivar context: arbitrary user object, passed to all tasks
-    :ivar state: state of execution
+    :ivar incremental: use :class:`Scheduler` queues instead of processing
+                       whole state in every step
+    :ivar executor: :class:`concurrent.futures.ThreadPoolExecutor` (or other
+                    executor running tasks in this process) used to execute
+                    all ready tasks of step concurrently, tasks are executed
+                    one after another if not set; for process pool use
+                    :class:`.ProcessPoolRunner`
+    :ivar hooks: list of :class:`Hooks` notified about execution
+    :ivar result_cache: :class:`.ResultCache` with results of completed tasks
+                        marked by :func:`cached` that do not have own cache
+    :ivar cache_scope: part of cache key of :func:`cached` tasks without key
+                       function, eg. key of workflow instance, so runners
+                       sharing cache do not skip tasks of each other; set to
+                       instance key by :class:`.BatchRunner`
+    :ivar continue_on_error: exception raised by task does not stop
+                             execution, task is failed and other tasks are
+                             executed, see :meth:`run`
+    :ivar compact_state: keep state between runs as :class:`CompactState`
+                         instead of list of tuples, to save memory of many
+                         idle runners
+    :ivar state: state of execution, list of pairs of task name and
+                 :class:`TaskState`
+    :ivar wakeups: deadlines (timestamps) of waiting tasks that returned
+                   :class:`Wait`, dict with task name as key
+    :ivar events: event keys of waiting tasks that returned :class:`Wait`,
+                  dict with task name as key
+    :ivar signals: payloads of signals that woke up tasks, delivered to tasks
+                   in next execution, dict with task name as key
+    :ivar retries: number of failed attempts of tasks with :func:`retry`
+                   policy waiting to be executed again, dict with task name as
+                   key
+    :ivar errors: exceptions raised by failed tasks in
+                  :attr:`continue_on_error` mode, dict with task name as key;
+                  reprs of exceptions when runner was loaded
+    :ivar condition_cache: :class:`ConditionCache` with memoized results of
+                           transition conditions
     """
 
     workflow = attr.ib()
     context = attr.ib(default=None)
+    incremental = attr.ib(default=False, kw_only=True)
+    executor = attr.ib(default=None, kw_only=True)
+    hooks = attr.ib(factory=list, kw_only=True)
+    result_cache = attr.ib(default=None, kw_only=True)
+    cache_scope = attr.ib(default=None, kw_only=True)
+    continue_on_error = attr.ib(default=False, kw_only=True)
+    compact_state = attr.ib(default=False, kw_only=True)
     state = attr.ib(default=None, init=False)
+    wakeups = attr.ib(factory=dict, init=False)
+    events = attr.ib(factory=dict, init=False)
+    signals = attr.ib(factory=dict, init=False)
+    retries = attr.ib(factory=dict, init=False)
+    errors = attr.ib(factory=dict, init=False)
+    condition_cache = attr.ib(factory=lambda: ConditionCache(), init=False,
+                              repr=False)
+
+    @executor.validator
+    def _check_executor(self, attribute, value):
+        # Tasks are submitted with runner, which cannot be pickled.
+        if value is None:
+            return
+        import concurrent.futures
+        if isinstance(value, concurrent.futures.ProcessPoolExecutor):
+            raise WorkflowError('Process pool cannot be used as executor of '
+                                'runner, use ProcessPoolRunner.')
 
     def __attrs_post_init__(self):
-        self.state = [(task, TaskState.NEW) for task in self.workflow.start_points]
+        self._store_state(
+            [(task, TaskState.NEW) for task in self.workflow.start_points])
 
     def load(self, file_path):
         """Load runner from file. See also :meth:`dump`."""
+        import pickle
+
         with open(file_path, 'rb') as f:
             for key, value in pickle.load(f).items():
                 setattr(self, key, value)
+        self._store_state(self.state)
 
     def dump(self, file_path):
         """
-        Dump runner to file. Stored dump contains :attr:`context` and
-        :attr:`state` so runner execution can be restored and finished later.
+        Dump runner to file. Stored dump contains :attr:`context`,
+        :attr:`state`, :attr:`wakeups`, :attr:`events`, :attr:`signals`,
+        :attr:`retries` and :attr:`errors` so runner execution can be restored
+        and finished later. Errors are stored as reprs of exceptions.
         """
+        import pickle
+
         with open(file_path, 'wb') as f:
             pickle.dump({
                 'state': self.state,
                 'context': self.context,
+                'wakeups': self.wakeups,
+                'events': self.events,
+                'signals': self.signals,
+                'retries': self.retries,
+                'errors': error_reprs(self.errors),
             }, f)
 
     @property
@@ -142,6 +242,42 @@ class Runner:
         """
         return not self.state
 
+    @property
+    def next_wakeup(self):
+        """
+        Earliest deadline of waiting tasks that returned :class:`Wait`,
+        ``None`` if there is no such task.
+        """
+        return min(self.wakeups.values(), default=None)
+
+    def signal(self, key, payload=None):
+        """
+        Wake up waiting tasks with name ``key`` or waiting for event ``key``
+        (see :class:`Wait`). Woken up tasks are ready and will be executed in
+        next :meth:`run`. If payload is not ``None``, it is passed to tasks as
+        second argument after context, so tasks signaled without payload can
+        accept only context.
+
+        Returns number of woken up tasks.
+        """
+        woken = 0
+        for index, (task_name, task_state) in enumerate(self.state):
+            if task_state != TaskState.WAITING:
+                continue
+            if task_name != key and self.events.get(task_name) != key:
+                continue
+            logger.info('Task %s was woken up by signal %s', task_name, key)
+            self.wakeups.pop(task_name, None)
+            self.events.pop(task_name, None)
+            if payload is not None:
+                self.signals[task_name] = payload
+            self.state[index] = (task_name, TaskState.READY)
+            if self.hooks:
+                self._notify('on_state_change', task_name, TaskState.WAITING,
+                             TaskState.READY, None)
+            woken += 1
+        return woken
+
     def run(self):
         """
         Execute tasks from workflow.
@@ -153,12 +289,48 @@ class Runner:
         called again (with some delay or runner can be dumped to file by
         :meth:`dump` and executed later).
 
+        Waiting tasks are executed again in each run, except tasks that
+        returned :class:`Wait`. These are executed again only when their
+        deadline passed or when they are woken up by :meth:`signal`.
+
+        If :attr:`executor` is set all ready tasks of step are executed before
+        rest of step is processed and results of all of them are stored. If
+        some tasks failed, exception of first of them is raised.
+
+        Task with :func:`retry` policy that failed is not raised until it
+        runs out of attempts. It is waiting until its backoff delay passes,
+        other tasks are executed meanwhile.
+
+        If :attr:`continue_on_error` is set, exceptions are not raised. Task
+        that raised exception is failed and its branch does not continue,
+        other branches are executed. Failed tasks are executed again in next
+        run.
+
+        Returns :class:`RunReport` with errors of failed tasks.
+
         See :class:`TaskState` for list of task states.
         """
+        try:
+            if self.incremental:
+                self._run_incremental()
+            else:
+                self._run_steps()
+        finally:
+            self._store_state(self.state)
+        return RunReport(dict(self.errors))
+
+    def _store_state(self, state):
+        if self.compact_state:
+            state = CompactState.from_state(self.workflow.compile(), state)
+        self.state = state
+
+    def _run_steps(self):
         self.state = self._prepare(self.state)
         while self._is_step_possible(self.state):
             next_state, error = self._step(self.state)
+            self._notify('on_step', len(next_state))
             if error is not None:
+                self.state = next_state
                 raise error
 
             if self.state == next_state:
@@ -168,12 +340,24 @@ class Runner:
             self.state = next_state
 
     def task_execute(self, task):
-        """Execute :class:`Task`."""
-        return task(self.context)
+        """
+        Execute :class:`Task`. Task woken up by :meth:`signal` receives payload
+        of signal as second argument.
+        """
+        return task(*self._task_args(task))
 
     def transition_eval(self, transition):
-        """Evauluate :attr:`.Transition.cond`."""
-        return not transition.cond or transition.cond(self.context)
+        """
+        Evauluate :attr:`.Transition.cond`. Result is memoized in
+        :attr:`condition_cache` if transition declares its dependencies or TTL.
+        """
+        if not transition.cond:
+            return True
+        values, result = self.condition_cache.lookup(transition, self.context)
+        if result is ConditionCache.MISS:
+            result = transition.cond(self.context)
+            self.condition_cache.store(transition, values, result)
+        return result
 
     def _is_step_possible(self, state):
         step_possible = False
@@ -182,7 +366,8 @@ class Runner:
             # Canceled task can be expanded if is not join point
             if task_state == TaskState.CANCELED:
                 step_possible |= not task.is_join_point
-            if task_state not in {TaskState.WAITING, TaskState.BLOCKED}:
+            if task_state not in {TaskState.WAITING, TaskState.BLOCKED,
+                                  TaskState.FAILED}:
                 step_possible |= True
         return step_possible
 
@@ -192,132 +377,873 @@ class Runner:
                          'problem in your tasks conditions. Workflow cannot '
                          'continue, stopping.')
             return []
+        now = time.time()
         next_state = []
         for task_name, task_state in state:
-            if task_state == TaskState.WAITING:
-                logger.debug('Task %s is ready now, was waiting', task_name)
+            if task_state == TaskState.WAITING and self._is_due(task_name, now):
+                self.wakeups.pop(task_name, None)
+                self.events.pop(task_name, None)
+                if self.hooks:
+                    self._notify('on_state_change', task_name, task_state,
+                                 TaskState.READY, None)
+                task_state = TaskState.READY
+            elif task_state == TaskState.FAILED:
+                if self.hooks:
+                    self._notify('on_state_change', task_name, task_state,
+                                 TaskState.READY, None)
                 task_state = TaskState.READY
             next_state.append((task_name, task_state))
         return next_state
 
+    def _is_due(self, task_name, now):
+        if task_name in self.wakeups:
+            return self.wakeups[task_name] <= now
+        # Task waiting only for event can be woken up only by signal.
+        return task_name not in self.events
+
+    def _task_args(self, task):
+        if task.name in self.signals:
+            return self.context, self.signals[task.name]
+        return self.context,
+
+    def _run_incremental(self):
+        graph = self.workflow.compile()
+        scheduler = Scheduler(graph)
+        scheduler.extend(self._prepare(self.state))
+        error = None
+        try:
+            while error is None and (scheduler.queue or scheduler.ready):
+                # Expand all tasks first so all tasks that can be executed in
+                # this step are in ready queue.
+                while scheduler.queue or scheduler.joined:
+                    if scheduler.queue:
+                        task_id, task_state = scheduler.queue.popleft()
+                        entries = self._expand(graph.tasks[task_id], task_state)
+                    else:
+                        task_id, join_states = scheduler.joined.popleft()
+                        entries = self._join(graph.tasks[task_id], join_states)
+                    scheduler.extend(entries)
+
+                batch = scheduler.pop_ready()
+                try:
+                    if self._concurrent and batch:
+                        results = self._execute_concurrent(
+                            [graph.tasks[task_id] for task_id in batch])
+                        for task_id, (task_state, task_error) in zip(batch,
+                                                                     results):
+                            scheduler.push_id(task_id, task_state)
+                            if error is None:
+                                error = task_error
+                        batch.clear()
+                    while batch and not self._concurrent:
+                        task_id = batch[0]
+                        task_state, error = self._execute(graph.tasks[task_id])
+                        batch.popleft()
+                        scheduler.push_id(task_id, task_state)
+                        if error is not None:
+                            # Stop processing if there is error.
+                            break
+                finally:
+                    # Tasks that were not executed remain ready, also when
+                    # execution was interrupted, e.g. by KeyboardInterrupt.
+                    scheduler.ready.extend(batch)
+                self._notify('on_step', len(scheduler))
+        finally:
+            # State must be stored even if task failed.
+            self.state = scheduler.state
+        if error is not None:
+            raise error
+
+    @property
+    def _concurrent(self):
+        # All ready tasks of step are executed by _execute_concurrent.
+        return self.executor is not None
+
+    def _execute(self, task):
+        return self._task_result(task, *self._task_call(task))
+
+    def _execute_concurrent(self, tasks):
+        futures = [self.executor.submit(self._task_call, task) for task in tasks]
+        # Results are collected in order of tasks, not in order of completion,
+        # so next state does not depend on timing of tasks.
+        return [self._task_result(task, *future.result())
+                for task, future in zip(tasks, futures)]
+
+    def _task_call(self, task):
+        logger.info('Executing task %s', task.name)
+        self._notify('on_task_start', task)
+        start = time.perf_counter()
+        try:
+            cache, cache_key = self._task_cache(task)
+            if cache is not None and cache.get(cache_key):
+                logger.info('Task %s was already completed, skipping', task.name)
+                result = True
+            else:
+                result = self.task_execute(task)
+                self._task_cache_store(cache, cache_key, result)
+            error = None
+        except Exception as e:
+            logger.exception(e)
+            # To not break runner state, exception must be returned and
+            # raised later.
+            result, error = False, e
+        self._notify('on_task_end', task, result, error, time.perf_counter() - start)
+        return result, error
+
+    def _task_cache(self, task):
+        # Key is evaluated before task is executed, task can modify context.
+        if not task.cached:
+            return None, None
+        cache = task.cache if task.cache is not None else self.result_cache
+        if cache is None:
+            return None, None
+        if task.cache_key is None:
+            if self.cache_scope is None:
+                return cache, (task.name,)
+            return cache, (task.name, self.cache_scope)
+        return cache, (task.name, task.cache_key(self.context))
+
+    def _task_cache_store(self, cache, cache_key, result):
+        # Only completed tasks are stored, waiting tasks must be executed
+        # again.
+        if cache is not None and result and not isinstance(result, Wait):
+            cache.set(cache_key, True)
+
+    def _notify(self, event, *args):
+        for hook in self.hooks:
+            getattr(hook, event)(self, *args)
+
+    def _task_result(self, task, result, error):
+        task_state, error = self._result_state(task, result, error)
+        # Changes of states are on hot path, arguments of notification are
+        # not built if there are no hooks.
+        if self.hooks:
+            self._notify('on_state_change', task.name, TaskState.READY,
+                         task_state, None)
+        return task_state, error
+
+    def _result_state(self, task, result, error):
+        self.wakeups.pop(task.name, None)
+        self.events.pop(task.name, None)
+        if error is not None:
+            attempt = self.retries.get(task.name, 0) + 1
+            if task.retry is not None and task.retry.should_retry(error, attempt):
+                delay = task.retry.delay(attempt)
+                logger.warning('Task %s failed (attempt %d of %d), retrying '
+                               'in %.3g seconds', task.name, attempt,
+                               task.retry.attempts, delay)
+                self.retries[task.name] = attempt
+                self.wakeups[task.name] = time.time() + delay
+                return TaskState.WAITING, None
+            self.retries.pop(task.name, None)
+            logger.error('Task %s failed', task.name)
+            # Signal payload is kept, so it can be delivered again.
+            if self.continue_on_error:
+                self.errors[task.name] = error
+                return TaskState.FAILED, None
+            return TaskState.READY, error
+        self.retries.pop(task.name, None)
+        self.errors.pop(task.name, None)
+        self.signals.pop(task.name, None)
+        if isinstance(result, Wait):
+            logger.info('Task %s is waiting for %s', task.name, result)
+            if result.after is not None:
+                self.wakeups[task.name] = time.time() + result.after
+            if result.event is not None:
+                self.events[task.name] = result.event
+            return TaskState.WAITING, None
+        if not isinstance(result, bool):
+            logger.warning(
+                'Task %s returned %r but should have return True or '
+                'False whether task has been completed or not. Result '
+                'will be converted to bool implicitly.',
+                task.name, result,
+            )
+        if result:
+            logger.info('Task %s is complete', task.name)
+            return TaskState.COMPLETE, None
+        logger.info('Task %s is waiting', task.name)
+        return TaskState.WAITING, None
+
+    def _expand(self, task, task_state):
+        next_state = []
+
+        if task_state == TaskState.NEW:
+            # Join points must be merged, can't process them in this loop.
+            new_state = TaskState.BLOCKED if task.is_join_point else TaskState.READY
+            if self.hooks:
+                self._notify('on_state_change', task.name, task_state, new_state, None)
+            next_state.append((task.name, new_state))
+
+        elif task_state == TaskState.COMPLETE:
+            transitions = []
+            for transition in task.followed_by:
+                start = time.perf_counter()
+                cond_result = self.transition_eval(transition)
+                self._notify('on_transition', task, transition, cond_result,
+                             time.perf_counter() - start)
+                transitions.append((transition, cond_result))
+            next_state.extend(self._complete(task, transitions))
+
+        elif task_state == TaskState.CANCELED:
+            if task.is_join_point:
+                next_state.append((task.name, TaskState.CANCELED))
+            else:
+                logger.info('Task %s execution was canceled by condition',
+                            task.name)
+                next_state.extend(self._cancel(task))
+
+        else:
+            next_state.append((task.name, task_state))
+
+        return next_state
+
+    def _complete(self, task, transitions):
+        if task.is_end_point:
+            logger.info('Reached end point %s', task.name)
+        else:
+            logger.debug('Expanding task %s', task.name)
+        back_edges = self.workflow.compile().back_edges
+        next_state = []
+        for transition, cond_result in transitions:
+            new_state = TaskState.NEW
+            if not cond_result:
+                if (task.name, transition.dest) in back_edges:
+                    # Loop is not repeated, nothing to cancel.
+                    continue
+                new_state = TaskState.CANCELED
+            if self.hooks:
+                self._notify('on_state_change', transition.dest, None, new_state,
+                             task.name)
+            next_state.append((transition.dest, new_state))
+        return next_state
+
+    def _cancel(self, task):
+        # Canceled branch must not be propagated back to beginning of loop,
+        # it would be canceled again and again.
+        back_edges = self.workflow.compile().back_edges
+        next_state = []
+        for transition in task.followed_by:
+            if (task.name, transition.dest) in back_edges:
+                continue
+            if self.hooks:
+                self._notify('on_state_change', transition.dest, None,
+                             TaskState.CANCELED, task.name)
+            next_state.append((transition.dest, TaskState.CANCELED))
+        return next_state
+
+    def _join(self, join_task, join_states):
+        logger.debug('Joining tasks %s to task %s',
+                     ', '.join(join_task.preceded_by), join_task.name)
+        self._notify('on_join', join_task, join_states)
+        if all(s == TaskState.CANCELED for s in join_states):
+            logger.debug('Expanding canceled task %s', join_task.name)
+            return self._cancel(join_task)
+        if self.hooks:
+            self._notify('on_state_change', join_task.name, TaskState.BLOCKED,
+                         TaskState.READY, None)
+        return [(join_task.name, TaskState.READY)]
+
     def _step(self, state):
+        tasks = self.workflow.tasks
+        results = {}
+        if self._concurrent:
+            ready = [index for index, (_, task_state) in enumerate(state)
+                     if task_state == TaskState.READY]
+            results = dict(zip(ready, self._execute_concurrent(
+                [tasks[state[index][0]] for index in ready])))
+
         task_error = None
         next_state = []
-        for task_name, task_state in state:
-            task = self.workflow.tasks[task_name]
+        for index, (task_name, task_state) in enumerate(state):
+            if index in results:
+                # Task was already executed by executor, its result must be
+                # stored even if some other task failed.
+                task_state, error = results[index]
+                next_state.append((task_name, task_state))
+                if task_error is None:
+                    task_error = error
+                continue
 
             # Stop processing if there is error.
             if task_error is not None:
                 next_state.append((task_name, task_state))
                 continue
 
-            if task_state == TaskState.NEW:
-                if task.is_join_point:
-                    # Join points must be merged, can't process them in this loop.
-                    next_state.append((task_name, TaskState.BLOCKED))
-                else:
-                    logger.debug('Task %s is ready now, was new', task_name)
-                    next_state.append((task_name, TaskState.READY))
-
-            elif task_state == TaskState.READY:
-                logger.info('Executing task %s', task_name)
-                try:
-                    result = self.task_execute(task)
-                except Exception as e:
-                    logger.exception(e)
-                    # To not break runner state, exception must be stored and
-                    # raised later.
-                    task_error = e
-                    result = False
-                if not isinstance(result, bool):
-                    logger.warning(
-                        'Task %s returned %r but should have return True or '
-                        'False whether task has been completed or not. Result '
-                        'will be converted to bool implicitly.',
-                        task_name, result,
-                    )
-                if task_error:
-                    logger.error('Task %s failed', task_name)
-                    next_state.append((task_name, TaskState.READY))
-                elif result:
-                    logger.info('Task %s is complete', task_name)
-                    next_state.append((task_name, TaskState.COMPLETE))
-                else:
-                    logger.info('Task %s is waiting', task_name)
-                    next_state.append((task_name, TaskState.WAITING))
-
-            elif task_state == TaskState.COMPLETE:
-                if task.is_end_point:
-                    logger.info('Reached end point %s', task_name)
-                else:
-                    logger.debug('Expanding task %s', task_name)
-                for transition in task.followed_by:
-                    new_state = TaskState.NEW
-                    if not self.transition_eval(transition):
-                        new_state = TaskState.CANCELED
-                    logger.debug('Enqueue new task %s, from %s',
-                                 transition.dest, task_name)
-                    next_state.append((transition.dest, new_state))
-
-            elif task_state == TaskState.CANCELED:
-                if task.is_join_point:
-                    next_state.append((task_name, TaskState.CANCELED))
-                else:
-                    logger.info('Task %s execution was canceled by condition',
-                                task_name)
-                    for transition in task.followed_by:
-                        logger.debug('Enqueue new task %s, from %s',
-                                     transition.dest, task_name)
-                        next_state.append((transition.dest, TaskState.CANCELED))
-
-            else:
+            if task_state == TaskState.READY:
+                task_state, task_error = self._execute(tasks[task_name])
                 next_state.append((task_name, task_state))
+            else:
+                next_state.extend(self._expand(tasks[task_name], task_state))
 
         # Can't raise error there, next_state must be stored in run().
         return self._joining_step(next_state), task_error
 
     def _joining_step(self, state):
+        # Arrivals to join points are counted in single pass over state,
+        # grouped by join point id. Ids are positions in sorted names, so join
+        # points are resolved in order of their names.
+        graph = self.workflow.compile()
         next_state = []
-        join_points = []
+        joins = {}
 
         for task_name, task_state in state:
-            task = self.workflow.tasks[task_name]
-            if task.is_join_point and task_state in {TaskState.BLOCKED,
-                                                     TaskState.CANCELED}:
-                join_points.append((task_name, task_state))
+            task_id = graph.index[task_name]
+            if (task_state in {TaskState.BLOCKED, TaskState.CANCELED}
+                    and graph.is_join_point(task_id)):
+                join_states = joins.get(task_id)
+                if join_states is None:
+                    joins[task_id] = [task_state]
+                else:
+                    join_states.append(task_state)
             else:
                 next_state.append((task_name, task_state))
 
-        grouped = itertools.groupby(sorted(join_points, key=lambda i: i[0]),
-                                    key=lambda i: i[0])
-        for join_name, join_list in grouped:
-            join_list = list(join_list)
-            join_task = self.workflow.tasks[join_name]
-
-            if len(join_task.preceded_by) == len(join_list):
-                logger.debug('Joining tasks %s to task %s',
-                             ', '.join(join_task.preceded_by), join_name)
-                if all(s == TaskState.CANCELED for _, s in join_list):
-                    logger.debug('Expanding canceled task %s', join_name)
-                    for transition in join_task.followed_by:
-                        logger.debug('Enqueue new task %s, from %s',
-                                     transition.dest, join_name)
-                        next_state.append((transition.dest, TaskState.CANCELED))
-                else:
-                    next_state.append((join_name, TaskState.READY))
+        for join_id in sorted(joins):
+            join_states = joins[join_id]
+            join_task = graph.tasks[join_id]
+
+            if len(join_states) == graph.preceded_count[join_id]:
+                next_state.extend(self._join(join_task, join_states))
 
             else:
-                blocked_by = set(join_task.preceded_by) - set(n for n, _ in join_list)
-                logger.debug('Join task %s cannot be unblocked, waiting for %s '
-                             'to finish', join_name, ', '.join(blocked_by))
-                for _, join_state in join_list:
-                    logger.debug('Adding task %s back to queue as %s',
-                                 join_name, join_state.name.lower())
-                    next_state.append((join_name, join_state))
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug('Join task %s cannot be unblocked, waiting '
+                                 'for %d of %d preceding tasks to finish',
+                                 join_task.name,
+                                 graph.preceded_count[join_id] - len(join_states),
+                                 graph.preceded_count[join_id])
+                next_state.extend((join_task.name, join_state)
+                                  for join_state in join_states)
 
         return next_state
 
 
+@attr.s
+class AsyncRunner(Runner):
+    """
+    Workflow execution engine for :mod:`asyncio`.
+
+    Tasks and transition conditions can be coroutine functions, they are
+    awaited by runner. All ready tasks are executed concurrently and waiting
+    workflows do not block event loop, so many runners can share single event
+    loop. Tasks are queued by :class:`Scheduler` same as in incremental mode
+    of :class:`Runner`.
+
+    If :attr:`executor` is set, tasks that are not coroutine functions are
+    executed in it instead of event loop.
+    """
+
+    async def run(self):
+        """Execute tasks from workflow. See :meth:`Runner.run`."""
+        # Imported on use, asyncio is slow to import and it is not needed by
+        # other runners.
+        import asyncio
+
+        graph = self.workflow.compile()
+        scheduler = Scheduler(graph)
+        scheduler.extend(self._prepare(self.state))
+        error = None
+        try:
+            while error is None and (scheduler.queue or scheduler.ready):
+                while scheduler.queue or scheduler.joined:
+                    if scheduler.queue:
+                        task_id, task_state = scheduler.queue.popleft()
+                        entries = await self._expand_async(graph.tasks[task_id],
+                                                           task_state)
+                    else:
+                        task_id, join_states = scheduler.joined.popleft()
+                        entries = self._join(graph.tasks[task_id], join_states)
+                    scheduler.extend(entries)
+
+                batch = scheduler.pop_ready()
+                try:
+                    results = await asyncio.gather(
+                        *[self._task_call(graph.tasks[task_id])
+                          for task_id in batch])
+                except BaseException:
+                    # Results of tasks are lost when run is canceled, all
+                    # tasks remain ready.
+                    scheduler.ready.extend(batch)
+                    raise
+                for task_id, result in zip(batch, results):
+                    task_state, task_error = self._task_result(graph.tasks[task_id],
+                                                               *result)
+                    scheduler.push_id(task_id, task_state)
+                    if error is None:
+                        error = task_error
+                self._notify('on_step', len(scheduler))
+        finally:
+            self._store_state(scheduler.state)
+        if error is not None:
+            raise error
+        return RunReport(dict(self.errors))
+
+    async def task_execute(self, task):
+        """Execute :class:`Task`, await it if it is coroutine function."""
+        import asyncio
+
+        args = self._task_args(task)
+        func = task.func
+        if isinstance(func, LazyFunction):
+            func = func.resolve()
+        if asyncio.iscoroutinefunction(func):
+            return await task(*args)
+        if self.executor is not None:
+            loop = asyncio.get_event_loop()
+            return await loop.run_in_executor(self.executor, task, *args)
+        return task(*args)
+
+    async def transition_eval(self, transition):
+        """
+        Evauluate :attr:`.Transition.cond`, await it if it is awaitable. See
+        :meth:`Runner.transition_eval`.
+        """
+        if not transition.cond:
+            return True
+        import inspect
+
+        values, result = self.condition_cache.lookup(transition, self.context)
+        if result is ConditionCache.MISS:
+            result = transition.cond(self.context)
+            if inspect.isawaitable(result):
+                result = await result
+            self.condition_cache.store(transition, values, result)
+        return result
+
+    async def _task_call(self, task):
+        logger.info('Executing task %s', task.name)
+        self._notify('on_task_start', task)
+        start = time.perf_counter()
+        try:
+            cache, cache_key = self._task_cache(task)
+            if cache is not None and cache.get(cache_key):
+                logger.info('Task %s was already completed, skipping', task.name)
+                result = True
+            else:
+                result = await self.task_execute(task)
+                self._task_cache_store(cache, cache_key, result)
+            error = None
+        except Exception as e:
+            logger.exception(e)
+            result, error = False, e
+        self._notify('on_task_end', task, result, error, time.perf_counter() - start)
+        return result, error
+
+    async def _expand_async(self, task, task_state):
+        if task_state != TaskState.COMPLETE:
+            return self._expand(task, task_state)
+        transitions = []
+        for transition in task.followed_by:
+            start = time.perf_counter()
+            cond_result = await self.transition_eval(transition)
+            self._notify('on_transition', task, transition, cond_result,
+                         time.perf_counter() - start)
+            transitions.append((transition, cond_result))
+        return self._complete(task, transitions)
+
+
+class Hooks:
+    """
+    Base class of observers of :class:`Runner` execution, see
+    :attr:`Runner.hooks`. Methods do nothing by default and subclasses can
+    override only some of them. All methods receive runner as first argument.
+
+    Task hooks are called from thread that executes task, which is not main
+    thread if :attr:`Runner.executor` is used.
+    """
+
+    def on_task_start(self, runner, task):
+        """Called before :class:`Task` is executed."""
+
+    def on_task_end(self, runner, task, result, error, duration):
+        """
+        Called after :class:`Task` was executed with its result, exception
+        raised by task (or ``None``) and duration in seconds.
+        """
+
+    def on_task_cpu(self, runner, task, cpu_time):
+        """
+        Called before :meth:`on_task_end` of task executed in other process by
+        :class:`.ProcessPoolRunner` with CPU time of task in seconds measured
+        in worker process, ``None`` if task failed.
+        """
+
+    def on_transition(self, runner, task, transition, result, duration):
+        """
+        Called after condition of :class:`Transition` from task was evaluated
+        with result of condition and duration of evaluation in seconds.
+        """
+
+    def on_join(self, runner, join_task, join_states):
+        """Called when all preceding tasks of join point arrived."""
+
+    def on_step(self, runner, state_size):
+        """Called after each step with number of tasks in state."""
+
+    def on_state_change(self, runner, task_name, old_state, new_state, source):
+        """
+        Called when task changes :class:`TaskState`. Task enqueued by
+        completed or canceled task ``source`` has ``old_state`` ``None``.
+        Task that was completed or canceled and expanded to following tasks
+        leaves state without notification.
+        """
+
+
+def error_reprs(errors):
+    """
+    Convert exceptions of failed tasks to strings that can be stored, see
+    :attr:`Runner.errors`. Errors that are already strings are kept.
+    """
+    return {name: error if isinstance(error, str) else repr(error)
+            for name, error in errors.items()}
+
+
+@attr.s
+class RunReport:
+    """
+    Report of :meth:`Runner.run`.
+
+    :ivar errors: exceptions raised by tasks that are failed, dict with task
+                  name as key
+    """
+
+    errors = attr.ib(factory=dict)
+
+    @property
+    def ok(self):
+        """No task is failed."""
+        return not self.errors
+
+    def exception(self):
+        """
+        Return :class:`TasksFailed` with all errors or ``None`` if no task is
+        failed.
+        """
+        if self.errors:
+            return TasksFailed(self.errors)
+        return None
+
+
+@attr.s
+class Scheduler:
+    """
+    Queues of tasks used by :class:`Runner` in incremental mode.
+
+    Tasks are sorted to queues by their state when they are pushed to scheduler
+    and arrivals to join points are counted, so runner processes only tasks
+    that can change their state instead of whole state in every step. Tasks
+    are stored by their ids in :class:`CompiledWorkflow`.
+
+    :ivar graph: :class:`CompiledWorkflow`
+    :ivar queue: new, complete and canceled tasks that should be expanded
+    :ivar ready: ids of tasks ready for execution
+    :ivar waiting: ids of tasks waiting for external event
+    :ivar failed: ids of failed tasks
+    :ivar joins: arrivals to join points, dict with join point id as key and
+                 list of arrival states (blocked or canceled) as value
+    :ivar joined: join points with all preceding tasks arrived, pairs of join
+                  point id and list of arrival states
+    """
+
+    graph = attr.ib()
+    queue = attr.ib(factory=collections.deque, init=False)
+    ready = attr.ib(factory=collections.deque, init=False)
+    waiting = attr.ib(factory=list, init=False)
+    failed = attr.ib(factory=list, init=False)
+    joins = attr.ib(factory=dict, init=False)
+    joined = attr.ib(factory=collections.deque, init=False)
+
+    @property
+    def state(self):
+        """State of execution in format used by :attr:`Runner.state`."""
+        names = self.graph.names
+        state = [(names[task_id], TaskState.READY) for task_id in self.ready]
+        state.extend((names[task_id], task_state)
+                     for task_id, task_state in self.queue)
+        state.extend((names[task_id], TaskState.WAITING)
+                     for task_id in self.waiting)
+        state.extend((names[task_id], TaskState.FAILED)
+                     for task_id in self.failed)
+        for join_id, join_states in itertools.chain(self.joins.items(),
+                                                    self.joined):
+            state.extend((names[join_id], join_state)
+                         for join_state in join_states)
+        return state
+
+    def __len__(self):
+        """Number of tasks in state, see :attr:`state`."""
+        return (len(self.ready) + len(self.queue) + len(self.waiting)
+                + len(self.failed)
+                + sum(len(join_states) for join_states in self.joins.values())
+                + sum(len(join_states) for _, join_states in self.joined))
+
+    def push(self, task_name, task_state):
+        """Add task in state to corresponding queue."""
+        self.push_id(self.graph.index[task_name], task_state)
+
+    def push_id(self, task_id, task_state):
+        """Add task in state to corresponding queue, task is set by its id."""
+        if task_state == TaskState.READY:
+            self.ready.append(task_id)
+        elif task_state == TaskState.WAITING:
+            self.waiting.append(task_id)
+        elif task_state == TaskState.FAILED:
+            self.failed.append(task_id)
+        elif (task_state in {TaskState.BLOCKED, TaskState.CANCELED}
+              and self.graph.is_join_point(task_id)):
+            join_states = self.joins.setdefault(task_id, [])
+            join_states.append(task_state)
+            if len(join_states) == self.graph.preceded_count[task_id]:
+                del self.joins[task_id]
+                self.joined.append((task_id, join_states))
+        else:
+            self.queue.append((task_id, task_state))
+
+    def extend(self, state):
+        """Add all tasks from state, see :meth:`push`."""
+        for task_name, task_state in state:
+            self.push(task_name, task_state)
+
+    def pop_ready(self):
+        """Remove all ready tasks from scheduler and return them."""
+        ready, self.ready = self.ready, collections.deque()
+        return ready
+
+
+@attr.s
+class ConditionCache:
+    """
+    Memoized results of transition conditions of :class:`Runner`.
+
+    Only conditions of transitions with :attr:`Transition.depends` or
+    :attr:`Transition.ttl` are memoized. Result is reused until values of
+    context keys it depends on change (compared by equality, so values must be
+    replaced, not modified in place) or until it expires.
+
+    :ivar entries: memoized results, dict with :class:`Transition` as key and
+                   tuple of dependency values, result and expiration time as
+                   value
+    :ivar hits: number of conditions evaluations served from cache
+    :ivar misses: number of memoized conditions that were evaluated
+    """
+
+    MISS = object()
+
+    entries = attr.ib(factory=dict, init=False)
+    hits = attr.ib(default=0, init=False)
+    misses = attr.ib(default=0, init=False)
+
+    def lookup(self, transition, context):
+        """
+        Return pair of current dependency values and memoized result, or
+        :attr:`MISS` if result is not memoized.
+        """
+        if transition.depends is None and transition.ttl is None:
+            return None, self.MISS
+        values = tuple(self._value(context, key)
+                       for key in transition.depends or ())
+        entry = self.entries.get(transition)
+        if (entry is not None and entry[0] == values
+                and (entry[2] is None or entry[2] > time.monotonic())):
+            self.hits += 1
+            return values, entry[1]
+        self.misses += 1
+        return values, self.MISS
+
+    def store(self, transition, values, result):
+        """Memoize result of condition evaluated with dependency values."""
+        if transition.depends is None and transition.ttl is None:
+            return
+        expires = None
+        if transition.ttl is not None:
+            expires = time.monotonic() + transition.ttl
+        self.entries[transition] = (values, result, expires)
+
+    def clear(self):
+        """Forget all memoized results."""
+        self.entries.clear()
+
+    @staticmethod
+    def _value(context, key):
+        if isinstance(context, collections.abc.Mapping):
+            return context.get(key)
+        return getattr(context, key, None)
+
+
+class CompactState(collections.abc.MutableSequence):
+    """
+    Memory compact container of :attr:`Runner.state`, used when
+    :attr:`Runner.compact_state` is set.
+
+    Each task is stored in :class:`array.array` as single integer, its id in
+    :class:`CompiledWorkflow` and state value (4 bytes instead of tuple and
+    list item). Container is list-compatible view, items are pairs of task name
+    and :class:`TaskState` so it can be used by custom runners same as list.
+    When pickled, it is stored as list.
+    """
+
+    __slots__ = ('graph', 'entries')
+
+    def __init__(self, graph, state=()):
+        self.graph = graph
+        self.entries = array.array('I', map(self._pack, state))
+
+    @classmethod
+    def from_state(cls, graph, state):
+        """Create container from state, returns ``state`` if already compact."""
+        if isinstance(state, cls) and state.graph is graph:
+            return state
+        return cls(graph, state)
+
+    def _pack(self, item):
+        task_name, task_state = item
+        return self.graph.index[task_name] << 3 | TaskState(task_state).value
+
+    def _unpack(self, entry):
+        return self.graph.names[entry >> 3], TaskState(entry & 7)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._unpack(entry) for entry in self.entries[index]]
+        return self._unpack(self.entries[index])
+
+    def __setitem__(self, index, item):
+        if isinstance(index, slice):
+            self.entries[index] = array.array('I', map(self._pack, item))
+        else:
+            self.entries[index] = self._pack(item)
+
+    def __delitem__(self, index):
+        del self.entries[index]
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __iter__(self):
+        return map(self._unpack, self.entries)
+
+    def insert(self, index, item):
+        self.entries.insert(index, self._pack(item))
+
+    def __eq__(self, other):
+        if isinstance(other, CompactState):
+            return self.graph is other.graph and self.entries == other.entries
+        if isinstance(other, collections.abc.Sequence):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self):
+        return '%s(%r)' % (type(self).__name__, list(self))
+
+    def __reduce__(self):
+        return list, (list(self),)
+
+
+@attr.s(slots=True, frozen=True)
+class CompiledWorkflow:
+    """
+    Workflow graph frozen to integer indexed arrays, see
+    :meth:`Workflow.compile`.
+
+    Task id is position of task name in sorted list of names, so ids are same
+    for same workflow in all processes. Start, join and end points are stored
+    as bitmap of :attr:`START_POINT`, :attr:`JOIN_POINT` and :attr:`END_POINT`
+    flags for each task.
+
+    :ivar names: tuple of task names
+    :ivar index: task ids, dict with task name as key
+    :ivar tasks: tuple of :class:`Task`
+    :ivar successors: tuple of tuples of ids of following tasks
+    :ivar transitions: tuple of tuples of :class:`Transition`, same order as
+                       :attr:`successors`
+    :ivar preceded_count: array of number of preceding tasks
+    :ivar flags: bytes with bitmap of flags for each task
+    :ivar back_edges: transitions that close loops in graph (found by depth
+                      first search from start points), set of pairs of task
+                      name and following task name
+    """
+
+    START_POINT = 1
+    JOIN_POINT = 2
+    END_POINT = 4
+
+    names = attr.ib()
+    index = attr.ib()
+    tasks = attr.ib()
+    successors = attr.ib()
+    transitions = attr.ib()
+    preceded_count = attr.ib()
+    flags = attr.ib()
+    back_edges = attr.ib()
+
+    @classmethod
+    def from_workflow(cls, workflow):
+        """Create compiled graph from :class:`Workflow`."""
+        names = tuple(sorted(workflow.tasks))
+        index = {name: task_id for task_id, name in enumerate(names)}
+        tasks = tuple(workflow.tasks[name] for name in names)
+        transitions = tuple(tuple(t for t in task.followed_by if t.dest in index)
+                            for task in tasks)
+        successors = tuple(tuple(index[t.dest] for t in task_transitions)
+                           for task_transitions in transitions)
+        return cls(
+            names=names,
+            index=index,
+            tasks=tasks,
+            successors=successors,
+            transitions=transitions,
+            preceded_count=array.array('I', (len(task.preceded_by)
+                                             for task in tasks)),
+            flags=bytes(task.is_start_point * cls.START_POINT
+                        | task.is_join_point * cls.JOIN_POINT
+                        | task.is_end_point * cls.END_POINT
+                        for task in tasks),
+            back_edges=frozenset(
+                (names[task_id], names[dest_id])
+                for task_id, dest_id in cls._find_back_edges(tasks, successors)
+            ),
+        )
+
+    @staticmethod
+    def _find_back_edges(tasks, successors):
+        # Iterative depth first search, edge to task that is on stack is back
+        # edge. Successors are visited in order of ids, order of transitions
+        # depends on hash randomization and it would choose different back
+        # edges of loops with multiple entries in each process.
+        visited = bytearray(len(tasks))
+        on_stack = bytearray(len(tasks))
+        for start_id, task in enumerate(tasks):
+            if not task.is_start_point or visited[start_id]:
+                continue
+            visited[start_id] = on_stack[start_id] = 1
+            stack = [(start_id, iter(sorted(successors[start_id])))]
+            while stack:
+                task_id, dest_ids = stack[-1]
+                for dest_id in dest_ids:
+                    if on_stack[dest_id]:
+                        yield task_id, dest_id
+                    elif not visited[dest_id]:
+                        visited[dest_id] = on_stack[dest_id] = 1
+                        stack.append((dest_id, iter(sorted(successors[dest_id]))))
+                        break
+                else:
+                    on_stack[task_id] = 0
+                    stack.pop()
+
+    def is_start_point(self, task_id):
+        """Check if task is start point."""
+        return bool(self.flags[task_id] & self.START_POINT)
+
+    def is_join_point(self, task_id):
+        """Check if task is join point."""
+        return bool(self.flags[task_id] & self.JOIN_POINT)
+
+    def is_end_point(self, task_id):
+        """Check if task is end point."""
+        return bool(self.flags[task_id] & self.END_POINT)
+
+
 @enum.unique
 class TaskState(enum.Enum):
     """
@@ -329,6 +1255,8 @@ class TaskState(enum.Enum):
     :cvar READY: task is ready for execution
     :cvar COMPLETE: task was executed and will be expanded
     :cvar CANCELED: task was not executed because transition condition was not met
+    :cvar FAILED: task raised exception in :attr:`Runner.continue_on_error`
+                  mode, it will be executed again in next run
 
     .. graphviz:: task-state.gv
     """
@@ -339,6 +1267,63 @@ class TaskState(enum.Enum):
     READY = 3
     COMPLETE = 4
     CANCELED = 5
+    FAILED = 7
+
+
+@attr.s(frozen=True)
+class Wait:
+    """
+    Result of waiting task. Unlike task that returned ``False``, task is not
+    executed in each run of :class:`Runner`, but only when its deadline passed
+    or when it is woken up by :meth:`Runner.signal` with event key.
+
+    :ivar after: number of seconds after which task should be executed again,
+                 if not set task waits only for event
+    :ivar event: key of event the task is waiting for
+    """
+
+    after = attr.ib(default=None)
+    event = attr.ib(default=None)
+
+
+@attr.s(frozen=True)
+class RetryPolicy:
+    """
+    Policy of retrying of failed task, see :func:`retry`.
+
+    Delay before attempt ``n + 1`` is ``backoff * factor ** (n - 1)`` seconds,
+    at most ``max_backoff``.
+
+    :ivar attempts: maximal number of executions of task
+    :ivar backoff: delay in seconds after first failure
+    :ivar factor: multiplier of delay after each next failure
+    :ivar max_backoff: maximal delay in seconds, not limited if ``None``
+    :ivar exceptions: types of exceptions that are retried
+    """
+
+    attempts = attr.ib(default=3)
+    backoff = attr.ib(default=1.0)
+    factor = attr.ib(default=2.0)
+    max_backoff = attr.ib(default=None)
+    exceptions = attr.ib(default=(Exception,), converter=tuple)
+
+    def should_retry(self, error, attempt):
+        """Check if task should be executed again after failed attempt."""
+        return attempt < self.attempts and isinstance(error, self.exceptions)
+
+    def delay(self, attempt):
+        """Delay in seconds after failed attempt."""
+        delay = self.backoff * self.factor ** (attempt - 1)
+        if self.max_backoff is not None:
+            delay = min(delay, self.max_backoff)
+        return delay
+
+
+def _depends(value):
+    # Single key must not be split to characters by tuple().
+    if isinstance(value, str):
+        return (value,)
+    return tuple(value)
 
 
 @attr.s(hash=True)
@@ -350,11 +1335,18 @@ class Transition:
     :ivar cond: condition whether following task should be executed, function
                 that will receive context from :class:`Runner` and must return bool
                 (allows to create conditional branching and looping in graph)
+    :ivar depends: context keys (or attributes) the condition depends on,
+                   result is memoized by runner until their values change,
+                   single key can be passed as string
+    :ivar ttl: number of seconds result of condition is memoized by runner
 
     """
 
     dest = attr.ib()
     cond = attr.ib(default=None)
+    depends = attr.ib(default=None, kw_only=True,
+                      converter=attr.converters.optional(_depends))
+    ttl = attr.ib(default=None, kw_only=True)
 
     def __attrs_post_init__(self):
         if isinstance(self.dest, Task):
@@ -364,6 +1356,61 @@ class Transition:
                             'of Task or string.' % type(self.dest))
 
 
+@attr.s(hash=True)
+class LazyFunction:
+    """
+    Function referenced by import path ``package.module:name``, see
+    :func:`.loader.resolve`. Function is imported when it is called for the
+    first time, so task with lazy function and its dependencies are not
+    imported until task is executed. Module and qualified name of function are
+    available without import.
+
+    :ivar reference: import path of function
+    :ivar load_time: number of seconds import of function took, ``None`` if it
+                     was not imported yet
+    :ivar modules: names of modules imported by import of function
+    :raises WorkflowError: if reference is not valid import path
+    """
+
+    reference = attr.ib()
+    load_time = attr.ib(default=None, init=False, eq=False)
+    modules = attr.ib(default=(), init=False, eq=False, repr=False)
+    _func = attr.ib(default=None, init=False, eq=False, repr=False)
+
+    def __attrs_post_init__(self):
+        module_name, sep, qualname = self.reference.partition(':')
+        if not sep or not module_name or not qualname:
+            raise WorkflowError('Invalid reference %s, must be module:name.'
+                                % self.reference)
+        self.__module__ = module_name
+        self.__qualname__ = qualname
+        self.__name__ = qualname.rpartition('.')[2]
+
+    @property
+    def loaded(self):
+        """Function was already imported."""
+        return self._func is not None
+
+    def resolve(self):
+        """Import function if it was not imported yet and return it."""
+        if self._func is None:
+            from .loader import resolve
+            before = set(sys.modules)
+            start = time.perf_counter()
+            func = resolve(self.reference)
+            self.load_time = time.perf_counter() - start
+            self.modules = tuple(sorted(set(sys.modules) - before))
+            logger.debug('Imported %s in %.3g seconds', self.reference, self.load_time)
+            # Decorated function is replaced by task in its module.
+            if isinstance(func, Task):
+                func = func.func
+            self._func = func
+        return self._func
+
+    def __call__(self, *args, **kwargs):
+        return self.resolve()(*args, **kwargs)
+
+
 @attr.s(hash=True)
 class Task:
     """
@@ -375,9 +1422,10 @@ class Task:
 
     If wrapped function returned ``False`` execution will stop and task will be
     executed again in next run. This way can be implemented waiting, eg. for
-    external event.
+    external event. Function can also return :class:`Wait` to be executed
+    again only after some time.
 
-    :ivar function: wrapped function
+    :ivar function: wrapped function or :class:`LazyFunction`
     :ivar name: task name (by default function name)
     :ivar labels: task labels
     :ivar followed_by: connection to next tasks (set of :class:`Transition`)
@@ -385,6 +1433,11 @@ class Task:
     :ivar is_start_point: task is start point of workflow
     :ivar is_join_point: task is join point of multiple tasks
     :ivar is_end_point: task is end point of workflow
+    :ivar cached: completion of task is stored in cache, see :func:`cached`
+    :ivar cache_key: function that receives context and returns key of task
+                     completion in cache
+    :ivar cache: :class:`.ResultCache` used instead of cache of runner
+    :ivar retry: :class:`RetryPolicy` of task or ``None``
     """
 
     func = attr.ib()
@@ -398,8 +1451,15 @@ class Task:
     is_join_point = attr.ib(default=False, init=False)
     is_end_point = attr.ib(default=False, init=False)
 
+    cached = attr.ib(default=False, init=False)
+    cache_key = attr.ib(default=None, init=False)
+    cache = attr.ib(default=None, init=False, eq=False)
+    retry = attr.ib(default=None, init=False)
+
     def __attrs_post_init__(self):
-        functools.update_wrapper(self, self.func)
+        # Lazy function must not be imported by copying its attributes.
+        if not isinstance(self.func, LazyFunction):
+            functools.update_wrapper(self, self.func)
 
     @name.default
     def name_default(self):
@@ -524,3 +1584,37 @@ def end_point():
         func.is_end_point = True
         return func
     return DecoratorStack.add(decorator)
+
+
+def cached(key=None, cache=None):
+    """
+    Store completion of task in cache of results, so task that was already
+    completed for same key is not executed again when it is replayed, eg. after
+    failure or crash. Task is skipped as completed.
+
+    :param key: function that receives context and returns key of task
+                completion, task is completed only once per
+                :attr:`Runner.cache_scope` if not set, so runners sharing
+                cache must have different scopes (or ``key``)
+    :param cache: :class:`.ResultCache` of task, :attr:`Runner.result_cache`
+                  is used if not set
+    """
+    def decorator(func):
+        func.cached = True
+        func.cache_key = key
+        func.cache = cache
+        return func
+    return DecoratorStack.add(decorator)
+
+
+def retry(*args, **kwargs):
+    """
+    Retry task when it fails, with exponential backoff. See
+    :class:`RetryPolicy` for arguments documentation.
+    """
+    policy = RetryPolicy(*args, **kwargs)
+
+    def decorator(func):
+        func.retry = policy
+        return func
+    return DecoratorStack.add(decorator)
@@ -0,0 +1,411 @@
+import enum
+import logging
+import os
+import socket
+import time
+import uuid
+
+import attr
+
+from .process import RemoteTaskMixin, execute_snapshot
+from .store import PickleCodec
+from .workflow import Runner, Wait, WorkflowError
+
+
+__all__ = [
+    'Job', 'JobResult', 'JobStatus', 'WorkQueue', 'SQLiteWorkQueue',
+    'QueueRunner', 'Worker',
+]
+
+logger = logging.getLogger(__name__)
+
+
+@enum.unique
+class JobStatus(enum.Enum):
+    """
+    Enumeration of job statuses in :class:`SQLiteWorkQueue`.
+
+    :cvar QUEUED: job waits for worker
+    :cvar LEASED: job is leased by worker, it is visible again when lease
+                  expires
+    :cvar DONE: job has result that was not delivered yet
+    """
+
+    QUEUED = 1
+    LEASED = 2
+    DONE = 3
+
+
+@attr.s(frozen=True)
+class Job:
+    """
+    Task execution sent to worker through :class:`WorkQueue`.
+
+    :ivar id: unique key of job, dispatching task waits for event with this key
+    :ivar task: name of task
+    :ivar module: module of task function
+    :ivar qualname: qualified name of task function
+    :ivar context: snapshot of context passed to task
+    :ivar worker: name of worker that leased job
+    :ivar attempt: number of leases of job, identifies lease of worker
+    """
+
+    id = attr.ib()
+    task = attr.ib()
+    module = attr.ib()
+    qualname = attr.ib()
+    context = attr.ib(repr=False)
+    worker = attr.ib(default=None)
+    attempt = attr.ib(default=0)
+
+
+@attr.s(frozen=True)
+class JobResult:
+    """
+    Result of :class:`Job` delivered to dispatching runner as signal payload.
+
+    :ivar result: result returned by task
+    :ivar changes: context keys changed by task, dict
+    :ivar deleted: context keys deleted by task
+    :ivar error: exception raised by task or ``None``
+    """
+
+    result = attr.ib()
+    changes = attr.ib(factory=dict, repr=False)
+    deleted = attr.ib(default=(), converter=tuple, repr=False)
+    error = attr.ib(default=None)
+
+
+@attr.s
+class WorkQueue:
+    """
+    Base class of queues that transport jobs from :class:`QueueRunner` to
+    :class:`Worker` and their results back.
+
+    Worker leases job for visibility timeout, job is not visible to other
+    workers meanwhile. If worker does not complete job before lease expires
+    (e.g. worker crashed), job is visible again and is leased by other worker,
+    so each job is executed at least once. Result of job is kept until it is
+    delivered by :meth:`deliver` and acknowledged.
+
+    Subclasses must implement :meth:`put`, :meth:`lease`, :meth:`extend`,
+    :meth:`complete`, :meth:`completed` and :meth:`ack`.
+    """
+
+    def put(self, job):
+        """Add :class:`Job` to queue."""
+        raise NotImplementedError
+
+    def lease(self, worker, visibility_timeout):
+        """
+        Lease next visible job for worker for ``visibility_timeout`` seconds.
+        Returns :class:`Job` or ``None`` if there is no visible job.
+        """
+        raise NotImplementedError
+
+    def extend(self, job, visibility_timeout):
+        """
+        Extend lease of job by ``visibility_timeout`` seconds from now.
+        Returns ``False`` if lease of job was lost.
+        """
+        raise NotImplementedError
+
+    def complete(self, job, result):
+        """
+        Store :class:`JobResult` of leased job. Returns ``False`` and result
+        is dropped if lease of job was lost.
+        """
+        raise NotImplementedError
+
+    def completed(self, ids=None):
+        """List of pairs of job key and :class:`JobResult`, all or of ``ids``."""
+        raise NotImplementedError
+
+    def ack(self, job_id):
+        """Remove delivered job."""
+        raise NotImplementedError
+
+    def deliver(self, target, ids=None):
+        """
+        Deliver results of completed jobs to ``target``, :class:`.Runner` or
+        :class:`.BatchRunner`, by signal with job key. Jobs are acknowledged
+        only if their result woke up some task. Returns number of delivered
+        results.
+        """
+        delivered = 0
+        for job_id, result in self.completed(ids):
+            if target.signal(job_id, result):
+                self.ack(job_id)
+                delivered += 1
+        return delivered
+
+
+@attr.s
+class SQLiteWorkQueue(WorkQueue):
+    """
+    Work queue in sqlite3 database, reference implementation of
+    :class:`WorkQueue`.
+
+    Workers on same host (or on hosts sharing file system with working file
+    locks) open database file by path. Connection must not be shared between
+    threads. Leases are taken in immediate transactions, so each visible job is
+    leased by single worker.
+
+    :ivar path: path to database file, ``:memory:`` for in-memory database
+    :ivar codec: codec of jobs and results, :class:`.PickleCodec` by default
+    :ivar max_attempts: number of leases after which job fails with
+                        :class:`.WorkflowError`, not limited if ``None``
+    """
+
+    path = attr.ib(default=':memory:')
+    codec = attr.ib(factory=PickleCodec)
+    max_attempts = attr.ib(default=None)
+    connection = attr.ib(init=False, repr=False)
+
+    SCHEMA = (
+        'CREATE TABLE IF NOT EXISTS jobs ('
+        ' id TEXT PRIMARY KEY, data BLOB NOT NULL, status INTEGER NOT NULL,'
+        ' visible REAL NOT NULL, worker TEXT, attempts INTEGER NOT NULL,'
+        ' result BLOB)',
+        'CREATE INDEX IF NOT EXISTS jobs_visible ON jobs (status, visible)',
+    )
+
+    # Number of job keys in single query of completed(), SQLite limits
+    # number of query parameters.
+    CHUNK_SIZE = 500
+
+    @connection.default
+    def _connection_default(self):
+        import sqlite3
+
+        # Transactions are controlled explicitly, see lease().
+        connection = sqlite3.connect(self.path, isolation_level=None)
+        for statement in self.SCHEMA:
+            connection.execute(statement)
+        return connection
+
+    def close(self):
+        """Close database connection."""
+        self.connection.close()
+
+    def put(self, job):
+        self.connection.execute(
+            'INSERT INTO jobs (id, data, status, visible, attempts)'
+            ' VALUES (?, ?, ?, ?, 0)',
+            (job.id, self.codec.encode(job), JobStatus.QUEUED.value, time.time()))
+
+    def lease(self, worker, visibility_timeout):
+        # Queued jobs are visible since they were added, leased jobs since
+        # their lease expired.
+        self.connection.execute('BEGIN IMMEDIATE')
+        try:
+            while True:
+                now = time.time()
+                row = self.connection.execute(
+                    'SELECT id, data, attempts FROM jobs'
+                    ' WHERE status IN (?, ?) AND visible <= ?'
+                    ' ORDER BY visible LIMIT 1',
+                    (JobStatus.QUEUED.value, JobStatus.LEASED.value, now),
+                ).fetchone()
+                if row is None:
+                    job = None
+                    break
+                job_id, data, attempts = row
+                if self.max_attempts is not None and attempts >= self.max_attempts:
+                    logger.error('Lease of job %s expired %d times', job_id, attempts)
+                    error = WorkflowError('Job %s was not completed in %d attempts.'
+                                          % (job_id, attempts))
+                    self._store_result(job_id, JobResult(False, error=error))
+                    continue
+                self.connection.execute(
+                    'UPDATE jobs SET status = ?, visible = ?, worker = ?,'
+                    ' attempts = ? WHERE id = ?',
+                    (JobStatus.LEASED.value, now + visibility_timeout, worker,
+                     attempts + 1, job_id))
+                job = attr.evolve(self.codec.decode(data), worker=worker,
+                                  attempt=attempts + 1)
+                break
+        except BaseException:
+            self.connection.execute('ROLLBACK')
+            raise
+        self.connection.execute('COMMIT')
+        return job
+
+    def extend(self, job, visibility_timeout):
+        cursor = self.connection.execute(
+            'UPDATE jobs SET visible = ? WHERE id = ? AND status = ? AND attempts = ?',
+            (time.time() + visibility_timeout, job.id, JobStatus.LEASED.value,
+             job.attempt))
+        return cursor.rowcount == 1
+
+    def complete(self, job, result):
+        try:
+            data = self.codec.encode(result)
+        except Exception as e:
+            # Exception raised by task may not be serializable.
+            logger.warning('Result of job %s cannot be encoded: %s', job.id, e)
+            error = WorkflowError('Task %s failed: %r' % (job.task, result.error or e))
+            data = self.codec.encode(JobResult(False, error=error))
+        cursor = self.connection.execute(
+            'UPDATE jobs SET status = ?, result = ?'
+            ' WHERE id = ? AND status = ? AND attempts = ?',
+            (JobStatus.DONE.value, data, job.id, JobStatus.LEASED.value, job.attempt))
+        if cursor.rowcount != 1:
+            logger.warning('Lease of job %s by %s was lost, result dropped',
+                           job.id, job.worker)
+            return False
+        return True
+
+    def completed(self, ids=None):
+        query = 'SELECT rowid, id, result FROM jobs WHERE status = ?'
+        if ids is None:
+            rows = self.connection.execute(query, (JobStatus.DONE.value,)).fetchall()
+        else:
+            # Only jobs of runner are selected, not all completed jobs.
+            ids = list(ids)
+            rows = []
+            for index in range(0, len(ids), self.CHUNK_SIZE):
+                chunk = ids[index:index + self.CHUNK_SIZE]
+                rows.extend(self.connection.execute(
+                    query + ' AND id IN (%s)' % ', '.join('?' * len(chunk)),
+                    [JobStatus.DONE.value] + chunk))
+        rows.sort()
+        return [(job_id, self.codec.decode(data)) for _, job_id, data in rows]
+
+    def ack(self, job_id):
+        self.connection.execute('DELETE FROM jobs WHERE id = ?', (job_id,))
+
+    def status(self, job_id):
+        """
+        Get :class:`JobStatus` of job.
+
+        :raises KeyError: if there is no such job
+        """
+        row = self.connection.execute('SELECT status FROM jobs WHERE id = ?',
+                                      (job_id,)).fetchone()
+        if row is None:
+            raise KeyError(job_id)
+        return JobStatus(row[0])
+
+    def _store_result(self, job_id, result):
+        self.connection.execute(
+            'UPDATE jobs SET status = ?, result = ? WHERE id = ?',
+            (JobStatus.DONE.value, self.codec.encode(result), job_id))
+
+
+@attr.s
+class QueueRunner(RemoteTaskMixin, Runner):
+    """
+    Workflow execution engine that dispatches tasks to :class:`Worker`
+    processes, possibly on other hosts, through :class:`WorkQueue`.
+
+    Task with :attr:`labels` is not executed by runner, it is put to queue as
+    :class:`Job` and waits for event with job key (see :class:`.Wait`). Results
+    of jobs are delivered by :meth:`WorkQueue.deliver`, it is called by
+    :meth:`run` for jobs of this runner, use it directly for
+    :class:`.BatchRunner`. Task woken up by result merges context changes made
+    by worker and returns result of job, exception raised in worker is raised
+    again and task is dispatched again in next execution.
+
+    Like in :class:`.ProcessPoolRunner`, tasks are resolved by module and
+    qualified name of their function, context must be mapping and workers
+    receive its snapshot, see :class:`.RemoteTaskMixin`. Dispatched tasks do
+    not receive payload of other signals.
+
+    :ivar queue: :class:`WorkQueue`
+    :ivar labels: labels of dispatched tasks
+    :ivar context_keys: context keys used by tasks, dict with task name as
+                        key, whole context is sent to tasks not listed
+    """
+
+    queue = attr.ib(default=None, kw_only=True, repr=False, eq=False)
+    labels = attr.ib(default=frozenset({'remote'}), kw_only=True, converter=frozenset)
+    context_keys = attr.ib(factory=dict, kw_only=True)
+
+    def run(self):
+        # Results of jobs are delivered before run, so tasks woken up by them
+        # are executed.
+        if self.events:
+            self.queue.deliver(self, ids=self.events.values())
+        return super().run()
+
+    def task_execute(self, task):
+        if not self.is_remote(task):
+            return super().task_execute(task)
+        result = self.signals.get(task.name)
+        if isinstance(result, JobResult):
+            if result.error is not None:
+                # Result is dropped, so task is dispatched again.
+                del self.signals[task.name]
+                raise result.error
+            self.merge(task, result.changes, result.deleted)
+            return result.result
+        job = self.dispatch(task)
+        return Wait(event=job.id)
+
+    def dispatch(self, task):
+        """Put job executing task to queue, returns :class:`Job`."""
+        module_name, qualname = self.function_reference(task)
+        job = Job(uuid.uuid4().hex, task.name, module_name, qualname,
+                  self.snapshot(task))
+        self.queue.put(job)
+        logger.info('Task %s was dispatched as job %s', task.name, job.id)
+        return job
+
+
+def _default_worker_name():
+    return '%s-%d' % (socket.gethostname(), os.getpid())
+
+
+@attr.s
+class Worker:
+    """
+    Worker that executes jobs from :class:`WorkQueue`.
+
+    Lease of job is not extended while task is executed, so
+    ``visibility_timeout`` must be longer than execution of tasks, otherwise
+    job is executed again by other worker and result of this worker is
+    dropped.
+
+    :ivar queue: :class:`WorkQueue`
+    :ivar name: name of worker, host name and process id by default
+    :ivar visibility_timeout: number of seconds job is leased for
+    :ivar processed: number of executed jobs
+    """
+
+    queue = attr.ib()
+    name = attr.ib(factory=_default_worker_name)
+    visibility_timeout = attr.ib(default=60.0)
+    processed = attr.ib(default=0, init=False)
+
+    def run_once(self):
+        """Execute next visible job, returns ``False`` if there was none."""
+        job = self.queue.lease(self.name, self.visibility_timeout)
+        if job is None:
+            return False
+        self.queue.complete(job, self.execute(job))
+        self.processed += 1
+        return True
+
+    def run(self, wait=False, poll_interval=1.0):
+        """
+        Execute jobs until queue is empty or, if ``wait`` is ``True``,
+        forever, polling queue each ``poll_interval`` seconds.
+        """
+        while True:
+            if not self.run_once():
+                if not wait:
+                    return
+                time.sleep(poll_interval)
+
+    def execute(self, job):
+        """Execute task of job, returns :class:`JobResult`."""
+        logger.info('Worker %s is executing task %s (job %s, attempt %d)',
+                    self.name, job.task, job.id, job.attempt)
+        try:
+            result, changes, deleted, _ = execute_snapshot(
+                job.module, job.qualname, job.context)
+        except Exception as e:
+            logger.exception(e)
+            return JobResult(False, error=e)
+        return JobResult(result, changes, deleted)